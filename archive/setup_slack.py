@@ -1,6 +1,11 @@
 import requests
 import sys
 import os
+from pathlib import Path
+
+# Shared per-request tracing (SCRIPT_TRACE=summary,jsonl=...,prom=...) lives with the Trello client
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+from trello_client.tracing import instrument
 
 def setup_slack():
     print("🚀 ReThread Slack Setup")
@@ -10,6 +15,7 @@ def setup_slack():
     token = os.getenv("SLACK_TOKEN") or input("Enter your Slack token: ").strip()
     
     base_url = "https://slack.com/api"
+    session = instrument(requests.Session(), "slack")
     headers = {
         "Authorization": f"Bearer {token}",
         "Content-Type": "application/json"
@@ -27,7 +33,7 @@ def setup_slack():
         print(f"\nCreating #{ch['name']}...")
         
         # 1. Create Channel
-        create_resp = requests.post(
+        create_resp = session.post(
             f"{base_url}/conversations.create",
             headers=headers,
             json={"name": ch['name']}
@@ -51,7 +57,7 @@ def setup_slack():
         print(f"  ✅ Created! (ID: {channel_id})")
 
         # 2. Set Topic
-        topic_resp = requests.post(
+        topic_resp = session.post(
             f"{base_url}/conversations.setTopic",
             headers=headers,
             json={"channel": channel_id, "topic": ch['topic']}
@@ -64,5 +70,10 @@ def setup_slack():
 
     print("\n🎉 Slack setup complete!")
 
+def main(argv=None):
+    """Entry point for `rethread-board slack-setup` (takes no arguments)."""
+    setup_slack()
+    return 0
+
 if __name__ == "__main__":
-    setup_slack()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
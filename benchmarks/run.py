@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Benchmark the board scripts in scripts/ against the local fake Trello server.
+
+Each (entry point, board size) pair runs as its own subprocess against a fresh
+fake server seeded with a synthetic "ReThread Sprint Board" of N cards, with its
+own TRELLO_STATE_DIR (no snapshot cache or index carried between runs). Recorded
+per run: wall time, request count, bytes in/out, peak RSS of the script process,
+429 responses (each one is a retry), exit code and per-route request counts.
+
+Results go to benchmarks/results/<date>-<commit>.json; --compare prints the
+deltas between two result files.
+
+    python benchmarks/run.py
+    python benchmarks/run.py --sizes 10,100 --scripts add_transportation_label --latency-ms 50
+    python benchmarks/run.py --compare benchmarks/results/old.json benchmarks/results/new.json
+
+The fake enforces Trello's 300/10s key and 100/10s token windows by default, so
+per-card writes on the larger boards are rate-bound (10,000 label writes take
+well over 15 minutes); --no-limits measures the client alone.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = REPO_ROOT / "scripts"
+RESULTS_DIR = REPO_ROOT / "benchmarks" / "results"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from trello_client.fake import FakeTrelloServer  # noqa: E402
+
+ENTRY_POINTS = [
+    "create_sprint_board",
+    "add_phase_placeholders",
+    "restructure_sprint_board",
+    "add_transportation_label",
+    "add_admin_list_and_move_setup_cards",
+    "rollover_cycle",
+    "add_trello_cards",
+]
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+
+SHORT_LINK = "m47dQixP"
+# Pre-Option-A lists (restructure moves them), the Option A lists the other scripts
+# expect, and add_trello_cards' "To Do".
+SEED_LISTS = [
+    "Idea Backlog",
+    "Current Sprint",
+    "Active",
+    "Week A: Discovery",
+    "Week B: Execution",
+    "Blocked / Waiting",
+    "Done",
+    "To Do",
+]
+SEED_MEMBERS = ["moazelhag", "ahmadtaleb"]
+# Every ADMIN_EVERY-th card looks like setup work, so the admin move rule has something to match.
+ADMIN_EVERY = 10
+ADMIN_NAME = "Landing page – process and who you've worked with"
+
+DEFAULT_TIMEOUT = 3600
+
+
+def seed(server, cards):
+    board = server.state.seed_board(lists=SEED_LISTS, cards=cards, short_link=SHORT_LINK, members=SEED_MEMBERS)
+    for i, card in enumerate(server.state.cards.values()):
+        if i % ADMIN_EVERY == 0:
+            card["name"] = f"{ADMIN_NAME} #{i}"
+    return board
+
+
+def _peak_rss_kb(rusage):
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    return rusage.ru_maxrss // 1024 if sys.platform == "darwin" else rusage.ru_maxrss
+
+
+def run_one(script, cards, latency, enforce_limits, timeout):
+    server = FakeTrelloServer(latency=latency, enforce_limits=enforce_limits).start()
+    try:
+        seed(server, cards)
+        with tempfile.TemporaryDirectory(prefix="trello-bench-") as state_dir:
+            env = dict(os.environ)
+            env.pop("TRELLO_BOARD_ID", None)
+            env.update(
+                TRELLO_BASE_URL=server.url,
+                TRELLO_API_KEY="bench-key",
+                TRELLO_TOKEN="bench-token",
+                TRELLO_BOARD_SHORT_LINK=SHORT_LINK,
+                TRELLO_STATE_DIR=state_dir,
+            )
+            stderr_path = Path(state_dir) / "stderr.txt"
+            with open(stderr_path, "w", encoding="utf-8") as stderr:
+                start = time.perf_counter()
+                proc = subprocess.Popen(
+                    [sys.executable, str(SCRIPTS_DIR / f"{script}.py")],
+                    cwd=REPO_ROOT,
+                    env=env,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=stderr,
+                )
+                timer = threading.Timer(timeout, proc.kill)
+                timer.start()
+                # wait4 gives this child's own rusage (peak RSS), not the running max over all children.
+                _, status, rusage = os.wait4(proc.pid, 0)
+                timer.cancel()
+                wall = time.perf_counter() - start
+                proc.returncode = os.waitstatus_to_exitcode(status)
+            errors = stderr_path.read_text(encoding="utf-8").strip().splitlines()
+        with server._lock:
+            stats, routes = dict(server.stats), dict(server.routes)
+    finally:
+        server.stop()
+    return {
+        "script": script,
+        "cards": cards,
+        "returncode": proc.returncode,
+        "wall_s": round(wall, 3),
+        "requests": stats.get("requests", 0),
+        "bytes_in": stats.get("bytes_in", 0),
+        "bytes_out": stats.get("bytes_out", 0),
+        "peak_rss_kb": _peak_rss_kb(rusage),
+        "throttled_429": stats.get("throttled", 0),
+        "routes": routes,
+        "stderr_tail": errors[-5:],
+    }
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return out.stdout.strip()
+
+
+def print_row(run):
+    flag = "" if run["returncode"] == 0 else f"  (exit {run['returncode']})"
+    print(
+        f"{run['script']:<38} {run['cards']:>6} {run['wall_s']:>9.2f}s {run['requests']:>7} req"
+        f" {run['bytes_out'] / 1024:>9.0f} KiB down {run['peak_rss_kb'] / 1024:>7.1f} MiB {run['throttled_429']:>5} 429{flag}"
+    )
+
+
+def compare(old_path, new_path):
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, "r", encoding="utf-8") as f:
+        new = json.load(f)
+    before = {(r["script"], r["cards"]): r for r in old["runs"]}
+    print(f"{old['commit']} -> {new['commit']}")
+    for run in new["runs"]:
+        prev = before.get((run["script"], run["cards"]))
+        if prev is None:
+            continue
+        parts = []
+        for metric in ("wall_s", "requests", "bytes_out", "peak_rss_kb", "throttled_429"):
+            a, b = prev[metric], run[metric]
+            change = f"{(b - a) / a * 100:+.0f}%" if a else f"{b - a:+}"
+            parts.append(f"{metric} {a} -> {b} ({change})")
+        print(f"{run['script']:<38} {run['cards']:>6}  " + ", ".join(parts))
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the board scripts against the fake Trello server.")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="Comma-separated board sizes (cards).")
+    parser.add_argument("--scripts", default=",".join(ENTRY_POINTS), help="Comma-separated entry points.")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Added to every fake API call.")
+    parser.add_argument("--no-limits", action="store_true", help="Don't enforce Trello's rate-limit windows.")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Kill a run after this many seconds.")
+    parser.add_argument("--out", default=None, help="Result file (default benchmarks/results/<date>-<commit>.json).")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Print deltas between two result files.")
+    args = parser.parse_args(argv)
+    if args.compare:
+        return compare(*args.compare)
+
+    scripts = [s.strip() for s in args.scripts.split(",") if s.strip()]
+    unknown = [s for s in scripts if s not in ENTRY_POINTS]
+    if unknown:
+        print(f"Unknown entry point(s): {', '.join(unknown)}", file=sys.stderr)
+        return 1
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    commit = _git_commit()
+    result = {
+        "commit": commit,
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "latency_ms": args.latency_ms,
+        "rate_limits": not args.no_limits,
+        "runs": [],
+    }
+    out = Path(args.out) if args.out else RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-{commit}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+
+    for cards in sizes:
+        for script in scripts:
+            run = run_one(script, cards, args.latency_ms / 1000.0, not args.no_limits, args.timeout)
+            print_row(run)
+            result["runs"].append(run)
+            # Written after every run so an interrupted benchmark keeps what it measured.
+            with open(out, "w", encoding="utf-8") as f:
+                json.dump(result, f, indent=2)
+    print(f"\nResults: {out}")
+    return 0 if all(r["returncode"] == 0 for r in result["runs"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
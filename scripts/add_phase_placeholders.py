@@ -11,192 +11,107 @@ Requires Trello usernames for assignment. In secrets.json under "trello":
 
 Uses same board resolution as other scripts (TRELLO_BOARD_SHORT_LINK or board name).
 """
-import json
+import argparse
 import os
 import sys
 from pathlib import Path
 
-import requests
+from trello_client import (
+    CardSpec,
+    IdempotencyIndex,
+    TrelloClient,
+    TrelloError,
+    invalidate_snapshot,
+    load_snapshot,
+    seed_cards,
+)
+from trello_client.credentials import get_trello_credentials
+from trello_client.ids import resolve_board
+from trello_client.playbook import PlaybookError, load_playbook
+from trello_client.render import phase_desc
+from trello_client.rules import LEAD_BY_WEEK, RulesError, lead_member_ids
 
-BASE = "https://api.trello.com/1"
 SCRIPT_DIR = Path(__file__).resolve().parent
 REPO_ROOT = SCRIPT_DIR.parent
 DATA_PATH = REPO_ROOT / "data" / "sprint_process.json"
-SECRETS_PATH = REPO_ROOT / "secrets.json"
+# Board looked up (or created) by name when no TRELLO_BOARD_ID / TRELLO_BOARD_SHORT_LINK is set
+BOARD_NAME = os.environ.get("TRELLO_BOARD_NAME", "").strip() or "ReThread Sprint Board"
 
 WEEK_A_LIST = "Week A: Discovery"
 WEEK_B_LIST = "Week B: Execution"
 
-# Lead by week: phases 1–3 = Moaz, phases 4–8 = Ahmad
-LEAD_BY_WEEK = {"A": "moaz", "B": "ahmad"}
 
-
-def load_secrets():
-    if not SECRETS_PATH.exists():
-        return {}
-    try:
-        with open(SECRETS_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (json.JSONDecodeError, OSError):
-        return {}
+def placeholder_spec(phase, list_id, lead_id):
+    """Phase card with its checklist; the lead is assigned on the create call itself."""
+    return CardSpec(
+        list_id,
+        phase.list_name,
+        desc=phase_desc(phase, "Outputs", checklist=False, lead=LEAD_BY_WEEK[phase.week].capitalize()),
+        pos="bottom",
+        member_ids=[lead_id] if lead_id else [],
+        checklist=list(phase.checklist),
+        checklist_name=f"Phase {phase.num} checklist",
+        key=f"phase-placeholder:{phase.id}",
+    )
 
 
-def get_trello_credentials():
-    key = os.environ.get("TRELLO_API_KEY", "").strip()
-    token = os.environ.get("TRELLO_TOKEN", "").strip()
-    if not key or not token:
-        secrets = load_secrets()
-        trello = secrets.get("trello") or {}
-        key = key or trello.get("api_key") or ""
-        token = token or trello.get("token") or ""
-        if isinstance(key, str):
-            key = key.strip()
-        if isinstance(token, str):
-            token = token.strip()
-    if not key or not token:
-        key = input("Trello API Key: ").strip()
-        token = input("Trello Token: ").strip()
-    return key, token
-
-
-def get_board_id(params):
-    board_id = os.environ.get("TRELLO_BOARD_ID", "").strip()
-    short = os.environ.get("TRELLO_BOARD_SHORT_LINK", "").strip()
-    if board_id:
-        r = requests.get(f"{BASE}/boards/{board_id}", params=params)
-        if r.status_code == 200:
-            return r.json()["id"]
-    if short:
-        r = requests.get(f"{BASE}/boards/{short}", params=params)
-        if r.status_code == 200:
-            return r.json()["id"]
-    r = requests.get(f"{BASE}/members/me/boards", params=params)
-    if r.status_code != 200:
-        return None
-    for b in r.json():
-        if b.get("name") == "ReThread Sprint Board":
-            return b["id"]
-    return None
-
-
-def get_member_ids(board_id, params):
-    """Resolve Moaz and Ahmad Trello usernames to member IDs. Reads secrets.json trello.member_username_moaz, member_username_ahmad."""
-    r = requests.get(f"{BASE}/boards/{board_id}/members", params=params)
-    if r.status_code != 200:
-        return None, None
-    members = r.json()
-    secrets = load_secrets()
-    trello = secrets.get("trello") or {}
-    username_moaz = (trello.get("member_username_moaz") or os.environ.get("TRELLO_USERNAME_MOAZ") or "moazelhag").strip().lower()
-    username_ahmad = (trello.get("member_username_ahmad") or os.environ.get("TRELLO_USERNAME_AHMAD") or "ahmadtaleb").strip().lower()
-    moaz_id = None
-    ahmad_id = None
-    for m in members:
-        un = (m.get("username") or "").lower()
-        fn = (m.get("fullName") or "").lower()
-        if un == username_moaz:
-            moaz_id = m["id"]
-        elif not moaz_id and ("moaz" in fn or "moaz" in un):
-            moaz_id = m["id"]
-        if un == username_ahmad:
-            ahmad_id = m["id"]
-        elif not ahmad_id and ("ahmad" in fn or un == "ahmadtaleb"):
-            ahmad_id = m["id"]
-    return moaz_id, ahmad_id
-
-
-def build_card_desc(phase):
-    lines = [f"**Purpose:** {phase['purpose']}", "", "**Outputs:**"]
-    for o in phase.get("outputs", []):
-        lines.append(f"- {o}")
-    lines.extend(["", "**Exit criteria:**"])
-    for e in phase.get("exitCriteria", []):
-        lines.append(f"- {e}")
-    return "\n".join(lines)
-
-
-def add_checklist_to_card(params, card_id, phase):
-    name = f"Phase {phase['num']} checklist"
-    r = requests.post(f"{BASE}/checklists", params={**params, "idCard": card_id, "name": name})
-    if r.status_code != 200:
-        return
-    cl_id = r.json()["id"]
-    for item in phase.get("checklist", []):
-        label = item.get("label", item) if isinstance(item, dict) else item
-        requests.post(
-            f"{BASE}/checklists/{cl_id}/checkItems",
-            params={"key": params["key"], "token": params["token"]},
-            json={"name": label},
-        )
-
-
-def main():
-    key, token = get_trello_credentials()
-    if not key or not token:
-        print("Need Trello API key and token.", file=sys.stderr)
-        return 1
-    params = {"key": key, "token": token}
-
-    with open(DATA_PATH, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    phases = data.get("phases", [])
-
-    board_id = get_board_id(params)
-    if not board_id:
-        print("Board not found.", file=sys.stderr)
+def run(client, board_ref):
+    """Place the phase cards on one board. Returns an exit code."""
+    try:
+        playbook = load_playbook(DATA_PATH)
+    except PlaybookError as e:
+        print(f"Invalid playbook: {e}", file=sys.stderr)
         return 1
 
-    r = requests.get(f"{BASE}/boards/{board_id}/lists", params=params)
-    if r.status_code != 200:
-        print(f"Lists fetch failed: {r.text}", file=sys.stderr)
+    # Lists, members and card positions in one read (or only a last-activity check, if the cached snapshot is current)
+    try:
+        snapshot = load_snapshot(client, board_ref, verify=True)
+    except TrelloError as e:
+        print(f"Board fetch failed: {e.text}", file=sys.stderr)
         return 1
-    lists = r.json()
-    list_by_name = {lst["name"]: lst for lst in lists}
-    week_a = list_by_name.get(WEEK_A_LIST)
-    week_b = list_by_name.get(WEEK_B_LIST)
+    week_a = snapshot.list_by_name(WEEK_A_LIST)
+    week_b = snapshot.list_by_name(WEEK_B_LIST)
     if not week_a or not week_b:
         print(f"Need lists '{WEEK_A_LIST}' and '{WEEK_B_LIST}'. Create them first or run restructure_sprint_board.py.", file=sys.stderr)
         return 1
 
-    moaz_id, ahmad_id = get_member_ids(board_id, params)
+    try:
+        moaz_id, ahmad_id = lead_member_ids(snapshot.members)
+    except RulesError as e:
+        print(f"Bad board rules: {e}", file=sys.stderr)
+        return 1
     if not moaz_id:
         print("Warning: Could not resolve Moaz (Week A lead). Add trello.member_username_moaz to secrets.json.", file=sys.stderr)
     if not ahmad_id:
         print("Warning: Could not resolve Ahmad (Week B lead). Add trello.member_username_ahmad to secrets.json (e.g. ahmadtaleb).", file=sys.stderr)
 
-    for phase in phases:
-        week = phase.get("week", "A")
-        num = phase["num"]
-        title = phase["title"]
-        timebox = phase.get("timebox", "")
-        list_obj = week_a if week == "A" else week_b
-        lead_id = moaz_id if week == "A" else ahmad_id
-        card_name = f"{num}. {title} ({timebox})"
-        desc = build_card_desc(phase)
-        r = requests.post(
-            f"{BASE}/cards",
-            params={
-                **params,
-                "idList": list_obj["id"],
-                "name": card_name,
-                "desc": desc + f"\n\n**Lead:** {LEAD_BY_WEEK[week].capitalize()}",
-                "pos": "bottom",
-            },
-        )
-        if r.status_code != 200:
-            print(f"Failed to create card '{card_name}': {r.text}", file=sys.stderr)
+    specs = []
+    for phase in playbook.phases:
+        list_obj = week_a if phase.week == "A" else week_b
+        lead_id = moaz_id if phase.week == "A" else ahmad_id
+        specs.append(placeholder_spec(phase, list_obj.id, lead_id))
+
+    # Cards go up in parallel; each card's check items follow as soon as its checklist exists.
+    # Phases already placed on this board (by phase id) are skipped, or updated if the playbook changed.
+    positions = {lst.id: [c.pos for c in snapshot.cards_in(lst.id)] for lst in (week_a, week_b)}
+    with IdempotencyIndex() as index:
+        results = seed_cards(client, specs, existing_positions=positions, index=index, board_id=snapshot.id)
+    if any(r.action != "skipped" for r in results):
+        invalidate_snapshot(board_ref, snapshot.id)
+    for result in results:
+        card_name = result.spec.name
+        if result.action == "skipped":
+            print(f"  Already on board: {card_name}")
+            continue
+        if not result.ok:
+            print(f"Failed to create card '{card_name}': {result.error or 'not created'}", file=sys.stderr)
             continue
-        card_id = r.json()["id"]
-        add_checklist_to_card(params, card_id, phase)
-        if lead_id:
-            rm = requests.post(
-                f"{BASE}/cards/{card_id}/idMembers",
-                params={**params, "value": lead_id},
-            )
-            if rm.status_code == 200:
-                print(f"  Created + assigned lead: {card_name}")
-            else:
-                print(f"  Created (assign lead manually): {card_name}")
+        if result.checklist_errors:
+            print(f"  Checklist incomplete on '{card_name}': {result.checklist_errors[0].text}", file=sys.stderr)
+        if result.action != "created":
+            print(f"  {result.action.capitalize()}: {card_name}")
+        elif result.spec.member_ids:
+            print(f"  Created + assigned lead: {card_name}")
         else:
             print(f"  Created (assign lead manually): {card_name}")
 
@@ -204,5 +119,20 @@ def main():
     return 0
 
 
+def main(argv=None):
+    argparse.ArgumentParser(description="Add phase placeholder cards with their leads to Week A and Week B.").parse_args(argv)
+    key, token = get_trello_credentials()
+    if not key or not token:
+        print("Need Trello API key and token.", file=sys.stderr)
+        return 1
+    client = TrelloClient(key, token)
+
+    board_ref = resolve_board(client, BOARD_NAME)
+    if not board_ref:
+        print("Board not found.", file=sys.stderr)
+        return 1
+    return run(client, board_ref)
+
+
 if __name__ == "__main__":
     sys.exit(main())
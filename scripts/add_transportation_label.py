@@ -7,137 +7,78 @@ admin tasks stay without this label.
 Creates the Transportation label on the board if it doesn't exist (green).
 Uses secrets.json or TRELLO_* env. TRELLO_BOARD_SHORT_LINK or board name.
 """
-import json
 import os
 import sys
-from pathlib import Path
 
-import requests
+from trello_client import Journal, TrelloClient, TrelloError, invalidate_snapshot, load_snapshot
+from trello_client.cli import plan_apply_parser, run_mode
+from trello_client.credentials import get_trello_credentials
+from trello_client.ids import resolve_board
+from trello_client.reconcile import DesiredState, LabelRule, apply, plan, print_plan, print_results, run_resume, run_rollback
+from trello_client.rules import RulesError, load_board_rules, rule_section
 
-BASE = "https://api.trello.com/1"
-SCRIPT_DIR = Path(__file__).resolve().parent
-REPO_ROOT = SCRIPT_DIR.parent
-SECRETS_PATH = REPO_ROOT / "secrets.json"
+# Board looked up (or created) by name when no TRELLO_BOARD_ID / TRELLO_BOARD_SHORT_LINK is set
+BOARD_NAME = os.environ.get("TRELLO_BOARD_NAME", "").strip() or "ReThread Sprint Board"
 
-ADMIN_LIST_NAME = "Admin / Setup"
-LABEL_NAME = "Transportation"
-LABEL_COLOR = "green"
 
+def desired_state():
+    """The label (board_rules.json "transportation_label") on every card outside its excluded lists."""
+    rules = rule_section(load_board_rules(), "transportation_label", name=str, color=str, exclude_lists=list)
+    return DesiredState(label_rules=[LabelRule(rules["name"], rules["color"], exclude_lists=tuple(rules["exclude_lists"]))])
 
-def load_secrets():
-    if not SECRETS_PATH.exists():
-        return {}
-    try:
-        with open(SECRETS_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (json.JSONDecodeError, OSError):
-        return {}
 
+def run(client, board_ref, mode="apply"):
+    """Tag every non-Admin card on one board; mode: plan, apply, resume or rollback. Returns an exit code."""
+    if mode == "resume":
+        return run_resume(client, board_ref)
+    if mode == "rollback":
+        return run_rollback(client, board_ref)
 
-def get_trello_credentials():
-    key = os.environ.get("TRELLO_API_KEY", "").strip()
-    token = os.environ.get("TRELLO_TOKEN", "").strip()
-    if not key or not token:
-        secrets = load_secrets()
-        trello = secrets.get("trello") or {}
-        key = key or trello.get("api_key") or ""
-        token = token or trello.get("token") or ""
-        if isinstance(key, str):
-            key = key.strip()
-        if isinstance(token, str):
-            token = token.strip()
-    if not key or not token:
-        key = input("Trello API Key: ").strip()
-        token = input("Trello Token: ").strip()
-    return key, token
-
-
-def get_board_id(params):
-    board_id = os.environ.get("TRELLO_BOARD_ID", "").strip()
-    short = os.environ.get("TRELLO_BOARD_SHORT_LINK", "").strip()
-    if board_id:
-        r = requests.get(f"{BASE}/boards/{board_id}", params=params)
-        if r.status_code == 200:
-            return r.json()["id"]
-    if short:
-        r = requests.get(f"{BASE}/boards/{short}", params=params)
-        if r.status_code == 200:
-            return r.json()["id"]
-    r = requests.get(f"{BASE}/members/me/boards", params=params)
-    if r.status_code != 200:
-        return None
-    for b in r.json():
-        if b.get("name") == "ReThread Sprint Board":
-            return b["id"]
-    return None
-
-
-def main():
-    key, token = get_trello_credentials()
-    if not key or not token:
-        print("Need Trello API key and token.", file=sys.stderr)
+    try:
+        desired = desired_state()
+    except RulesError as e:
+        print(f"Bad board rules: {e}", file=sys.stderr)
         return 1
-    params = {"key": key, "token": token}
 
-    board_id = get_board_id(params)
-    if not board_id:
-        print("Board not found.", file=sys.stderr)
+    # Lists and labels in one read, cards streamed page by page into the plan (or only a last-activity check, if the cached snapshot is current)
+    try:
+        snapshot = load_snapshot(client, board_ref, stream_cards=True, verify=mode != "plan")
+    except TrelloError as e:
+        print(f"Board fetch failed: {e.text}", file=sys.stderr)
         return 1
 
-    # Get lists to know which list id is Admin / Setup
-    r = requests.get(f"{BASE}/boards/{board_id}/lists", params=params)
-    if r.status_code != 200:
-        print(f"Lists fetch failed: {r.text}", file=sys.stderr)
+    # Only cards missing the label get a write (plus the label itself, if it doesn't exist yet).
+    ops = plan(snapshot, desired)
+    if mode == "plan":
+        print_plan(ops)
+        return 0
+    with Journal(board_ref) as journal:
+        results = apply(client, snapshot, ops, journal=journal)
+    print_results(results)
+    if ops:
+        invalidate_snapshot(board_ref, snapshot.id)
+    if any(r.op.kind == "create_label" and not r.ok for r in results):
         return 1
-    lists = r.json()
-    admin_list_ids = {lst["id"] for lst in lists if lst.get("name") == ADMIN_LIST_NAME}
+    added = sum(1 for r in results if r.op.kind == "add_label" and r.ok)
 
-    # Get or create Transportation label
-    r = requests.get(f"{BASE}/boards/{board_id}/labels", params=params)
-    if r.status_code != 200:
-        print(f"Labels fetch failed: {r.text}", file=sys.stderr)
+    rule = desired.label_rules[0]
+    print(f"\nDone. Added '{rule.name}' to {added} card(s). Cards in {' / '.join(rule.exclude_lists) or 'no list'} were left untagged.")
+    return 0
+
+
+def main(argv=None):
+    args = plan_apply_parser("Tag every non-Admin card with the Transportation label.").parse_args(argv)
+    key, token = get_trello_credentials()
+    if not key or not token:
+        print("Need Trello API key and token.", file=sys.stderr)
         return 1
-    labels = r.json()
-    transport_label = next((lb for lb in labels if (lb.get("name") or "").strip() == LABEL_NAME), None)
-    if not transport_label:
-        r = requests.post(
-            f"{BASE}/labels",
-            params={**params, "name": LABEL_NAME, "color": LABEL_COLOR, "idBoard": board_id},
-        )
-        if r.status_code != 200:
-            print(f"Failed to create label '{LABEL_NAME}': {r.text}", file=sys.stderr)
-            return 1
-        transport_label = r.json()
-        print(f"Created label: {LABEL_NAME} ({LABEL_COLOR})")
-    label_id = transport_label["id"]
-
-    # Get all cards (with idList and idLabels)
-    r = requests.get(f"{BASE}/boards/{board_id}/cards", params={**params, "fields": "id,name,idList,idLabels"})
-    if r.status_code != 200:
-        print(f"Cards fetch failed: {r.text}", file=sys.stderr)
+    client = TrelloClient(key, token)
+
+    board_ref = resolve_board(client, BOARD_NAME)
+    if not board_ref:
+        print("Board not found.", file=sys.stderr)
         return 1
-    cards = r.json()
-
-    added = 0
-    for card in cards:
-        id_list = card.get("idList")
-        if id_list in admin_list_ids:
-            continue
-        id_labels = card.get("idLabels") or []
-        if label_id in id_labels:
-            continue
-        r = requests.post(
-            f"{BASE}/cards/{card['id']}/idLabels",
-            params={**params, "value": label_id},
-        )
-        if r.status_code == 200:
-            print(f"  + {LABEL_NAME}: {card.get('name', '')[:50]}...")
-            added += 1
-        else:
-            print(f"  Failed: {card.get('name', '')[:40]} – {r.text}", file=sys.stderr)
-
-    print(f"\nDone. Added '{LABEL_NAME}' to {added} card(s). Cards in Admin / Setup were left untagged.")
-    return 0
+    return run(client, board_ref, run_mode(args))
 
 
 if __name__ == "__main__":
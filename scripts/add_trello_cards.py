@@ -1,14 +1,25 @@
 #!/usr/bin/env python3
 """
 Add ReThread Week of Feb 3 cards to an existing Trello board.
-Uses Trello API; requires TRELLO_API_KEY and TRELLO_TOKEN (or prompts).
-Board: ReThread Sprint Board (shortLink m47dQixP).
+Uses Trello API; requires TRELLO_API_KEY and TRELLO_TOKEN (env, secrets.json, or prompts).
+Board: ReThread Sprint Board (shortLink m47dQixP); TRELLO_BOARD_ID or TRELLO_BOARD_SHORT_LINK picks another.
 Target list: To Do (override with TRELLO_LIST_NAME if your list has another name).
 """
+import argparse
 import os
-import requests
 
-BASE = "https://api.trello.com/1"
+from trello_client import (
+    CardSpec,
+    IdempotencyIndex,
+    TrelloClient,
+    TrelloError,
+    content_hash,
+    invalidate_snapshot,
+    load_snapshot,
+    seed_cards,
+)
+from trello_client.credentials import get_trello_credentials
+
 BOARD_SHORT_ID = "m47dQixP"
 TARGET_LIST_NAME = os.environ.get("TRELLO_LIST_NAME", "To Do")
 
@@ -132,40 +143,26 @@ LABEL_COLORS = {
 }
 
 
-def main():
-    key = os.environ.get("TRELLO_API_KEY", "").strip() or input("Trello API Key: ").strip()
-    token = os.environ.get("TRELLO_TOKEN", "").strip() or input("Trello Token: ").strip()
-    if not key or not token:
-        print("Need TRELLO_API_KEY and TRELLO_TOKEN.")
-        return 1
-    params = {"key": key, "token": token}
-
-    # Resolve board
-    r = requests.get(f"{BASE}/boards/{BOARD_SHORT_ID}", params=params)
-    if r.status_code != 200:
-        print(f"Board not found: {r.text}")
+def run(client, board_ref):
+    """Add the week's cards to one board. Returns an exit code."""
+    # Board, lists and labels in one read (or only a last-activity check, if the cached snapshot is current)
+    try:
+        snapshot = load_snapshot(client, board_ref, verify=True)
+    except TrelloError as e:
+        print(f"Board not found: {e.text}")
         return 1
-    board_id = r.json()["id"]
+    board_id = snapshot.id
 
-    # Get lists, find To Do
-    r = requests.get(f"{BASE}/boards/{board_id}/lists", params=params)
-    if r.status_code != 200:
-        print(f"Lists failed: {r.text}")
-        return 1
-    lists = r.json()
-    todo_list = next((lst for lst in lists if lst["name"].strip() == TARGET_LIST_NAME), None)
+    # Find To Do
+    todo_list = next((lst for lst in snapshot.lists if lst.name.strip() == TARGET_LIST_NAME), None)
     if not todo_list:
-        names = [lst["name"] for lst in lists]
+        names = [lst.name for lst in snapshot.lists]
         print(f"No list named '{TARGET_LIST_NAME}'. Existing: {names}")
         return 1
-    list_id = todo_list["id"]
+    list_id = todo_list.id
 
     # Get or create labels
-    r = requests.get(f"{BASE}/boards/{board_id}/labels", params=params)
-    if r.status_code != 200:
-        print(f"Labels failed: {r.text}")
-        return 1
-    by_name = {lb["name"]: lb["id"] for lb in r.json() if lb.get("name")}
+    by_name = {lb.name: lb.id for lb in snapshot.labels if lb.name}
     needed = set()
     for card in CARDS:
         needed.update(card["labels"])
@@ -173,49 +170,52 @@ def main():
         if name in by_name:
             continue
         color = LABEL_COLORS.get(name, "gray")
-        cr = requests.post(
-            f"{BASE}/boards/{board_id}/labels",
-            params={**params, "name": name, "color": color},
-        )
-        if cr.status_code == 200:
-            by_name[name] = cr.json()["id"]
-        else:
-            print(f"Warning: could not create label '{name}': {cr.text}")
+        try:
+            by_name[name] = client.create_label(board_id, name, color)["id"]
+        except TrelloError as e:
+            print(f"Warning: could not create label '{name}': {e.text}")
 
-    # Create cards
-    for card in CARDS:
-        id_labels = [by_name[l] for l in card["labels"] if l in by_name]
-        card_params = {
-            **params,
-            "idList": list_id,
-            "name": card["name"],
-            "desc": card["desc"],
-            "pos": "bottom",
-        }
-        if id_labels:
-            card_params["idLabels"] = ",".join(id_labels)
-        cr = requests.post(f"{BASE}/cards", params=card_params)
-        if cr.status_code != 200:
-            print(f"Failed to create card '{card['name']}': {cr.text}")
+    # Create cards (concurrently, with their checklists)
+    specs = [
+        CardSpec(
+            list_id,
+            card["name"],
+            desc=card["desc"],
+            pos="bottom",
+            label_ids=[by_name[l] for l in card["labels"] if l in by_name],
+            checklist=card.get("checklist", []),
+            # Identity is the card title; edits to desc/checklist update the existing card.
+            key=f"week-card:{content_hash(card['name'])}",
+        )
+        for card in CARDS
+    ]
+    with IdempotencyIndex() as index:
+        positions = {list_id: [c.pos for c in snapshot.cards_in(list_id)]}
+        results = seed_cards(client, specs, existing_positions=positions, index=index, board_id=board_id)
+    if any(r.action != "skipped" for r in results):
+        invalidate_snapshot(board_ref, board_id)
+    for result in results:
+        if result.action == "skipped":
+            print(f"  Already on board: {result.spec.name}")
             continue
-        card_id = cr.json()["id"]
-        if card.get("checklist"):
-            cl = requests.post(
-                f"{BASE}/checklists",
-                params={**params, "idCard": card_id, "name": "Checklist"},
-            )
-            if cl.status_code == 200:
-                cl_id = cl.json()["id"]
-                for item in card["checklist"]:
-                    requests.post(
-                        f"{BASE}/checklists/{cl_id}/checkItems",
-                        params=params,
-                        json={"name": item},
-                    )
-        print(f"  Created: {card['name']}")
+        if not result.ok:
+            print(f"Failed to create card '{result.spec.name}': {result.error or 'not created'}")
+            continue
+        print(f"  {result.action.capitalize()}: {result.spec.name}")
     print("Done.")
     return 0
 
 
+def main(argv=None):
+    argparse.ArgumentParser(description="Add the ReThread Week of Feb 3 cards to the To Do list.").parse_args(argv)
+    key, token = get_trello_credentials()
+    if not key or not token:
+        print("Need TRELLO_API_KEY and TRELLO_TOKEN.")
+        return 1
+    client = TrelloClient(key, token)
+    board_ref = os.environ.get("TRELLO_BOARD_ID", "").strip() or os.environ.get("TRELLO_BOARD_SHORT_LINK", "").strip()
+    return run(client, board_ref or BOARD_SHORT_ID)
+
+
 if __name__ == "__main__":
     exit(main())
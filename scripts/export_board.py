@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Export a board (lists, cards, labels, checklists, members) to one compact file.
+
+    python scripts/export_board.py                     # the ReThread Sprint Board -> m47dQixP.board.json.gz
+    python scripts/export_board.py Xy12AbCd -o template.board.json.gz
+
+The file is gzipped JSON (trello_client/boardfile.py has the format), a few KB
+for a sprint board; import_board.py turns it back into a new board. Reading the
+board is one batch request (plus one per further 1,000 cards).
+Uses secrets.json or TRELLO_* env. Board: the argument, else TRELLO_BOARD_ID /
+TRELLO_BOARD_SHORT_LINK, else the board named TRELLO_BOARD_NAME.
+"""
+import argparse
+import os
+import sys
+
+from trello_client import TrelloClient, TrelloError
+from trello_client.boardfile import export_board, write_board_file
+from trello_client.cli import add_export_arguments
+from trello_client.credentials import get_trello_credentials
+from trello_client.ids import resolve_board
+
+BOARD_NAME = os.environ.get("TRELLO_BOARD_NAME", "").strip() or "ReThread Sprint Board"
+
+
+def run(client, board_ref, out=None):
+    """Write `board_ref` to `out` (default <shortLink>.board.json.gz in the current directory)."""
+    try:
+        data = export_board(client, board_ref)
+    except TrelloError as e:
+        print(f"Board fetch failed: {e.text}", file=sys.stderr)
+        return 1
+    out = out or f"{data['board']['shortLink'] or data['board']['id']}.board.json.gz"
+    try:
+        size = write_board_file(out, data)
+    except OSError as e:
+        print(f"Could not write {out}: {e}", file=sys.stderr)
+        return 1
+    print(
+        f"Exported {data['board']['name']}: {len(data['lists'])} list(s), {len(data['cards'])} card(s),"
+        f" {len(data['labels'])} label(s), {len(data['members'])} member(s) -> {out} ({size:,} bytes)"
+    )
+    return 0
+
+
+def main(argv=None):
+    parser = add_export_arguments(argparse.ArgumentParser(description="Export a Trello board to a compact board file."))
+    args = parser.parse_args(argv)
+    key, token = get_trello_credentials()
+    if not key or not token:
+        print("Need Trello API key and token.", file=sys.stderr)
+        return 1
+    client = TrelloClient(key, token)
+
+    board_ref = args.board or resolve_board(client, BOARD_NAME)
+    if not board_ref:
+        print(f"Board not found. Pass a board, set TRELLO_BOARD_SHORT_LINK or TRELLO_BOARD_ID, or ensure a board named '{BOARD_NAME}' exists.", file=sys.stderr)
+        return 1
+    return run(client, board_ref, args.output)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Create a new board from a file written by export_board.py.
+
+    python scripts/import_board.py template.board.json.gz --name "Client X Sprint Board"
+    python scripts/import_board.py template.board.json.gz --replay
+
+If the exported board still exists and hasn't changed since the export, Trello
+copies it server-side (POST /boards with idBoardSource): two requests whatever
+its size. Otherwise, or with --replay, the board is rebuilt from the file: labels
+and lists in parallel, then the cards concurrently under the rate limiter with
+their labels, members and checklists. Members who aren't on the new board are
+left off its cards and listed at the end.
+Uses secrets.json or TRELLO_* env. Optional: TRELLO_ORG_ID to create the board in a workspace.
+"""
+import argparse
+import os
+import sys
+
+from trello_client import TrelloClient, TrelloError
+from trello_client.boardfile import BoardFileError, import_board, read_board_file
+from trello_client.cli import add_import_arguments
+from trello_client.credentials import get_trello_credentials
+
+
+def main(argv=None):
+    parser = add_import_arguments(argparse.ArgumentParser(description="Create a Trello board from a board file."))
+    args = parser.parse_args(argv)
+    try:
+        data = read_board_file(args.file)
+    except BoardFileError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    key, token = get_trello_credentials()
+    if not key or not token:
+        print("Need Trello API key and token.", file=sys.stderr)
+        return 1
+    client = TrelloClient(key, token)
+
+    org_id = args.org or os.environ.get("TRELLO_ORG_ID", "").strip() or None
+    try:
+        result = import_board(client, data, name=args.name, org_id=org_id, copy=not args.replay)
+    except TrelloError as e:
+        print(f"Could not create board: {e.text}", file=sys.stderr)
+        return 1
+
+    how = "copied from the source board" if result.method == "copied" else "rebuilt from the file"
+    print(f"Created {result.board['name']} ({how}): {result.cards}/{len(data['cards'])} card(s).")
+    if result.dropped_members:
+        print(f"Not on the new board, left off its cards: {', '.join(result.dropped_members)}", file=sys.stderr)
+    for error in result.errors:
+        print(f"  Failed: {error}", file=sys.stderr)
+    print(f"Board URL: {result.board.get('url') or result.board.get('shortUrl') or result.board['id']}")
+    return 0 if result.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -20,20 +20,24 @@ REMOVE (archived):
 (Unrelated product ideas; do not map to ReThread Research Lab / transportation / content focus.)
 
 Script also adds agreed-upon tasks from today with 2-day SLA.
+Diffs the board against that desired state and only writes what differs:
+--plan prints the operations, --apply (default) executes them.
+The list mapping and archive names live in board_rules.json ("option_a").
 Uses secrets.json (trello.api_key, trello.token) or TRELLO_* env. TRELLO_BOARD_SHORT_LINK or board name.
 """
-import json
 import os
 import sys
 from datetime import datetime, timedelta
-from pathlib import Path
 
-import requests
+from trello_client import Journal, TrelloClient, TrelloError, invalidate_snapshot, load_snapshot
+from trello_client.cli import plan_apply_parser, run_mode
+from trello_client.credentials import get_trello_credentials
+from trello_client.ids import resolve_board
+from trello_client.reconcile import DesiredState, NewCard, apply, plan, print_plan, print_results, run_resume, run_rollback
+from trello_client.rules import RulesError, load_board_rules, rule_section
 
-BASE = "https://api.trello.com/1"
-SCRIPT_DIR = Path(__file__).resolve().parent
-REPO_ROOT = SCRIPT_DIR.parent
-SECRETS_PATH = REPO_ROOT / "secrets.json"
+# Board looked up (or created) by name when no TRELLO_BOARD_ID / TRELLO_BOARD_SHORT_LINK is set
+BOARD_NAME = os.environ.get("TRELLO_BOARD_NAME", "").strip() or "ReThread Sprint Board"
 
 # Option A list names (order)
 OPTION_A_LISTS = [
@@ -44,25 +48,6 @@ OPTION_A_LISTS = [
     "Done",
 ]
 
-# Old list name -> new list name (for moving cards)
-OLD_TO_NEW_LIST = {
-    "Idea Backlog": "Backlog",
-    "Research (Pre-Sprint)": "Backlog",
-    "Current Sprint": "Week A: Discovery",
-    "Sprint Backlog": "Week A: Discovery",
-    "Active": "Week B: Execution",
-    "Blocked / Waiting": "Blocked / Waiting",
-    "Done": "Done",
-}
-
-# Exact card names to archive (unrelated ideas; remove from board)
-ARCHIVE_CARD_NAMES = {
-    "Camping checklist web app",
-    "Vibe System Design Tool - IDE for Architecture Planning",
-    "NetWorth Hub - Multi-Entity Financial Dashboard SaaS",
-    "Open Source: Fitness on the Fly - Private LLM Personal Trainer",
-}
-
 # Agreed tasks from today: (name, desc, list, sla_days)
 AGREED_TASKS = [
     ("Ahmad: Publish branch for internal process", "Publish branch for our internal process.", "Week A: Discovery", 2),
@@ -80,166 +65,73 @@ AGREED_TASKS = [
 ]
 
 
-def load_secrets():
-    if not SECRETS_PATH.exists():
-        return {}
+def desired_state():
+    """Option A layout, archived ideas and the agreed tasks (due dates from today's SLA)."""
+    rules = rule_section(load_board_rules(), "option_a", list_moves=dict, default_list=str, keep_lists=list, archive_names=list)
+    cards = []
+    for name, desc, list_name, sla_days in AGREED_TASKS:
+        due = (datetime.utcnow() + timedelta(days=sla_days)).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        cards.append(NewCard(name, list_name, desc + f"\n\nSLA: {sla_days} day(s). Due: {due[:10]}.", due))
+    return DesiredState(
+        lists=OPTION_A_LISTS,
+        list_moves=rules["list_moves"],
+        # Unknown list -> Backlog; lists added by other scripts (Admin / Setup) keep their cards
+        default_list=rules["default_list"],
+        keep_lists=tuple(rules["keep_lists"]),
+        archive_names=set(rules["archive_names"]),
+        cards=cards,
+    )
+
+
+def run(client, board_ref, mode="apply"):
+    """Reconcile one board with Option A; mode: plan, apply, resume or rollback. Returns an exit code."""
+    if mode == "resume":
+        return run_resume(client, board_ref)
+    if mode == "rollback":
+        return run_rollback(client, board_ref)
+
     try:
-        with open(SECRETS_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (json.JSONDecodeError, OSError):
-        return {}
+        desired = desired_state()
+    except RulesError as e:
+        print(f"Bad board rules: {e}", file=sys.stderr)
+        return 1
 
+    # Lists in one read, cards streamed page by page into the plan (or only a last-activity check, if the cached snapshot is current)
+    try:
+        snapshot = load_snapshot(client, board_ref, stream_cards=True, verify=mode != "plan")
+    except TrelloError as e:
+        print(f"Board fetch failed: {e.text}", file=sys.stderr)
+        return 1
+    print(f"Using {snapshot.name}")
+
+    # Only the cards that differ from Option A get a write; a converged board plans nothing.
+    ops = plan(snapshot, desired)
+    if mode == "plan":
+        print_plan(ops)
+        return 0
+    with Journal(board_ref) as journal:
+        print_results(apply(client, snapshot, ops, journal=journal))
+    if ops:
+        invalidate_snapshot(board_ref, snapshot.id)
 
-def get_trello_credentials():
-    key = os.environ.get("TRELLO_API_KEY", "").strip()
-    token = os.environ.get("TRELLO_TOKEN", "").strip()
-    if not key or not token:
-        secrets = load_secrets()
-        trello = secrets.get("trello") or {}
-        key = key or trello.get("api_key") or ""
-        token = token or trello.get("token") or ""
-        if isinstance(key, str):
-            key = key.strip()
-        if isinstance(token, str):
-            token = token.strip()
-    if not key or not token:
-        key = input("Trello API Key: ").strip()
-        token = input("Trello Token: ").strip()
-    return key, token
-
-
-def get_board_id(params):
-    board_id = os.environ.get("TRELLO_BOARD_ID", "").strip()
-    short = os.environ.get("TRELLO_BOARD_SHORT_LINK", "").strip()
-    if board_id:
-        r = requests.get(f"{BASE}/boards/{board_id}", params=params)
-        if r.status_code == 200:
-            return r.json()["id"]
-    if short:
-        r = requests.get(f"{BASE}/boards/{short}", params=params)
-        if r.status_code == 200:
-            return r.json()["id"]
-    # Find by name
-    r = requests.get(f"{BASE}/members/me/boards", params=params)
-    if r.status_code != 200:
-        return None
-    for b in r.json():
-        if b.get("name") == "ReThread Sprint Board":
-            return b["id"]
-    return None
-
-
-def main():
+    print("\nDone. Option A lists: Backlog | Week A: Discovery | Week B: Execution | Blocked / Waiting | Done")
+    print("If you still see old empty lists (e.g. Idea Backlog, Research, Current Sprint), archive them in Trello.")
+    return 0
+
+
+def main(argv=None):
+    args = plan_apply_parser("Restructure the ReThread Sprint Board to Option A.").parse_args(argv)
     key, token = get_trello_credentials()
     if not key or not token:
         print("Need Trello API key and token.", file=sys.stderr)
         return 1
-    params = {"key": key, "token": token}
-
-    board_id = get_board_id(params)
-    if not board_id:
-        print("Board not found. Set TRELLO_BOARD_SHORT_LINK or TRELLO_BOARD_ID, or ensure a board named 'ReThread Sprint Board' exists.", file=sys.stderr)
-        return 1
-    print("Using ReThread Sprint Board")
+    client = TrelloClient(key, token)
 
-    # Get lists
-    r = requests.get(f"{BASE}/boards/{board_id}/lists", params=params)
-    if r.status_code != 200:
-        print(f"Lists fetch failed: {r.text}", file=sys.stderr)
-        return 1
-    lists = r.json()
-    list_by_name = {lst["name"]: lst for lst in lists}
-
-    # Ensure Option A lists exist (create if missing)
-    for i, list_name in enumerate(OPTION_A_LISTS):
-        if list_name in list_by_name:
-            print(f"  List exists: {list_name}")
-            continue
-        r = requests.post(
-            f"{BASE}/boards/{board_id}/lists",
-            params={**params, "name": list_name, "pos": str(i + 1)},
-        )
-        if r.status_code != 200:
-            print(f"  Failed to create list '{list_name}': {r.text}", file=sys.stderr)
-            continue
-        new_list = r.json()
-        list_by_name[list_name] = new_list
-        print(f"  Created list: {list_name}")
-
-    # Get all cards on the board
-    r = requests.get(f"{BASE}/boards/{board_id}/cards", params=params)
-    if r.status_code != 200:
-        print(f"Cards fetch failed: {r.text}", file=sys.stderr)
+    board_ref = resolve_board(client, BOARD_NAME)
+    if not board_ref:
+        print(f"Board not found. Set TRELLO_BOARD_SHORT_LINK or TRELLO_BOARD_ID, or ensure a board named '{BOARD_NAME}' exists.", file=sys.stderr)
         return 1
-    cards = r.json()
-    list_id_to_name = {lst["id"]: lst["name"] for lst in lists}
-
-    # Due date for new tasks (2-day SLA)
-    due_date = (datetime.utcnow() + timedelta(days=2)).strftime("%Y-%m-%dT%H:%M:%S.000Z")
-
-    # Process each card
-    for card in cards:
-        name = card.get("name", "")
-        id_list = card.get("idList")
-        current_list_name = list_id_to_name.get(id_list, "")
-
-        if name in ARCHIVE_CARD_NAMES:
-            r = requests.put(
-                f"{BASE}/cards/{card['id']}",
-                params=params,
-                json={"closed": True},
-            )
-            if r.status_code == 200:
-                print(f"  Archived: {name}")
-            else:
-                print(f"  Failed to archive '{name}': {r.text}", file=sys.stderr)
-            continue
-
-        new_list_name = OLD_TO_NEW_LIST.get(current_list_name)
-        if not new_list_name:
-            # Unknown list -> Backlog
-            new_list_name = "Backlog"
-        new_list = list_by_name.get(new_list_name)
-        if not new_list or new_list["id"] == id_list:
-            continue
-        r = requests.put(
-            f"{BASE}/cards/{card['id']}",
-            params=params,
-            json={"idList": new_list["id"]},
-        )
-        if r.status_code == 200:
-            print(f"  Moved to {new_list_name}: {name[:50]}...")
-        else:
-            print(f"  Failed to move '{name[:40]}': {r.text}", file=sys.stderr)
-
-    # Add agreed-upon task cards (skip if card with same name already exists)
-    existing_names = {c.get("name") for c in cards}
-    for name, desc, list_name, sla_days in AGREED_TASKS:
-        if name in existing_names:
-            continue
-        target = list_by_name.get(list_name)
-        if not target:
-            continue
-        due = (datetime.utcnow() + timedelta(days=sla_days)).strftime("%Y-%m-%dT%H:%M:%S.000Z")
-        r = requests.post(
-            f"{BASE}/cards",
-            params={
-                **params,
-                "idList": target["id"],
-                "name": name,
-                "desc": desc + f"\n\nSLA: {sla_days} day(s). Due: {due[:10]}.",
-                "due": due,
-                "pos": "bottom",
-            },
-        )
-        if r.status_code == 200:
-            print(f"  Added ({list_name}): {name[:50]}...")
-        else:
-            print(f"  Failed to add '{name[:40]}': {r.text}", file=sys.stderr)
-
-    print("\nDone. Option A lists: Backlog | Week A: Discovery | Week B: Execution | Blocked / Waiting | Done")
-    print("If you still see old empty lists (e.g. Idea Backlog, Research, Current Sprint), archive them in Trello.")
-    return 0
+    return run(client, board_ref, run_mode(args))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+One entry point for the ReThread board scripts.
+
+    scripts/rethread-board restructure --plan
+    scripts/rethread-board label --resume
+    python scripts/rethread_board.py create
+
+    create        create_sprint_board.py
+    restructure   restructure_sprint_board.py            (--plan / --apply / --resume / --rollback)
+    placeholders  add_phase_placeholders.py
+    label         add_transportation_label.py            (--plan / --apply / --resume / --rollback)
+    admin         add_admin_list_and_move_setup_cards.py (--plan / --apply / --resume / --rollback)
+    rollover      rollover_cycle.py                      (the same, plus --start)
+    add-cards     add_trello_cards.py
+    export        export_board.py                        (BOARD, --output)
+    import        import_board.py                        (FILE, --name, --org, --replay)
+    slack-setup   archive/setup_slack.py
+
+Arguments are parsed here, before anything heavy is loaded: the chosen script
+(and with it requests and the rest of trello_client) is imported only once the
+command line is known to be good, so --help, a typo or a bad flag exits without
+paying for them. The script then runs its main() as if it had been called
+directly. Credentials come from trello_client.credentials, which reads the env,
+secrets.json or the prompt once per process.
+"""
+import argparse
+import importlib
+import importlib.util
+import sys
+from pathlib import Path
+
+from trello_client.cli import add_export_arguments, add_import_arguments, add_mode_arguments, add_start_argument
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+MODES = (add_mode_arguments,)
+
+# Subcommand -> (module in scripts/, or a file under the repo root; help; functions adding its options)
+COMMANDS = {
+    "create": ("create_sprint_board", "Create the sprint board (or fill an existing one) from data/sprint_process.json.", ()),
+    "restructure": ("restructure_sprint_board", "Reconcile the board with the Option A lists, archives and agreed tasks.", MODES),
+    "placeholders": ("add_phase_placeholders", "Add phase placeholder cards with their leads to Week A and Week B.", ()),
+    "label": ("add_transportation_label", "Tag every non-Admin card with the Transportation label.", MODES),
+    "admin": ("add_admin_list_and_move_setup_cards", "Add Admin / Setup and move setup cards into it.", MODES),
+    "rollover": ("rollover_cycle", "Archive Done, pull phase cards from Backlog and add the next cycle's placeholders.", MODES + (add_start_argument,)),
+    "add-cards": ("add_trello_cards", "Add the Week of Feb 3 cards to the To Do list.", ()),
+    "export": ("export_board", "Export a board's lists, cards, labels, checklists and members to a compact file.", (add_export_arguments,)),
+    "import": ("import_board", "Create a new board from an exported board file.", (add_import_arguments,)),
+    "slack-setup": ("archive/setup_slack.py", "Create the team's Slack channels and set their topics.", ()),
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="rethread-board", description="Set up and maintain the ReThread Sprint board.")
+    commands = parser.add_subparsers(dest="command", metavar="command", required=True)
+    for name, (_, help_text, options) in COMMANDS.items():
+        sub = commands.add_parser(name, help=help_text, description=help_text)
+        for add_options in options:
+            add_options(sub)
+    return parser
+
+
+def load_command(name):
+    """Import the module behind a subcommand (by file path for the ones outside scripts/)."""
+    target = COMMANDS[name][0]
+    if not target.endswith(".py"):
+        return importlib.import_module(target)
+    path = REPO_ROOT / target
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    args = build_parser().parse_args(argv)
+    # argv[0] is the subcommand (the top level has no options besides --help); the script re-parses the rest.
+    return load_command(args.command).main(argv[1:])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
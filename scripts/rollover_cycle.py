@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Roll the ReThread Sprint Board over to the next cycle (BOARD_CONVENTIONS.md, "Next cycle") in one pass:
+
+- archive everything in Done,
+- archive last cycle's phase placeholders still open in Week A / Week B,
+- pull Backlog cards named for a phase ("Hypothesis Research: fleet owners",
+  "Validation: triage for ...") into that phase's week,
+- add this cycle's phase placeholders with their checklists, the week's lead
+  and a due date from the phase's timebox ("Days 4-5" -> day 5 of the cycle).
+
+Every write is worked out up front from one board snapshot and
+data/sprint_process.json, then sent stage by stage through the concurrent,
+rate-limited reconciler: Done goes in one archiveAllCards call, the placeholders
+go up through seed_cards() (in parallel, check items fanned out, each keyed by
+cycle and phase in the idempotency index). --plan prints the operations; --apply (default) runs
+them and journals each write; --resume finishes an interrupted run; --rollback
+undoes the last run (cards come back, moves are reversed, new placeholders are
+archived). Re-running for the same cycle plans nothing.
+
+--start YYYY-MM-DD sets day 1 of the new cycle (default today, UTC). Which lists
+are archived, pulled from and filled is the "rollover" section of board_rules.json.
+Uses secrets.json or TRELLO_* env. TRELLO_BOARD_SHORT_LINK or board name.
+"""
+import os
+import re
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from trello_client import IdempotencyIndex, Journal, TrelloClient, TrelloError, invalidate_snapshot, load_snapshot
+from trello_client.cli import add_start_argument, plan_apply_parser, run_mode
+from trello_client.credentials import get_trello_credentials
+from trello_client.ids import resolve_board
+from trello_client.playbook import PlaybookError, load_playbook
+from trello_client.reconcile import DesiredState, MoveRule, NewCard, apply, plan, print_plan, print_results, run_resume, run_rollback
+from trello_client.render import phase_desc
+from trello_client.rules import LEAD_BY_WEEK, RulesError, lead_member_ids, load_board_rules, rule_section
+
+DATA_PATH = Path(__file__).resolve().parent.parent / "data" / "sprint_process.json"
+# Board looked up (or created) by name when no TRELLO_BOARD_ID / TRELLO_BOARD_SHORT_LINK is set
+BOARD_NAME = os.environ.get("TRELLO_BOARD_NAME", "").strip() or "ReThread Sprint Board"
+
+# "Day 3", "Days 4-5", "Days 8–11": the last day is the due day.
+TIMEBOX_DAYS = re.compile(r"Days?\s+(\d+)(?:\s*[-–]\s*(\d+))?")
+
+
+def placeholder_name(phase, start):
+    """"4. Problem Lock & Design (Days 6-7) [2026-10-19]": the phase card of the cycle starting `start`."""
+    return f"{phase.list_name} [{start.isoformat()}]"
+
+
+def is_placeholder(name, phase):
+    """True for any cycle's placeholder of `phase`, including the undated ones add_phase_placeholders.py makes."""
+    return name == phase.list_name or (name.startswith(phase.list_name + " [") and name.endswith("]"))
+
+
+def due_date(phase, start, cycle_days):
+    """Noon UTC on the last day of the phase's timebox (the cycle's last day if it names none)."""
+    match = TIMEBOX_DAYS.search(phase.timebox)
+    day = int(match.group(2) or match.group(1)) if match else cycle_days
+    return (start + timedelta(days=day - 1)).strftime("%Y-%m-%dT12:00:00.000Z")
+
+
+def desired_state(snapshot, playbook, start, lead_ids, rules):
+    """The board at day 1 of the cycle starting `start`. lead_ids: week -> member id (or None)."""
+    week_lists = rules["week_lists"]
+    names = {phase.id: placeholder_name(phase, start) for phase in playbook.phases}
+    current = set(names.values())
+    # Last cycle's placeholders: exact names, and only in the week lists, so the plan archives them and nothing else.
+    week_list_ids = {lst.id for lst in snapshot.lists if lst.name in week_lists.values()}
+    stale = {
+        card.name
+        for card in snapshot.cards
+        if card.id_list in week_list_ids
+        and card.name not in current
+        and any(is_placeholder(card.name, phase) for phase in playbook.phases)
+    }
+    cycle_days = playbook.meta.get("cycleDays", 14)
+    cards = []
+    for phase in playbook.phases:
+        lead_id = lead_ids.get(phase.week)
+        cards.append(
+            NewCard(
+                names[phase.id],
+                week_lists[phase.week],
+                desc=phase_desc(phase, "Outputs", checklist=False, lead=LEAD_BY_WEEK[phase.week].capitalize()),
+                due=due_date(phase, start, cycle_days),
+                member_ids=(lead_id,) if lead_id else (),
+                checklist=phase.checklist,
+                checklist_name=f"Phase {phase.num} checklist",
+                key=f"rollover:{start.isoformat()}:{phase.id}",
+            )
+        )
+    pulls = [
+        MoveRule(week_lists[week], tuple(f"{phase.title}:" for phase in phases), tuple(rules["pull_from"]))
+        for week, phases in playbook.by_week.items()
+        if phases
+    ]
+    return DesiredState(
+        clear_lists=tuple(rules["archive_lists"]),
+        archive_names=stale,
+        archive_from=tuple(week_lists.values()),
+        move_rules=pulls,
+        cards=cards,
+    )
+
+
+def run(client, board_ref, mode="apply", start=None):
+    """Roll one board over to the cycle starting `start` (default today); mode: plan, apply, resume or rollback."""
+    if mode == "resume":
+        return run_resume(client, board_ref)
+    if mode == "rollback":
+        return run_rollback(client, board_ref)
+    start = start or datetime.now(timezone.utc).date()
+
+    try:
+        playbook = load_playbook(DATA_PATH)
+    except PlaybookError as e:
+        print(f"Invalid playbook: {e}", file=sys.stderr)
+        return 1
+    try:
+        rules = rule_section(load_board_rules(), "rollover", archive_lists=list, pull_from=list, week_lists=dict)
+        missing = [week for week in playbook.weeks if not isinstance(rules["week_lists"].get(week), str)]
+        if missing:
+            raise RulesError(f"board rules: rollover.week_lists has no list for week {', '.join(missing)}")
+    except RulesError as e:
+        print(f"Bad board rules: {e}", file=sys.stderr)
+        return 1
+
+    # Lists, members and every open card in one read (or only a last-activity check, if the cached snapshot is current)
+    try:
+        snapshot = load_snapshot(client, board_ref, verify=mode != "plan")
+    except TrelloError as e:
+        print(f"Board fetch failed: {e.text}", file=sys.stderr)
+        return 1
+    print(f"Using {snapshot.name}; new cycle starts {start.isoformat()}")
+    absent = [name for name in rules["week_lists"].values() if not snapshot.list_by_name(name)]
+    if absent:
+        print(f"Need lists {', '.join(repr(n) for n in absent)}. Create them first or run restructure_sprint_board.py.", file=sys.stderr)
+        return 1
+
+    try:
+        moaz_id, ahmad_id = lead_member_ids(snapshot.members)
+    except RulesError as e:
+        print(f"Bad board rules: {e}", file=sys.stderr)
+        return 1
+    lead_ids = {week: moaz_id if who == "moaz" else ahmad_id for week, who in LEAD_BY_WEEK.items()}
+    for week, member_id in lead_ids.items():
+        if not member_id:
+            print(f"Warning: no lead found for Week {week}; its placeholders will be unassigned.", file=sys.stderr)
+
+    ops = plan(snapshot, desired_state(snapshot, playbook, start, lead_ids, rules))
+    if mode == "plan":
+        print_plan(ops)
+        return 0
+    with Journal(board_ref) as journal, IdempotencyIndex() as index:
+        results = apply(client, snapshot, ops, journal=journal, index=index)
+    ok = print_results(results)
+    if ops:
+        invalidate_snapshot(board_ref, snapshot.id)
+
+    print(f"\nDone. {ok}/{len(ops)} operation(s) for the cycle starting {start.isoformat()}; --rollback undoes them.")
+    return 0 if ok == len(ops) else 1
+
+
+def main(argv=None):
+    parser = add_start_argument(plan_apply_parser("Roll the ReThread Sprint Board over to the next cycle."))
+    args = parser.parse_args(argv)
+    key, token = get_trello_credentials()
+    if not key or not token:
+        print("Need Trello API key and token.", file=sys.stderr)
+        return 1
+    client = TrelloClient(key, token)
+
+    board_ref = resolve_board(client, BOARD_NAME)
+    if not board_ref:
+        print(f"Board not found. Set TRELLO_BOARD_SHORT_LINK or TRELLO_BOARD_ID, or ensure a board named '{BOARD_NAME}' exists.", file=sys.stderr)
+        return 1
+    return run(client, board_ref, run_mode(args), args.start)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
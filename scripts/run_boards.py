@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Run one of the board scripts against many boards at once.
+
+    python scripts/run_boards.py add_transportation_label --boards m47dQixP,Xy12AbCd
+    python scripts/run_boards.py restructure_sprint_board --workspace rethreadlab --plan
+    python scripts/run_boards.py add_phase_placeholders --boards-file boards.txt --parallel 8 --report report.json
+
+Boards come from --boards (ids or shortLinks), --boards-file (one per line, # for
+comments) and/or --workspace (every open board in a Trello workspace, optionally
+filtered with --name-contains). Up to --parallel boards run at once, each through
+the script's run(client, board_ref). Every board gets its own client, but they all
+share one RateLimiter, so the whole run stays inside the key/token budget no
+matter how many boards are in flight.
+
+Each board's output is captured and printed as one block when it finishes,
+followed by a per-board table (exit status, seconds, requests); --report also
+writes it as JSON. --plan and --resume are passed to the reconciling scripts.
+"""
+import argparse
+import contextvars
+import importlib
+import inspect
+import json
+import sys
+import threading
+import time
+import traceback
+from io import StringIO
+
+from trello_client import FanOut, RateLimiter, TrelloClient, TrelloError
+from trello_client.credentials import get_trello_credentials
+
+SCRIPTS = (
+    "create_sprint_board",
+    "add_phase_placeholders",
+    "restructure_sprint_board",
+    "add_transportation_label",
+    "add_admin_list_and_move_setup_cards",
+    "rollover_cycle",
+    "add_trello_cards",
+    "export_board",
+)
+DEFAULT_PARALLEL = 4
+
+
+# Buffer of the board the current context is running (shared by the stdout and stderr stand-ins).
+# A context variable, not a thread-local: FanOut copies it into the workers a board's script starts.
+_capture = contextvars.ContextVar("run_boards_capture", default=None)
+
+
+class _PerBoardOutput:
+    """sys.stdout/sys.stderr stand-in: code running for a board, on any thread, writes to that board's buffer."""
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+
+    def write(self, text):
+        return (_capture.get() or self.fallback).write(text)
+
+    def flush(self):
+        self.fallback.flush()
+
+
+def collect_boards(client, args):
+    """[(board ref, display name)] from --boards, --boards-file and --workspace, first occurrence wins."""
+    refs = []
+    if args.boards:
+        refs += [(b.strip(), b.strip()) for b in args.boards.split(",") if b.strip()]
+    if args.boards_file:
+        with open(args.boards_file, "r", encoding="utf-8") as f:
+            for line in f:
+                ref = line.split("#", 1)[0].strip()
+                if ref:
+                    refs.append((ref, ref))
+    if args.workspace:
+        for board in client.get_org_boards(args.workspace, filter="open", fields="name,shortLink"):
+            if args.name_contains and args.name_contains.lower() not in board["name"].lower():
+                continue
+            refs.append((board["shortLink"], board["name"]))
+    seen = set()
+    unique = []
+    for ref, name in refs:
+        if ref not in seen:
+            seen.add(ref)
+            unique.append((ref, name))
+    return unique
+
+
+def run_board(module, mode, key, token, limiter, ref, name):
+    client = TrelloClient(key, token, limiter=limiter)
+    buffer = StringIO()
+    capture_token = _capture.set(buffer)
+    start = time.perf_counter()
+    error = None
+    try:
+        rc = module.run(client, ref, mode=mode) if mode else module.run(client, ref)
+    except Exception as e:  # one board's failure must not stop the others
+        rc = 1
+        error = e.text if isinstance(e, TrelloError) else f"{type(e).__name__}: {e}"
+        buffer.write(traceback.format_exc())
+    finally:
+        _capture.reset(capture_token)
+        client.close()
+    return {
+        "board": ref,
+        "name": name,
+        "exit_code": rc,
+        "ok": rc == 0,
+        "seconds": round(time.perf_counter() - start, 3),
+        "requests": client.calls,
+        "error": error,
+        "output": buffer.getvalue(),
+    }
+
+
+def print_report(results, total_seconds, limiter):
+    print(f"\n{'board':<26} {'status':<8} {'seconds':>8} {'requests':>9}")
+    for r in results:
+        status = "ok" if r["ok"] else f"exit {r['exit_code']}"
+        print(f"{r['name'][:26]:<26} {status:<8} {r['seconds']:>8.2f} {r['requests']:>9}")
+    failed = sum(1 for r in results if not r["ok"])
+    requests = sum(r["requests"] for r in results)
+    print(
+        f"\n{len(results) - failed}/{len(results)} board(s) ok in {total_seconds:.1f}s;"
+        f" {requests} request(s), {limiter.retries} 429 retry(ies), {limiter.waited:.1f}s rate-limit wait across workers."
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a board script across many boards in parallel.")
+    parser.add_argument("script", choices=SCRIPTS)
+    parser.add_argument("--boards", help="Comma-separated board ids or shortLinks.")
+    parser.add_argument("--boards-file", help="File with one board id or shortLink per line.")
+    parser.add_argument("--workspace", help="Run on every open board in this Trello workspace (id or name).")
+    parser.add_argument("--name-contains", help="With --workspace: only boards whose name contains this.")
+    parser.add_argument("--parallel", type=int, default=DEFAULT_PARALLEL, help="Boards in flight at once.")
+    parser.add_argument("--report", help="Also write the per-board report (with each board's output) as JSON.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--plan", action="store_true", help="Reconciling scripts only: print each board's plan.")
+    mode.add_argument("--resume", action="store_true", help="Reconciling scripts only: finish interrupted runs.")
+    args = parser.parse_args(argv)
+    if not (args.boards or args.boards_file or args.workspace):
+        parser.error("give boards with --boards, --boards-file or --workspace")
+
+    module = importlib.import_module(args.script)
+    run_mode = "plan" if args.plan else "resume" if args.resume else None
+    if run_mode and "mode" not in inspect.signature(module.run).parameters:
+        print(f"{args.script} has no --{run_mode}.", file=sys.stderr)
+        return 1
+
+    key, token = get_trello_credentials()
+    if not key or not token:
+        print("Need Trello API key and token.", file=sys.stderr)
+        return 1
+    limiter = RateLimiter()
+    try:
+        boards = collect_boards(TrelloClient(key, token, limiter=limiter), args)
+    except (OSError, TrelloError) as e:
+        print(f"Could not list boards: {e}", file=sys.stderr)
+        return 1
+    if not boards:
+        print("No boards to run on.", file=sys.stderr)
+        return 1
+    print(f"Running {args.script} on {len(boards)} board(s), {args.parallel} at a time")
+
+    stdout, stderr = _PerBoardOutput(sys.stdout), _PerBoardOutput(sys.stderr)
+    sys.stdout, sys.stderr = stdout, stderr
+    lock = threading.Lock()
+    results = []
+
+    def board_done(future):
+        result = future.result()
+        with lock:
+            results.append(result)
+            stdout.fallback.write(f"\n=== {result['name']} ({result['board']}) ===\n{result['output']}")
+            stdout.fallback.flush()
+
+    start = time.perf_counter()
+    try:
+        with FanOut(args.parallel) as fanout:
+            for ref, name in boards:
+                future = fanout.submit(run_board, module, run_mode, key, token, limiter, ref, name)
+                future.add_done_callback(board_done)
+    finally:
+        sys.stdout, sys.stderr = stdout.fallback, stderr.fallback
+    total = time.perf_counter() - start
+
+    order = {ref: i for i, (ref, _) in enumerate(boards)}
+    results.sort(key=lambda r: order[r["board"]])
+    print_report(results, total, limiter)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"script": args.script, "seconds": round(total, 3), "boards": results}, f, indent=2)
+    return 0 if all(r["ok"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""Shared Trello plumbing for the board scripts in scripts/.
+
+The names below are imported from their submodules on first use, so importing
+the package (or a light submodule such as trello_client.credentials) doesn't
+load requests. rethread_board.py depends on that for a fast --help.
+"""
+import importlib
+
+# Exported name -> submodule that defines it.
+_EXPORTS = {
+    "BoardFileError": "boardfile",
+    "export_board": "boardfile",
+    "import_board": "boardfile",
+    "read_board_file": "boardfile",
+    "write_board_file": "boardfile",
+    "BASE": "client",
+    "DEFAULT_POOL_SIZE": "client",
+    "DEFAULT_TIMEOUT": "client",
+    "TrelloClient": "client",
+    "TrelloError": "client",
+    "DEFAULT_MAX_IN_FLIGHT": "fanout",
+    "CardSpec": "fanout",
+    "FanOut": "fanout",
+    "SeedResult": "fanout",
+    "checklist_labels": "fanout",
+    "seed_cards": "fanout",
+    "IdempotencyIndex": "idempotency",
+    "content_hash": "idempotency",
+    "Journal": "journal",
+    "RateLimiter": "ratelimit",
+    "SlidingWindow": "ratelimit",
+    "BoardSnapshot": "snapshot",
+    "Card": "snapshot",
+    "Checklist": "snapshot",
+    "Label": "snapshot",
+    "Member": "snapshot",
+    "TrelloList": "snapshot",
+    "invalidate_snapshot": "snapshot",
+    "load_snapshot": "snapshot",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,246 @@
+"""
+asyncio Trello client with the same operations as TrelloClient.
+
+AsyncTrelloClient runs every call on one event loop over a single httpx
+AsyncClient (HTTP/1.1 keep-alive pool), so many boards or cards can be in flight
+from one process without a thread per request. It shares RateLimiter (awaiting
+reserve() instead of sleeping), TrelloError, TRELLO_BASE_URL and the tracing
+sinks with the synchronous client, and returns the same JSON and BoardSnapshot
+objects.
+
+Concurrency is structured: add_checklist() adds its items inside an
+asyncio.TaskGroup, and bounded() runs any batch of coroutines under a limit the
+same way, so a failure cancels its siblings instead of leaving them running.
+
+    async with AsyncTrelloClient(key, token) as client:
+        snapshot = await client.get_board_snapshot("m47dQixP")
+        await bounded([client.add_label(c.id, label_id) for c in snapshot.cards], 16)
+
+Needs httpx (pip install httpx) and Python 3.11+; the synchronous scripts don't import this module.
+"""
+import asyncio
+import os
+import time
+
+import httpx
+
+from . import projection, tracing
+from .client import BASE, BASE_URL_ENV, CARD_PAGE_SIZE, DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT, TrelloError, label_already_on_card
+from .fanout import DEFAULT_MAX_IN_FLIGHT
+from .ratelimit import RateLimiter
+from .snapshot import CARD_PARAMS, SNAPSHOT_PARAMS, BoardSnapshot
+
+
+async def bounded(coros, max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+    """Await coroutines with at most max_in_flight running at once. Returns results in order.
+
+    Runs in a TaskGroup: the first exception cancels the rest and is raised (in an ExceptionGroup).
+    """
+    semaphore = asyncio.Semaphore(max_in_flight)
+
+    async def run(coro):
+        async with semaphore:
+            return await coro
+
+    async with asyncio.TaskGroup() as group:
+        tasks = [group.create_task(run(coro)) for coro in coros]
+    return [task.result() for task in tasks]
+
+
+class AsyncTrelloClient:
+    def __init__(self, key, token, base=None, timeout=DEFAULT_TIMEOUT, pool_size=DEFAULT_POOL_SIZE, limiter=None):
+        self.key = key
+        self.token = token
+        base = base or os.environ.get(BASE_URL_ENV, "").strip() or BASE
+        self.base = base.rstrip("/")
+        connect, read = timeout
+        # Pass one limiter to several clients (sync or async) to make them share a key/token budget.
+        self.limiter = limiter or RateLimiter()
+        self.http = httpx.AsyncClient(
+            timeout=httpx.Timeout(read, connect=connect),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+        tracing.configure_from_env()
+
+    @property
+    def auth(self):
+        return {"key": self.key, "token": self.token}
+
+    async def aclose(self):
+        await self.http.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def _acquire(self):
+        waited = 0.0
+        while True:
+            delay = self.limiter.reserve()
+            if not delay:
+                return waited
+            await asyncio.sleep(delay)
+            waited += delay
+
+    def _trace(self, method, path, status, start, attempt, waited, response=None):
+        if not tracing.enabled():
+            return
+        sent = received = 0
+        if response is not None:
+            sent = len(str(response.request.url)) + len(response.request.content)
+            received = len(response.content)
+        tracing.emit(
+            tracing.CallRecord(
+                "trello",
+                method,
+                tracing.route_template(path),
+                status,
+                time.perf_counter() - start,
+                bytes_sent=sent,
+                bytes_received=received,
+                attempt=attempt,
+                waited=waited,
+            )
+        )
+
+    async def request(self, method, path, params=None, json=None):
+        """Send one call and return the decoded JSON body. Raises TrelloError on non-2xx.
+
+        429s are retried with jittered backoff up to limiter.max_retries times.
+        """
+        attempt = 0
+        while True:
+            waited = await self._acquire()
+            start = time.perf_counter()
+            try:
+                r = await self.http.request(
+                    method, f"{self.base}{path}", params={**self.auth, **(params or {})}, json=json
+                )
+            except httpx.HTTPError:
+                self._trace(method, path, 0, start, attempt, waited)
+                raise
+            self._trace(method, path, r.status_code, start, attempt, waited, r)
+            self.limiter.observe(r.headers, r.status_code)
+            if r.status_code != 429 or attempt >= self.limiter.max_retries:
+                break
+            await asyncio.sleep(self.limiter.throttled(r.text, attempt, r.headers.get("Retry-After")))
+            attempt += 1
+        if not 200 <= r.status_code < 300:
+            raise TrelloError(method, path, r.status_code, r.text)
+        if not r.content:
+            return None
+        return r.json()
+
+    async def get(self, path, **params):
+        if not projection.strict():
+            return await self.request("GET", path, params=params)
+        if "fields" not in params:
+            raise ValueError(f"GET {path} without fields= ({projection.STRICT_ENV} is set)")
+        return projection.guard(await self.request("GET", path, params=params), params)
+
+    async def post(self, path, json=None, **params):
+        return await self.request("POST", path, params=params, json=json)
+
+    async def put(self, path, json=None, **params):
+        return await self.request("PUT", path, params=params, json=json)
+
+    async def delete(self, path, **params):
+        return await self.request("DELETE", path, params=params)
+
+    # Boards
+
+    async def get_board(self, board_ref, **params):
+        """Board by id or shortLink."""
+        return await self.get(f"/boards/{board_ref}", **params)
+
+    async def get_board_snapshot(self, board_ref):
+        """Lists, labels, members and checklists in one read plus the cards page by page, as a BoardSnapshot (not cached)."""
+        with tracing.phase("snapshot"):
+            board = await self.get_board(board_ref, **SNAPSHOT_PARAMS)
+            cards = [card async for card in self.iter_cards(board["id"], **CARD_PARAMS)]
+        return BoardSnapshot.from_api({**board, "cards": cards}, time.time())
+
+    async def get_my_boards(self, **params):
+        return await self.get("/members/me/boards", **params)
+
+    async def get_cards(self, board_id, **params):
+        return await self.get(f"/boards/{board_id}/cards", **params)
+
+    async def iter_cards(self, board_id, page_size=CARD_PAGE_SIZE, **params):
+        """Every card on a board, newest first, paged with `before` cursors like TrelloClient.iter_cards()."""
+        before = None
+        while True:
+            cursor = {"before": before} if before else {}
+            page = await self.get_cards(board_id, limit=page_size, **cursor, **params)
+            for card in page:
+                yield card
+            if len(page) < page_size:
+                return
+            before = min(card["id"] for card in page)
+
+    # Lists, labels
+
+    async def create_list(self, board_id, name, pos="bottom"):
+        return await self.post(f"/boards/{board_id}/lists", name=name, pos=pos)
+
+    async def create_label(self, board_id, name, color):
+        return await self.post(f"/boards/{board_id}/labels", name=name, color=color)
+
+    async def move_all_cards(self, list_id, board_id, target_list_id):
+        """Move every open card in a list to another list with one call."""
+        return await self.post(f"/lists/{list_id}/moveAllCards", idBoard=board_id, idList=target_list_id)
+
+    async def archive_all_cards(self, list_id):
+        """Archive every open card in a list with one call."""
+        return await self.post(f"/lists/{list_id}/archiveAllCards")
+
+    # Cards
+
+    async def create_card(self, list_id, name, **fields):
+        """fields: desc, pos, due, idLabels (list or comma string), idMembers, ..."""
+        for k in ("idLabels", "idMembers"):
+            if isinstance(fields.get(k), (list, tuple)):
+                fields[k] = ",".join(fields[k])
+        return await self.post("/cards", idList=list_id, name=name, **fields)
+
+    async def update_card(self, card_id, **fields):
+        return await self.put(f"/cards/{card_id}", json=fields)
+
+    async def move_card(self, card_id, list_id, pos=None):
+        fields = {"idList": list_id}
+        if pos is not None:
+            fields["pos"] = pos
+        return await self.update_card(card_id, **fields)
+
+    async def archive_card(self, card_id):
+        return await self.update_card(card_id, closed=True)
+
+    async def add_label(self, card_id, label_id):
+        """Put a label on a card; one already there counts as added."""
+        try:
+            return await self.post(f"/cards/{card_id}/idLabels", value=label_id)
+        except TrelloError as e:
+            if not label_already_on_card(e):
+                raise
+            return None
+
+    async def add_member(self, card_id, member_id):
+        return await self.post(f"/cards/{card_id}/idMembers", value=member_id)
+
+    # Checklists
+
+    async def create_checklist(self, card_id, name="Checklist"):
+        return await self.post("/checklists", idCard=card_id, name=name)
+
+    async def add_check_item(self, checklist_id, name, pos="bottom"):
+        return await self.post(f"/checklists/{checklist_id}/checkItems", json={"name": name, "pos": pos})
+
+    async def add_checklist(self, card_id, items, name="Checklist", max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+        """Create a checklist and add its items concurrently; explicit positions keep them in order."""
+        checklist = await self.create_checklist(card_id, name)
+        await bounded(
+            [self.add_check_item(checklist["id"], item, pos=k + 1) for k, item in enumerate(items)], max_in_flight
+        )
+        return checklist
@@ -0,0 +1,249 @@
+"""
+Board export files: a live board in one compact, versioned file, and back.
+
+    data = export_board(client, "m47dQixP")
+    write_board_file("template.board.json.gz", data)
+    result = import_board(client, read_board_file("template.board.json.gz"), name="Client X Sprint Board")
+
+A board file is gzip-compressed JSON with every repeated reference turned into
+an index:
+
+    {"format": "trello-board", "version": 1, "exportedAt": "...",
+     "board": {"id", "name", "desc", "shortLink", "dateLastActivity"},
+     "labels": [[name, color], ...],
+     "members": [[id, username, fullName], ...],
+     "lists": [name, ...],
+     "cards": [[list, name, desc, due, [label, ...], [member, ...], [[checklist name, [item, ...]], ...]], ...]}
+
+Lists and cards are in board order. Open lists and cards only; comments,
+attachments and check-item state aren't kept. An export is one GET /batch (the
+board with its lists, labels, members and checklists, plus the first card page)
+and one more read per further 1,000 cards.
+
+import_board() copies the source board with a single POST /boards?idBoardSource=
+when it still exists and hasn't changed since the export (one dateLastActivity
+read decides), so cloning a template takes two calls. Otherwise, or with
+copy=False, it replays the file: the board, then its labels and lists in
+parallel, then every card through seed_cards() (concurrent, rate limited,
+checklists fanned out).
+"""
+import gzip
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .client import CARD_PAGE_SIZE, TrelloError
+from .fanout import DEFAULT_MAX_IN_FLIGHT, POS_STEP, CardSpec, FanOut, seed_cards
+from .projection import fields_param
+
+FORMAT = "trello-board"
+VERSION = 1
+
+BOARD_PARAMS = {
+    "fields": fields_param(("name", "desc", "shortLink", "dateLastActivity")),
+    "lists": "open",
+    "list_fields": fields_param(("name", "pos")),
+    "labels": "all",
+    "label_fields": fields_param(("name", "color")),
+    "members": "all",
+    "member_fields": fields_param(("username", "fullName")),
+    "checklists": "all",
+    "checklist_fields": fields_param(("idCard", "name", "pos")),
+    "checkItem_fields": fields_param(("name", "pos")),
+}
+CARD_PARAMS = {"filter": "open", "fields": fields_param(("name", "desc", "due", "idList", "idLabels", "idMembers", "pos"))}
+
+
+class BoardFileError(ValueError):
+    pass
+
+
+def _by_pos(items):
+    return sorted(items, key=lambda item: item.get("pos", 0))
+
+
+def export_board(client, board_ref):
+    """The board as board-file data (a dict). Raises TrelloError if it can't be read."""
+    first_cards = (f"/boards/{board_ref}/cards", {**CARD_PARAMS, "limit": CARD_PAGE_SIZE})
+    board, page = client.get_batch([(f"/boards/{board_ref}", BOARD_PARAMS), first_cards])
+    cards = client.iter_cards(board["id"], first_page=page, **CARD_PARAMS)
+
+    lists = _by_pos(board.get("lists", []))
+    list_index = {lst["id"]: i for i, lst in enumerate(lists)}
+    labels = board.get("labels", [])
+    label_index = {lb["id"]: i for i, lb in enumerate(labels)}
+    members = board.get("members", [])
+    member_index = {m["id"]: i for i, m in enumerate(members)}
+    checklists = {}
+    for cl in _by_pos(board.get("checklists", [])):
+        items = [item.get("name", "") for item in _by_pos(cl.get("checkItems") or [])]
+        checklists.setdefault(cl["idCard"], []).append([cl.get("name", ""), items])
+
+    rows = []
+    for card in sorted((c for c in cards if c["idList"] in list_index), key=lambda c: (list_index[c["idList"]], c.get("pos", 0))):
+        rows.append(
+            [
+                list_index[card["idList"]],
+                card.get("name", ""),
+                card.get("desc") or "",
+                card.get("due"),
+                [label_index[lb] for lb in card.get("idLabels") or [] if lb in label_index],
+                [member_index[m] for m in card.get("idMembers") or [] if m in member_index],
+                checklists.get(card["id"], []),
+            ]
+        )
+    return {
+        "format": FORMAT,
+        "version": VERSION,
+        "exportedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "board": {k: board.get(k) for k in ("id", "name", "desc", "shortLink", "dateLastActivity")},
+        "labels": [[lb.get("name") or "", lb.get("color")] for lb in labels],
+        "members": [[m["id"], m.get("username") or "", m.get("fullName") or ""] for m in members],
+        "lists": [lst.get("name", "") for lst in lists],
+        "cards": rows,
+    }
+
+
+def write_board_file(path, data):
+    """Write board-file data gzipped, replacing `path` atomically. Returns the file size in bytes."""
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=9) as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+    return path.stat().st_size
+
+
+def read_board_file(path):
+    """Board-file data from `path`. Raises BoardFileError if it isn't a board file this version can read."""
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        raise BoardFileError(f"{path}: no such file") from None
+    except (gzip.BadGzipFile, EOFError, ValueError) as e:
+        raise BoardFileError(f"{path}: not a gzipped JSON board file ({e})") from None
+    except OSError as e:
+        raise BoardFileError(f"{path}: {e.strerror or e}") from None
+    if not isinstance(data, dict) or data.get("format") != FORMAT:
+        raise BoardFileError(f"{path}: not a {FORMAT} file")
+    if not isinstance(data.get("version"), int) or data["version"] > VERSION:
+        raise BoardFileError(f"{path}: version {data.get('version')!r} is newer than this reader ({VERSION})")
+    for key, kind in (("board", dict), ("labels", list), ("members", list), ("lists", list), ("cards", list)):
+        if not isinstance(data.get(key), kind):
+            raise BoardFileError(f"{path}: '{key}' missing or malformed")
+    return data
+
+
+@dataclass
+class ImportResult:
+    board: dict
+    # "copied" (idBoardSource) or "replayed"
+    method: str
+    cards: int = 0
+    errors: list = field(default_factory=list)
+    dropped_members: list = field(default_factory=list)
+
+    @property
+    def ok(self):
+        return not self.errors
+
+
+def _copy(client, data, name, org_id):
+    """The new board, copied server-side from the export's source board, or None if that isn't possible."""
+    source = data["board"]
+    if not source.get("id"):
+        return None
+    try:
+        current = client.get_board(source["id"], fields="dateLastActivity")
+    except TrelloError:
+        return None
+    if current.get("dateLastActivity") != source.get("dateLastActivity"):
+        return None  # changed since the export: the file, not the board, is what was asked for
+    params = {"idBoardSource": source["id"], "keepFromSource": "cards"}
+    if org_id:
+        params["idOrganization"] = org_id
+    try:
+        return client.create_board(name, **params)
+    except TrelloError:
+        return None
+
+
+def _replay(client, data, name, org_id, max_in_flight):
+    params = {"defaultLists": "false", "defaultLabels": "false", "desc": data["board"].get("desc") or ""}
+    if org_id:
+        params["idOrganization"] = org_id
+    board = client.create_board(name, **params)
+    result = ImportResult(board, "replayed")
+
+    with FanOut(max_in_flight) as fanout:
+        labels = [fanout.submit(client.create_label, board["id"], n, color) for n, color in data["labels"]]
+        lists = [fanout.submit(client.create_list, board["id"], n, str((i + 1) * POS_STEP)) for i, n in enumerate(data["lists"])]
+
+    def created_ids(futures):
+        ids = []
+        for future in futures:
+            try:
+                ids.append(future.result()["id"])
+            except TrelloError as e:
+                result.errors.append(e)
+                ids.append(None)
+        return ids
+
+    label_ids = created_ids(labels)
+    list_ids = created_ids(lists)
+    # Card members must be on the board; the creator is, others may not be.
+    on_board = {}
+    for member in client.get_members(board["id"], fields="username"):
+        on_board[member["id"]] = on_board[member["username"]] = member["id"]
+    member_ids = []
+    for member_id, username, _ in data["members"]:
+        member_ids.append(on_board.get(member_id) or on_board.get(username))
+        if member_ids[-1] is None:
+            result.dropped_members.append(username)
+
+    specs, extra = [], []
+    seen_in_list = {}
+    for list_i, name_, desc, due, label_is, member_is, checklists in data["cards"]:
+        if list_ids[list_i] is None:
+            continue
+        seen_in_list[list_i] = seen_in_list.get(list_i, 0) + 1
+        first = checklists[0] if checklists else ["Checklist", []]
+        specs.append(
+            CardSpec(
+                list_ids[list_i],
+                name_,
+                desc=desc,
+                pos=seen_in_list[list_i] * POS_STEP,
+                due=due,
+                label_ids=[label_ids[i] for i in label_is if label_ids[i]],
+                member_ids=[member_ids[i] for i in member_is if member_ids[i]],
+                checklist=list(first[1]),
+                checklist_name=first[0],
+            )
+        )
+        extra.append(checklists[1:])
+
+    seeded = seed_cards(client, specs, max_in_flight=max_in_flight, board_id=board["id"])
+    with FanOut(max_in_flight) as fanout:
+        more = []
+        for seed, checklists in zip(seeded, extra):
+            if not seed.ok:
+                result.errors.append(seed.error or TrelloError("POST", "/cards", 0, f"card '{seed.spec.name}' was not created"))
+                continue
+            result.cards += 1
+            result.errors.extend(seed.checklist_errors)
+            more += [fanout.submit(client.add_checklist, seed.card["id"], items, cl_name) for cl_name, items in checklists]
+    created_ids(more)
+    return result
+
+
+def import_board(client, data, name=None, org_id=None, copy=True, max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+    """Create a new board from board-file data. Returns an ImportResult; raises TrelloError if the board can't be created."""
+    name = name or data["board"].get("name") or "Imported board"
+    board = _copy(client, data, name, org_id) if copy else None
+    if board is not None:
+        return ImportResult(board, "copied", cards=len(data["cards"]))
+    return _replay(client, data, name, org_id, max_in_flight)
@@ -0,0 +1,56 @@
+"""
+Command-line pieces shared by the board scripts and rethread_board.py.
+
+Kept free of requests and the rest of trello_client, so a front end can build
+its parsers (and answer --help) before deciding which script to import.
+"""
+import argparse
+from datetime import date
+
+
+def add_mode_arguments(parser):
+    """--plan prints, --apply (default) executes, --resume finishes an interrupted --apply, --rollback undoes the last one."""
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--plan", action="store_true", help="Print the operations that would run and exit without writing.")
+    mode.add_argument("--apply", action="store_true", help="Execute the plan (default).")
+    mode.add_argument(
+        "--resume", action="store_true", help="Finish the operations an interrupted --apply left pending (no board re-scan)."
+    )
+    mode.add_argument("--rollback", action="store_true", help="Undo every write the last --apply made on this board.")
+    return parser
+
+
+def add_start_argument(parser):
+    """--start: day 1 of a sprint cycle."""
+    parser.add_argument(
+        "--start", type=date.fromisoformat, metavar="YYYY-MM-DD", help="Day 1 of the new cycle (default: today, UTC)."
+    )
+    return parser
+
+
+def add_export_arguments(parser):
+    """BOARD and --output for export_board.py."""
+    parser.add_argument("board", nargs="?", help="Board id or shortLink (default: TRELLO_BOARD_ID / TRELLO_BOARD_SHORT_LINK / the board name).")
+    parser.add_argument("-o", "--output", metavar="FILE", help="Where to write the board file (default: <shortLink>.board.json.gz).")
+    return parser
+
+
+def add_import_arguments(parser):
+    """FILE, --name, --org and --replay for import_board.py."""
+    parser.add_argument("file", metavar="FILE", help="Board file written by export_board.py.")
+    parser.add_argument("--name", help="Name of the new board (default: the exported board's name).")
+    parser.add_argument("--org", metavar="WORKSPACE", help="Workspace id for the new board (default: TRELLO_ORG_ID).")
+    parser.add_argument(
+        "--replay", action="store_true", help="Rebuild from the file even if the source board could be copied server-side."
+    )
+    return parser
+
+
+def plan_apply_parser(description):
+    """Argument parser shared by the reconciling scripts."""
+    return add_mode_arguments(argparse.ArgumentParser(description=description))
+
+
+def run_mode(args):
+    """"plan", "resume", "rollback" or "apply" from parsed mode arguments."""
+    return "plan" if args.plan else "resume" if args.resume else "rollback" if args.rollback else "apply"
@@ -0,0 +1,316 @@
+"""
+Pooled Trello REST client shared by every script in scripts/.
+
+One keep-alive requests.Session per client, so a run pays the TLS handshake once
+instead of once per call. The client owns the auth params, BASE (TRELLO_BASE_URL
+overrides it), timeouts and JSON decoding, and every call passes through a shared
+RateLimiter so 429s are retried rather than dropped. Scripts call the named
+operations (create_card, move_card, ...) and catch TrelloError instead of checking
+status codes by hand. Independent reads can share a round trip through
+get_batch() (Trello's GET /batch, ten routes per call).
+"""
+import os
+import threading
+import time
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import projection, tracing
+from .ratelimit import RateLimiter
+
+BASE = "https://api.trello.com/1"
+
+# Points every script at another server (e.g. the local fake in trello_client.fake).
+BASE_URL_ENV = "TRELLO_BASE_URL"
+
+# (connect, read) seconds. Trello answers most calls well under a second; the read
+# timeout is generous for board-wide reads on large boards.
+DEFAULT_TIMEOUT = (5, 30)
+
+# Connections kept alive per host. Sized for the concurrent seeding paths so
+# worker threads never queue on the pool.
+DEFAULT_POOL_SIZE = 32
+
+# Trello's largest `limit` for card listings; iter_cards() pages at this size.
+CARD_PAGE_SIZE = 1000
+
+# Most routes Trello's GET /batch takes in one call.
+BATCH_LIMIT = 10
+
+
+class TrelloError(Exception):
+    """Non-2xx response from Trello. str() is the response body, like r.text was."""
+
+    def __init__(self, method, path, status_code, text):
+        super().__init__(text)
+        self.method = method
+        self.path = path
+        self.status_code = status_code
+        self.text = text
+
+    def __str__(self):
+        return self.text or f"{self.method} {self.path} -> HTTP {self.status_code}"
+
+
+def label_already_on_card(error):
+    """True for the 400 Trello sends when POST /cards/{id}/idLabels names a label the card already has."""
+    return error.status_code == 400 and "already on the card" in (error.text or "")
+
+
+def _batch_error(path, reply):
+    """TrelloError for a failed /batch route: {"statusCode", "message"} or {"<status>": body}."""
+    if "statusCode" in reply:
+        return TrelloError("GET", path, int(reply["statusCode"]), str(reply.get("message", "")))
+    status, body = next(iter(reply.items()), ("0", ""))
+    return TrelloError("GET", path, int(status) if str(status).isdigit() else 0, body if isinstance(body, str) else str(body))
+
+
+class TrelloClient:
+    def __init__(self, key, token, base=None, timeout=DEFAULT_TIMEOUT, pool_size=DEFAULT_POOL_SIZE, limiter=None):
+        self.key = key
+        self.token = token
+        base = base or os.environ.get(BASE_URL_ENV, "").strip() or BASE
+        self.base = base.rstrip("/")
+        self.timeout = timeout
+        # Pass one limiter to several clients to make them share a key/token budget.
+        self.limiter = limiter or RateLimiter()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # HTTP attempts sent (retries included), e.g. for per-board reports.
+        self.calls = 0
+        self._calls_lock = threading.Lock()
+        tracing.configure_from_env()
+
+    @property
+    def auth(self):
+        return {"key": self.key, "token": self.token}
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def request(self, method, path, params=None, json=None):
+        """Send one call and return the decoded JSON body. Raises TrelloError on non-2xx.
+
+        429s are retried with jittered backoff up to limiter.max_retries times. Every
+        attempt is reported to the tracing sinks, if any are set up.
+        """
+        attempt = 0
+        while True:
+            waited = self.limiter.acquire()
+            with self._calls_lock:
+                self.calls += 1
+            start = time.perf_counter()
+            try:
+                r = self.session.request(
+                    method,
+                    f"{self.base}{path}",
+                    params={**self.auth, **(params or {})},
+                    json=json,
+                    timeout=self.timeout,
+                )
+            except requests.RequestException:
+                if tracing.enabled():
+                    duration = time.perf_counter() - start
+                    tracing.emit(
+                        tracing.CallRecord("trello", method, tracing.route_template(path), 0, duration, attempt=attempt, waited=waited)
+                    )
+                raise
+            tracing.record_response("trello", r, path, time.perf_counter() - start, attempt, waited)
+            self.limiter.observe(r.headers, r.status_code)
+            if r.status_code != 429 or attempt >= self.limiter.max_retries:
+                break
+            time.sleep(self.limiter.throttled(r.text, attempt, r.headers.get("Retry-After")))
+            attempt += 1
+        if not 200 <= r.status_code < 300:
+            raise TrelloError(method, path, r.status_code, r.text)
+        if not r.content:
+            return None
+        return r.json()
+
+    def get(self, path, **params):
+        """GET with a fields= projection (see projection.py); debug mode enforces it."""
+        if not projection.strict():
+            return self.request("GET", path, params=params)
+        if "fields" not in params:
+            raise ValueError(f"GET {path} without fields= ({projection.STRICT_ENV} is set)")
+        return projection.guard(self.request("GET", path, params=params), params)
+
+    def get_batch(self, calls, return_errors=False):
+        """Run independent GETs, [(path, params)], as GET /batch calls of up to 10 routes.
+
+        Results come back in call order. A route that fails raises its TrelloError,
+        or with return_errors=True takes that error's place in the results. Each
+        route's query is encoded into its own URL, so the commas in fields= lists
+        don't split it.
+        """
+        if projection.strict():
+            for path, params in calls:
+                if "fields" not in params:
+                    raise ValueError(f"GET {path} without fields= ({projection.STRICT_ENV} is set)")
+        results = []
+        for start in range(0, len(calls), BATCH_LIMIT):
+            chunk = calls[start:start + BATCH_LIMIT]
+            if len(chunk) == 1:
+                path, params = chunk[0]
+                try:
+                    replies = [{"200": self.request("GET", path, params=params)}]
+                except TrelloError as e:
+                    replies = [{"statusCode": e.status_code, "message": e.text}]
+            else:
+                urls = ",".join(f"{path}?{urlencode(params)}" if params else path for path, params in chunk)
+                replies = self.request("GET", "/batch", params={"urls": urls})
+            for (path, params), reply in zip(chunk, replies):
+                if "200" in reply:
+                    body = reply["200"]
+                    results.append(projection.guard(body, params) if projection.strict() else body)
+                    continue
+                error = _batch_error(path, reply)
+                if not return_errors:
+                    raise error
+                results.append(error)
+        return results
+
+    def post(self, path, json=None, **params):
+        return self.request("POST", path, params=params, json=json)
+
+    def put(self, path, json=None, **params):
+        return self.request("PUT", path, params=params, json=json)
+
+    def delete(self, path, **params):
+        return self.request("DELETE", path, params=params)
+
+    # Boards
+
+    def get_board(self, board_ref, **params):
+        """Board by id or shortLink."""
+        return self.get(f"/boards/{board_ref}", **params)
+
+    def get_my_boards(self, **params):
+        return self.get("/members/me/boards", **params)
+
+    def get_org_boards(self, org_id, **params):
+        """Boards in a workspace (organization id or name)."""
+        return self.get(f"/organizations/{org_id}/boards", **params)
+
+    def create_board(self, name, **params):
+        return self.post("/boards", name=name, **params)
+
+    def get_lists(self, board_id, **params):
+        return self.get(f"/boards/{board_id}/lists", **params)
+
+    def get_labels(self, board_id, **params):
+        return self.get(f"/boards/{board_id}/labels", **params)
+
+    def get_cards(self, board_id, **params):
+        return self.get(f"/boards/{board_id}/cards", **params)
+
+    def iter_cards(self, board_id, page_size=CARD_PAGE_SIZE, first_page=None, **params):
+        """Every card on a board, newest first, one page in memory at a time.
+
+        get_cards() is a single response that Trello caps; this pages with `before`
+        cursors (the oldest id seen so far) until a short page comes back.
+        first_page is a page already read (e.g. in a get_batch()) to continue from.
+        """
+        before = None
+        page = first_page
+        while True:
+            if page is None:
+                cursor = {"before": before} if before else {}
+                page = self.get_cards(board_id, limit=page_size, **cursor, **params)
+            yield from page
+            if len(page) < page_size:
+                return
+            before = min(card["id"] for card in page)
+            page = None
+
+    def get_members(self, board_id, **params):
+        return self.get(f"/boards/{board_id}/members", **params)
+
+    # Lists, labels
+
+    def create_list(self, board_id, name, pos="bottom"):
+        return self.post(f"/boards/{board_id}/lists", name=name, pos=pos)
+
+    def create_label(self, board_id, name, color):
+        return self.post(f"/boards/{board_id}/labels", name=name, color=color)
+
+    def move_all_cards(self, list_id, board_id, target_list_id):
+        """Move every open card in a list to another list with one call."""
+        return self.post(f"/lists/{list_id}/moveAllCards", idBoard=board_id, idList=target_list_id)
+
+    def archive_all_cards(self, list_id):
+        """Archive every open card in a list with one call."""
+        return self.post(f"/lists/{list_id}/archiveAllCards")
+
+    def archive_list(self, list_id):
+        return self.put(f"/lists/{list_id}", closed="true")
+
+    def delete_label(self, label_id):
+        return self.delete(f"/labels/{label_id}")
+
+    # Cards
+
+    def create_card(self, list_id, name, **fields):
+        """fields: desc, pos, due, idLabels (list or comma string), idMembers, ..."""
+        for k in ("idLabels", "idMembers"):
+            if isinstance(fields.get(k), (list, tuple)):
+                fields[k] = ",".join(fields[k])
+        return self.post("/cards", idList=list_id, name=name, **fields)
+
+    def update_card(self, card_id, **fields):
+        return self.put(f"/cards/{card_id}", json=fields)
+
+    def move_card(self, card_id, list_id, pos=None):
+        fields = {"idList": list_id}
+        if pos is not None:
+            fields["pos"] = pos
+        return self.update_card(card_id, **fields)
+
+    def archive_card(self, card_id):
+        return self.update_card(card_id, closed=True)
+
+    def unarchive_card(self, card_id):
+        return self.update_card(card_id, closed=False)
+
+    def add_label(self, card_id, label_id):
+        """Put a label on a card. A label that is already there counts as added (Trello answers 400)."""
+        try:
+            return self.post(f"/cards/{card_id}/idLabels", value=label_id)
+        except TrelloError as e:
+            if not label_already_on_card(e):
+                raise
+            return None
+
+    def remove_label(self, card_id, label_id):
+        return self.delete(f"/cards/{card_id}/idLabels/{label_id}")
+
+    def add_member(self, card_id, member_id):
+        return self.post(f"/cards/{card_id}/idMembers", value=member_id)
+
+    # Checklists
+
+    def create_checklist(self, card_id, name="Checklist"):
+        return self.post("/checklists", idCard=card_id, name=name)
+
+    def add_check_item(self, checklist_id, name, pos="bottom", checked=False):
+        item = {"name": name, "pos": pos}
+        if checked:
+            item["checked"] = True
+        return self.post(f"/checklists/{checklist_id}/checkItems", json=item)
+
+    def add_checklist(self, card_id, items, name="Checklist"):
+        """Create a checklist on a card and add items in order. Returns the checklist."""
+        checklist = self.create_checklist(card_id, name)
+        for item in items:
+            self.add_check_item(checklist["id"], item)
+        return checklist
@@ -0,0 +1,48 @@
+"""
+secrets.json and the Trello key/token, read once per process for every board script.
+
+get_trello_credentials() looks at TRELLO_API_KEY / TRELLO_TOKEN, then secrets.json
+at the repo root (trello.api_key / trello.token, or top-level TRELLO_API_KEY /
+TRELLO_TOKEN), then prompts. Both answers are remembered, so a script run through
+rethread_board.py or run_boards.py never reads the file or prompts twice.
+"""
+import json
+import os
+from functools import lru_cache
+
+from .state import REPO_ROOT
+
+SECRETS_PATH = REPO_ROOT / "secrets.json"
+
+
+@lru_cache(maxsize=None)
+def load_secrets():
+    """secrets.json as a dict, {} if it's missing or unreadable. Shared: don't modify it."""
+    if not SECRETS_PATH.exists():
+        return {}
+    try:
+        with open(SECRETS_PATH, "r", encoding="utf-8") as f:
+            secrets = json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return {}
+    return secrets if isinstance(secrets, dict) else {}
+
+
+def _clean(value):
+    return value.strip() if isinstance(value, str) else ""
+
+
+@lru_cache(maxsize=None)
+def get_trello_credentials():
+    """(key, token) from env, then secrets.json, then a prompt. Either may be "" if nothing was given."""
+    key = _clean(os.environ.get("TRELLO_API_KEY"))
+    token = _clean(os.environ.get("TRELLO_TOKEN"))
+    if not key or not token:
+        secrets = load_secrets()
+        trello = secrets.get("trello") or {}
+        key = key or _clean(trello.get("api_key") or secrets.get("TRELLO_API_KEY"))
+        token = token or _clean(trello.get("token") or secrets.get("TRELLO_TOKEN"))
+    if not key or not token:
+        key = input("Trello API Key: ").strip()
+        token = input("Trello Token: ").strip()
+    return key, token
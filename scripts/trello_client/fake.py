@@ -0,0 +1,986 @@
+"""
+Local stand-in for the subset of the Trello REST API the board scripts use.
+
+FakeTrello holds boards, lists, cards, labels, members and checklists in memory
+and answers the same routes as https://api.trello.com/1: board reads with nested
+lists/cards/labels/members/checklists, list/card/label/checklist/checkItem
+creation, card updates, idLabels/idMembers, moveAllCards and archiveAllCards,
+and GET /batch over any of its GET routes.
+Every write is also recorded in the board's action feed (createCard, updateCard,
+addLabelToCard, ...), served newest first by GET /boards/{id}/actions, and
+POSTed to the board's webhooks signed with FAKE_SECRET (POST /webhooks checks
+the callback with a HEAD first, as Trello does).
+FakeTrelloServer serves it on localhost with configurable latency, Trello's
+x-rate-limit-* headers, windowed 429s and random 429 injection, and counts
+requests and bytes so throughput work can be measured without the network.
+
+Point any script at it with TRELLO_BASE_URL:
+
+    PYTHONPATH=scripts python -m trello_client.fake --port 8765 --seed-cards 100 &
+    TRELLO_BASE_URL=http://127.0.0.1:8765/1 TRELLO_API_KEY=k TRELLO_TOKEN=t \\
+        python scripts/add_transportation_label.py
+
+Test hooks live under /_fake/: GET stats, POST reset (clears counters), POST seed
+(body: {"name", "lists", "cards", "shortLink"} -> seeded board).
+"""
+import argparse
+import itertools
+import json
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from collections import Counter, deque
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from .ratelimit import TRELLO_KEY_LIMIT, TRELLO_TOKEN_LIMIT
+from .tracing import route_template
+from .webhook import sign
+
+POS_STEP = 65536
+ME_ID = "5f0000000000000000000001"
+DEFAULT_LISTS = ["Backlog", "Week A: Discovery", "Week B: Execution", "Blocked / Waiting", "Done"]
+CARD_BODY = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 8
+# Largest `limit` Trello accepts on card and action listings.
+CARD_LIMIT_MAX = 1000
+ACTION_LIMIT_MAX = 1000
+# Most routes GET /batch takes.
+BATCH_LIMIT = 10
+# Signs webhook deliveries; give the receiver the same value as TRELLO_API_SECRET.
+FAKE_SECRET = "fake-secret"
+
+
+class FakeError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _not_found():
+    return FakeError(404, "The requested resource was not found.")
+
+
+def _project(obj, fields):
+    """Apply a Trello-style fields= param ("all" or comma list; id is always returned)."""
+    if not fields or fields == "all":
+        return dict(obj)
+    keep = set(fields.split(",")) | {"id"}
+    return {k: v for k, v in obj.items() if k in keep}
+
+
+def _flag(value):
+    return str(value).lower() in ("true", "1")
+
+
+class FakeTrello:
+    """In-memory board state and route handling. Thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._ids = itertools.count(1)
+        self._clock = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        self.boards = {}
+        self.lists = {}
+        self.cards = {}
+        self.labels = {}
+        self.checklists = {}
+        self.members = {ME_ID: {"id": ME_ID, "username": "me", "fullName": "Fake Me"}}
+        self.board_members = {}
+        self.actions = []
+        self.webhooks = {}
+        # (webhook, action) pairs for FakeTrelloServer to deliver.
+        self.outbox = queue.Queue()
+
+    # State helpers
+
+    def new_id(self):
+        return f"{0x600000000000000000000000 + next(self._ids):024x}"
+
+    def _now(self):
+        # Logical clock: strictly increasing so dateLastActivity always changes on a write.
+        self._clock += timedelta(milliseconds=1)
+        return self._clock.strftime("%Y-%m-%dT%H:%M:%S.") + f"{self._clock.microsecond // 1000:03d}Z"
+
+    def _touch(self, board_id):
+        board = self.boards.get(board_id)
+        if board:
+            board["dateLastActivity"] = self._now()
+
+    def _act(self, board_id, action_type, **data):
+        """Append a Trello-style action to the board's feed (GET /boards/{id}/actions)."""
+        board = self.boards[board_id]
+        action = {
+            "id": self.new_id(),
+            "idMemberCreator": ME_ID,
+            "type": action_type,
+            "date": self._now(),
+            "data": {"board": {"id": board_id, "name": board["name"], "shortLink": board["shortLink"]}, **data},
+        }
+        self.actions.append(action)
+        for hook in self.webhooks.values():
+            if hook["idModel"] == board_id and hook["active"]:
+                self.outbox.put((hook, action))
+
+    def _board(self, ref):
+        board = self.boards.get(ref) or next((b for b in self.boards.values() if b["shortLink"] == ref), None)
+        if not board:
+            raise _not_found()
+        return board
+
+    def _get(self, table, obj_id):
+        obj = table.get(obj_id)
+        if not obj:
+            raise _not_found()
+        return obj
+
+    def _next_pos(self, siblings, pos):
+        """siblings may be a generator; it is only walked for "top"/"bottom"."""
+        if pos in (None, "", "bottom"):
+            return max((s["pos"] for s in siblings), default=0) + POS_STEP
+        if pos == "top":
+            return min((s["pos"] for s in siblings), default=POS_STEP * 2) / 2
+        try:
+            return float(pos)
+        except ValueError:
+            raise FakeError(400, "invalid value for pos")
+
+    def _ordered(self, objs):
+        return sorted(objs, key=lambda o: o["pos"])
+
+    @staticmethod
+    def _ref(obj, *keys):
+        """The slice of an object an action carries, e.g. {"id", "name"} of a card."""
+        return {k: obj[k] for k in ("id", "name", *keys) if k in obj}
+
+    def add_member(self, username, full_name=""):
+        with self._lock:
+            member = {"id": self.new_id(), "username": username, "fullName": full_name or username.title()}
+            self.members[member["id"]] = member
+            return member
+
+    def create_board(self, name, short_link=None, id_organization=None):
+        with self._lock:
+            board_id = self.new_id()
+            short_link = short_link or board_id[-8:]
+            board = {
+                "id": board_id,
+                "name": name,
+                "desc": "",
+                "closed": False,
+                "idOrganization": id_organization,
+                "shortLink": short_link,
+                "shortUrl": f"https://trello.com/b/{short_link}",
+                "url": f"https://trello.com/b/{short_link}/{name.lower().replace(' ', '-')}",
+                "dateLastActivity": self._now(),
+                "prefs": {"background": "blue", "permissionLevel": "private", "cardCovers": True},
+            }
+            self.boards[board_id] = board
+            self.board_members[board_id] = [ME_ID]
+            self._act(board_id, "createBoard")
+            return board
+
+    def copy_board(self, source_ref, name, keep_cards=False, id_organization=None):
+        """POST /boards with idBoardSource: open lists and labels, plus open cards with checklists if keep_cards."""
+        with self._lock:
+            source = self._board(source_ref)
+            board = self.create_board(name, id_organization=id_organization)
+            source_labels = [lb for lb in self.labels.values() if lb["idBoard"] == source["id"]]
+            labels = {lb["id"]: self.create_label(board["id"], lb["name"], lb["color"])["id"] for lb in source_labels}
+            lists = {lst["id"]: self.create_list(board["id"], lst["name"], lst["pos"])["id"] for lst in self._board_lists(source["id"])}
+            members = set(self.board_members[board["id"]])
+            for card in self._board_cards(source["id"], "open") if keep_cards else ():
+                if card["idList"] not in lists:
+                    continue
+                copy = self.create_card(
+                    lists[card["idList"]],
+                    card["name"],
+                    desc=card["desc"],
+                    pos=card["pos"],
+                    due=card["due"],
+                    id_labels=[labels[lb] for lb in card["idLabels"] if lb in labels],
+                    id_members=[m for m in card["idMembers"] if m in members],
+                )
+                for cl_id in card["idChecklists"]:
+                    checklist = self.checklists[cl_id]
+                    new = self.create_checklist(copy["id"], checklist["name"])
+                    for item in checklist["checkItems"]:
+                        self.add_check_item(new["id"], item["name"], item["pos"])
+            return board
+
+    def create_list(self, board_id, name, pos=None):
+        with self._lock:
+            self._board(board_id)
+            siblings = [lst for lst in self.lists.values() if lst["idBoard"] == board_id]
+            lst = {"id": self.new_id(), "name": name, "idBoard": board_id, "closed": False, "pos": self._next_pos(siblings, pos)}
+            self.lists[lst["id"]] = lst
+            self._act(board_id, "createList", list=self._ref(lst))
+            self._touch(board_id)
+            return lst
+
+    def create_card(self, list_id, name, desc="", pos=None, due=None, id_labels=(), id_members=()):
+        with self._lock:
+            lst = self._get(self.lists, list_id)
+            siblings = (c for c in self.cards.values() if c["idList"] == list_id and not c["closed"])
+            card_id = self.new_id()
+            card = {
+                "id": card_id,
+                "name": name,
+                "desc": desc,
+                "idBoard": lst["idBoard"],
+                "idList": list_id,
+                "pos": self._next_pos(siblings, pos),
+                "closed": False,
+                "due": due,
+                "dueComplete": False,
+                "idLabels": list(id_labels),
+                "idMembers": list(id_members),
+                "idChecklists": [],
+                "shortLink": card_id[-8:],
+                "shortUrl": f"https://trello.com/c/{card_id[-8:]}",
+                "dateLastActivity": self._now(),
+                "badges": {"checkItems": 0, "checkItemsChecked": 0, "comments": 0, "attachments": 0, "description": bool(desc)},
+                "cover": {"idAttachment": None, "color": None, "size": "normal"},
+            }
+            self.cards[card_id] = card
+            self._act(lst["idBoard"], "createCard", card=self._ref(card, "shortLink"), list=self._ref(lst))
+            self._touch(lst["idBoard"])
+            return card
+
+    def create_label(self, board_id, name, color=None):
+        with self._lock:
+            self._board(board_id)
+            label = {"id": self.new_id(), "idBoard": board_id, "name": name, "color": color}
+            self.labels[label["id"]] = label
+            self._act(board_id, "createLabel", label=self._ref(label, "color"))
+            self._touch(board_id)
+            return label
+
+    def create_checklist(self, card_id, name):
+        with self._lock:
+            card = self._get(self.cards, card_id)
+            siblings = [cl for cl in self.checklists.values() if cl["idCard"] == card_id]
+            checklist = {
+                "id": self.new_id(),
+                "idCard": card_id,
+                "idBoard": card["idBoard"],
+                "name": name,
+                "pos": self._next_pos(siblings, None),
+                "checkItems": [],
+            }
+            self.checklists[checklist["id"]] = checklist
+            card["idChecklists"].append(checklist["id"])
+            self._act(card["idBoard"], "addChecklistToCard", card=self._ref(card), checklist=self._ref(checklist))
+            self._touch(card["idBoard"])
+            return checklist
+
+    def add_check_item(self, checklist_id, name, pos=None, checked=False):
+        with self._lock:
+            checklist = self._get(self.checklists, checklist_id)
+            item = {
+                "id": self.new_id(),
+                "idChecklist": checklist_id,
+                "name": name,
+                "state": "complete" if checked else "incomplete",
+                "pos": self._next_pos(checklist["checkItems"], pos),
+            }
+            checklist["checkItems"].append(item)
+            checklist["checkItems"].sort(key=lambda i: i["pos"])
+            card = self.cards[checklist["idCard"]]
+            card["badges"]["checkItems"] += 1
+            card["badges"]["checkItemsChecked"] += int(checked)
+            self._act(
+                checklist["idBoard"],
+                "createCheckItem",
+                card=self._ref(card),
+                checklist=self._ref(checklist),
+                checkItem=self._ref(item, "state"),
+            )
+            self._touch(checklist["idBoard"])
+            return item
+
+    def seed_board(self, name="ReThread Sprint Board", lists=None, cards=0, short_link=None, members=(), id_organization=None):
+        """Board with the given lists and `cards` synthetic cards spread across them."""
+        with self._lock:
+            board = self.create_board(name, short_link=short_link, id_organization=id_organization)
+            list_objs = [self.create_list(board["id"], n) for n in (lists or DEFAULT_LISTS)]
+            for username in members:
+                member = self.add_member(username)
+                self.board_members[board["id"]].append(member["id"])
+                self._act(board["id"], "addMemberToBoard", idMemberAdded=member["id"])
+            for i in range(cards):
+                # Explicit positions keep seeding linear in the card count.
+                pos = (i // len(list_objs) + 1) * POS_STEP
+                self.create_card(list_objs[i % len(list_objs)]["id"], f"Card {i}", desc=CARD_BODY, pos=pos)
+            return board
+
+    # Views
+
+    def _board_cards(self, board_id, flt="open"):
+        cards = [c for c in self.cards.values() if c["idBoard"] == board_id]
+        if flt == "open":
+            cards = [c for c in cards if not c["closed"]]
+        elif flt == "closed":
+            cards = [c for c in cards if c["closed"]]
+        list_pos = {lid: lst["pos"] for lid, lst in self.lists.items()}
+        return sorted(cards, key=lambda c: (list_pos.get(c["idList"], 0), c["pos"]))
+
+    def _board_lists(self, board_id, flt="open"):
+        lists = [lst for lst in self.lists.values() if lst["idBoard"] == board_id]
+        if flt == "open":
+            lists = [lst for lst in lists if not lst["closed"]]
+        return self._ordered(lists)
+
+    def _board_view(self, board, q):
+        out = _project(board, q.get("fields"))
+        board_id = board["id"]
+        if q.get("lists", "none") != "none":
+            out["lists"] = [_project(lst, q.get("list_fields")) for lst in self._board_lists(board_id, q["lists"])]
+        if q.get("cards", "none") != "none":
+            out["cards"] = [_project(c, q.get("card_fields")) for c in self._board_cards(board_id, q["cards"])]
+        if q.get("labels", "none") != "none":
+            out["labels"] = [_project(lb, q.get("label_fields")) for lb in self.labels.values() if lb["idBoard"] == board_id]
+        if q.get("members", "none") != "none":
+            out["members"] = [_project(self.members[m], q.get("member_fields")) for m in self.board_members[board_id]]
+        if q.get("checklists", "none") != "none":
+            out["checklists"] = [
+                self._checklist_view(cl, q.get("checklist_fields"), q.get("checkItem_fields"))
+                for cl in self.checklists.values()
+                if cl["idBoard"] == board_id
+            ]
+        return out
+
+    def _checklist_view(self, checklist, fields, item_fields):
+        out = _project(checklist, fields)
+        out["checkItems"] = [_project(item, item_fields) for item in checklist["checkItems"]]
+        return out
+
+    # Routing
+
+    def handle(self, method, path, q):
+        """Dispatch one API call; q merges query params and JSON body. Returns the JSON payload."""
+        for route_method, pattern, fn in self._routes():
+            if route_method != method:
+                continue
+            m = re.fullmatch(pattern, path)
+            if m:
+                with self._lock:
+                    return fn(q, *m.groups())
+        raise FakeError(404, f"Cannot {method} {path}")
+
+    def _routes(self):
+        return [
+            ("GET", r"/batch", self._r_batch),
+            ("GET", r"/members/me", self._r_me),
+            ("GET", r"/members/me/boards", self._r_my_boards),
+            ("GET", r"/organizations/([^/]+)/boards", self._r_org_boards),
+            ("POST", r"/boards/?", self._r_create_board),
+            ("GET", r"/boards/([^/]+)", self._r_board),
+            ("GET", r"/boards/([^/]+)/lists", self._r_board_lists),
+            ("POST", r"/boards/([^/]+)/lists", self._r_create_list),
+            ("GET", r"/boards/([^/]+)/cards", self._r_board_cards),
+            ("GET", r"/boards/([^/]+)/labels", self._r_board_labels),
+            ("POST", r"/boards/([^/]+)/labels", self._r_create_board_label),
+            ("GET", r"/boards/([^/]+)/members", self._r_board_members),
+            ("GET", r"/boards/([^/]+)/checklists", self._r_board_checklists),
+            ("GET", r"/boards/([^/]+)/actions", self._r_board_actions),
+            ("POST", r"/labels", self._r_create_label),
+            ("DELETE", r"/labels/([^/]+)", self._r_delete_label),
+            ("GET", r"/lists/([^/]+)/cards", self._r_list_cards),
+            ("POST", r"/lists/([^/]+)/moveAllCards", self._r_move_all),
+            ("POST", r"/lists/([^/]+)/archiveAllCards", self._r_archive_all),
+            ("PUT", r"/lists/([^/]+)", self._r_update_list),
+            ("POST", r"/cards", self._r_create_card),
+            ("GET", r"/cards/([^/]+)", self._r_card),
+            ("PUT", r"/cards/([^/]+)", self._r_update_card),
+            ("DELETE", r"/cards/([^/]+)", self._r_delete_card),
+            ("POST", r"/cards/([^/]+)/idLabels", self._r_card_add_label),
+            ("DELETE", r"/cards/([^/]+)/idLabels/([^/]+)", self._r_card_remove_label),
+            ("POST", r"/cards/([^/]+)/idMembers", self._r_card_add_member),
+            ("GET", r"/cards/([^/]+)/checklists", self._r_card_checklists),
+            ("POST", r"/checklists", self._r_create_checklist),
+            ("DELETE", r"/checklists/([^/]+)", self._r_delete_checklist),
+            ("POST", r"/checklists/([^/]+)/checkItems", self._r_add_check_item),
+            ("POST", r"/webhooks/?", self._r_create_webhook),
+            ("DELETE", r"/webhooks/([^/]+)", self._r_delete_webhook),
+            ("GET", r"/tokens/([^/]+)/webhooks", self._r_token_webhooks),
+        ]
+
+    def _r_batch(self, q):
+        urls = [url for url in q.get("urls", "").split(",") if url]
+        if not urls or len(urls) > BATCH_LIMIT:
+            raise FakeError(400, "invalid value for urls")
+        replies = []
+        for url in urls:
+            parts = urlsplit(url)
+            try:
+                payload = self.handle("GET", parts.path, dict(parse_qsl(parts.query, keep_blank_values=True)))
+            except FakeError as e:
+                replies.append({"name": "Error", "message": e.message, "statusCode": e.status})
+            else:
+                replies.append({"200": payload})
+        return replies
+
+    def _r_me(self, q):
+        return _project(self.members[ME_ID], q.get("fields"))
+
+    def _r_my_boards(self, q):
+        return [_project(b, q.get("fields")) for b in self.boards.values() if ME_ID in self.board_members[b["id"]]]
+
+    def _r_org_boards(self, q, org_id):
+        boards = [b for b in self.boards.values() if b["idOrganization"] == org_id]
+        if q.get("filter", "all") == "open":
+            boards = [b for b in boards if not b["closed"]]
+        return [_project(b, q.get("fields")) for b in boards]
+
+    def _r_create_board(self, q):
+        if not q.get("name"):
+            raise FakeError(400, "invalid value for name")
+        if q.get("idBoardSource"):
+            keep_cards = q.get("keepFromSource", "none") == "cards"
+            return self.copy_board(q["idBoardSource"], q["name"], keep_cards, id_organization=q.get("idOrganization"))
+        board = self.create_board(q["name"], id_organization=q.get("idOrganization"))
+        if q.get("defaultLists", "true") != "false":
+            for name in ("To Do", "Doing", "Done"):
+                self.create_list(board["id"], name)
+        return board
+
+    def _r_board(self, q, ref):
+        return self._board_view(self._board(ref), q)
+
+    def _r_board_lists(self, q, ref):
+        board = self._board(ref)
+        return [_project(lst, q.get("fields")) for lst in self._board_lists(board["id"], q.get("filter", "open"))]
+
+    def _r_create_list(self, q, ref):
+        return self.create_list(self._board(ref)["id"], q.get("name", ""), q.get("pos"))
+
+    def _r_board_cards(self, q, ref):
+        board = self._board(ref)
+        cards = self._board_cards(board["id"], q.get("filter", "open"))
+        if any(k in q for k in ("limit", "before", "since")):
+            # Trello's paging: newest first (ids sort by creation), `before`/`since` are card-id cursors.
+            limit = int(q.get("limit", CARD_LIMIT_MAX))
+            if not 1 <= limit <= CARD_LIMIT_MAX:
+                raise FakeError(400, "invalid value for limit")
+            cards = sorted(cards, key=lambda c: c["id"], reverse=True)
+            if q.get("before"):
+                cards = [c for c in cards if c["id"] < q["before"]]
+            if q.get("since"):
+                cards = [c for c in cards if c["id"] > q["since"]]
+            cards = cards[:limit]
+        return [_project(c, q.get("fields")) for c in cards]
+
+    def _r_board_labels(self, q, ref):
+        board = self._board(ref)
+        return [_project(lb, q.get("fields")) for lb in self.labels.values() if lb["idBoard"] == board["id"]]
+
+    def _r_create_board_label(self, q, ref):
+        return self.create_label(self._board(ref)["id"], q.get("name", ""), q.get("color"))
+
+    def _r_board_members(self, q, ref):
+        board = self._board(ref)
+        return [_project(self.members[m], q.get("fields")) for m in self.board_members[board["id"]]]
+
+    def _r_board_checklists(self, q, ref):
+        board = self._board(ref)
+        return [
+            self._checklist_view(cl, q.get("fields"), q.get("checkItem_fields"))
+            for cl in self.checklists.values()
+            if cl["idBoard"] == board["id"]
+        ]
+
+    def _r_board_actions(self, q, ref):
+        """Newest first; `since`/`before` are action-id cursors, `filter` a comma list of types."""
+        board = self._board(ref)
+        limit = int(q.get("limit", 50))
+        if not 0 <= limit <= ACTION_LIMIT_MAX:
+            raise FakeError(400, "invalid value for limit")
+        types = None if q.get("filter", "all") == "all" else set(q["filter"].split(","))
+        out = []
+        for action in reversed(self.actions):
+            if len(out) >= limit:
+                break
+            if q.get("since") and action["id"] <= q["since"]:
+                break
+            if action["data"]["board"]["id"] != board["id"] or (types and action["type"] not in types):
+                continue
+            if q.get("before") and action["id"] >= q["before"]:
+                continue
+            out.append(_project(action, q.get("fields")))
+        return out
+
+    def _r_create_label(self, q):
+        return self.create_label(self._board(q.get("idBoard", ""))["id"], q.get("name", ""), q.get("color"))
+
+    def _r_delete_label(self, q, label_id):
+        label = self.labels.pop(label_id, None)
+        if not label:
+            raise _not_found()
+        for card in self.cards.values():
+            if label_id in card["idLabels"]:
+                card["idLabels"].remove(label_id)
+        self._act(label["idBoard"], "deleteLabel", label={"id": label_id})
+        self._touch(label["idBoard"])
+        return {}
+
+    def _r_list_cards(self, q, list_id):
+        self._get(self.lists, list_id)
+        cards = [c for c in self.cards.values() if c["idList"] == list_id and not c["closed"]]
+        return [_project(c, q.get("fields")) for c in self._ordered(cards)]
+
+    def _r_move_all(self, q, list_id):
+        source = self._get(self.lists, list_id)
+        target = self._get(self.lists, q.get("idList", ""))
+        if target["idBoard"] != q.get("idBoard", target["idBoard"]):
+            raise FakeError(400, "invalid value for idBoard")
+        moved = []
+        base = max((c["pos"] for c in self.cards.values() if c["idList"] == target["id"] and not c["closed"]), default=0)
+        for card in self._ordered([c for c in self.cards.values() if c["idList"] == list_id and not c["closed"]]):
+            base += POS_STEP
+            card.update(idList=target["id"], idBoard=target["idBoard"], pos=base)
+            self._act(
+                target["idBoard"],
+                "updateCard",
+                card={**self._ref(card), "idList": target["id"], "pos": base},
+                old={"idList": list_id},
+                listBefore=self._ref(source),
+                listAfter=self._ref(target),
+            )
+            moved.append(card)
+        self._touch(source["idBoard"])
+        return moved
+
+    def _r_archive_all(self, q, list_id):
+        lst = self._get(self.lists, list_id)
+        for card in self.cards.values():
+            if card["idList"] == list_id and not card["closed"]:
+                card["closed"] = True
+                self._act(lst["idBoard"], "updateCard", card={**self._ref(card), "closed": True}, old={"closed": False})
+        self._touch(lst["idBoard"])
+        return {}
+
+    def _r_update_list(self, q, list_id):
+        lst = self._get(self.lists, list_id)
+        before = dict(lst)
+        if "name" in q:
+            lst["name"] = q["name"]
+        if "closed" in q:
+            lst["closed"] = _flag(q["closed"])
+        if "pos" in q:
+            lst["pos"] = self._next_pos([x for x in self.lists.values() if x["idBoard"] == lst["idBoard"] and x is not lst], q["pos"])
+        changed = [k for k in ("name", "closed", "pos") if lst[k] != before[k]]
+        if changed:
+            self._act(
+                lst["idBoard"],
+                "updateList",
+                list={**self._ref(lst), **{k: lst[k] for k in changed}},
+                old={k: before[k] for k in changed},
+            )
+        self._touch(lst["idBoard"])
+        return lst
+
+    def _r_create_card(self, q):
+        if not q.get("idList"):
+            raise FakeError(400, "invalid value for idList")
+        ids = lambda v: [x for x in (v.split(",") if isinstance(v, str) else v or []) if x]
+        return self.create_card(
+            q["idList"],
+            q.get("name", ""),
+            desc=q.get("desc", ""),
+            pos=q.get("pos"),
+            due=q.get("due"),
+            id_labels=ids(q.get("idLabels")),
+            id_members=ids(q.get("idMembers")),
+        )
+
+    def _r_card(self, q, card_id):
+        return _project(self._get(self.cards, card_id), q.get("fields"))
+
+    def _r_update_card(self, q, card_id):
+        card = self._get(self.cards, card_id)
+        before = {k: (list(v) if isinstance(v, list) else v) for k, v in card.items()}
+        if "idList" in q:
+            target = self._get(self.lists, q["idList"])
+            card["idList"] = target["id"]
+            if "pos" not in q:
+                siblings = (c for c in self.cards.values() if c["idList"] == target["id"] and c is not card and not c["closed"])
+                card["pos"] = self._next_pos(siblings, "bottom")
+        if "pos" in q:
+            siblings = (c for c in self.cards.values() if c["idList"] == card["idList"] and c is not card and not c["closed"])
+            card["pos"] = self._next_pos(siblings, q["pos"])
+        for key in ("name", "desc", "due"):
+            if key in q:
+                card[key] = q[key]
+        if "closed" in q:
+            card["closed"] = _flag(q["closed"])
+        for key in ("idLabels", "idMembers"):
+            if key in q:
+                value = q[key]
+                card[key] = [x for x in (value.split(",") if isinstance(value, str) else value or []) if x]
+        changed = [k for k in ("idList", "pos", "name", "desc", "due", "closed") if card[k] != before[k]]
+        if changed:
+            extra = {}
+            if "idList" in changed:
+                extra = dict(
+                    listBefore=self._ref(self.lists[before["idList"]]), listAfter=self._ref(self.lists[card["idList"]])
+                )
+            self._act(
+                card["idBoard"],
+                "updateCard",
+                card={**self._ref(card), **{k: card[k] for k in changed}},
+                old={k: before[k] for k in changed},
+                **extra,
+            )
+        for value in set(card["idLabels"]) ^ set(before["idLabels"]):
+            kind = "addLabelToCard" if value in card["idLabels"] else "removeLabelFromCard"
+            label = self._ref(self.labels.get(value, {"id": value}), "color")
+            self._act(card["idBoard"], kind, card=self._ref(card), label=label)
+        for value in set(card["idMembers"]) ^ set(before["idMembers"]):
+            kind = "addMemberToCard" if value in card["idMembers"] else "removeMemberFromCard"
+            self._act(card["idBoard"], kind, card=self._ref(card), idMember=value)
+        card["dateLastActivity"] = self._now()
+        self._touch(card["idBoard"])
+        return card
+
+    def _r_delete_card(self, q, card_id):
+        card = self.cards.pop(card_id, None)
+        if not card:
+            raise _not_found()
+        for cl_id in card["idChecklists"]:
+            self.checklists.pop(cl_id, None)
+        self._act(card["idBoard"], "deleteCard", card={"id": card_id}, list={"id": card["idList"]})
+        self._touch(card["idBoard"])
+        return {"limits": {}}
+
+    def _r_card_add_label(self, q, card_id):
+        card = self._get(self.cards, card_id)
+        label = self._get(self.labels, q.get("value", ""))
+        if label["id"] in card["idLabels"]:
+            raise FakeError(400, "that label is already on the card")
+        card["idLabels"].append(label["id"])
+        self._act(card["idBoard"], "addLabelToCard", card=self._ref(card), label=self._ref(label, "color"))
+        self._touch(card["idBoard"])
+        return list(card["idLabels"])
+
+    def _r_card_remove_label(self, q, card_id, label_id):
+        card = self._get(self.cards, card_id)
+        if label_id not in card["idLabels"]:
+            raise FakeError(400, "that label is not on the card")
+        card["idLabels"].remove(label_id)
+        label = self.labels.get(label_id, {"id": label_id})
+        self._act(card["idBoard"], "removeLabelFromCard", card=self._ref(card), label=self._ref(label, "color"))
+        self._touch(card["idBoard"])
+        return list(card["idLabels"])
+
+    def _r_card_add_member(self, q, card_id):
+        card = self._get(self.cards, card_id)
+        member_id = q.get("value", "")
+        if member_id not in self.members:
+            raise FakeError(400, "invalid value for value")
+        if member_id in card["idMembers"]:
+            raise FakeError(400, "member is already on the card")
+        card["idMembers"].append(member_id)
+        self._act(card["idBoard"], "addMemberToCard", card=self._ref(card), idMember=member_id)
+        self._touch(card["idBoard"])
+        return [self.members[m] for m in card["idMembers"]]
+
+    def _r_card_checklists(self, q, card_id):
+        card = self._get(self.cards, card_id)
+        return [self.checklists[c] for c in card["idChecklists"] if c in self.checklists]
+
+    def _r_create_checklist(self, q):
+        return self.create_checklist(q.get("idCard", ""), q.get("name", "Checklist"))
+
+    def _r_delete_checklist(self, q, checklist_id):
+        checklist = self.checklists.pop(checklist_id, None)
+        if not checklist:
+            raise _not_found()
+        card = self.cards.get(checklist["idCard"])
+        if card:
+            card["idChecklists"].remove(checklist_id)
+            card["badges"]["checkItems"] -= len(checklist["checkItems"])
+            self._act(checklist["idBoard"], "removeChecklistFromCard", card=self._ref(card), checklist=self._ref(checklist))
+        self._touch(checklist["idBoard"])
+        return {"limits": {}}
+
+    def _r_add_check_item(self, q, checklist_id):
+        return self.add_check_item(checklist_id, q.get("name", ""), q.get("pos"), _flag(q.get("checked", False)))
+
+    def _r_create_webhook(self, q):
+        """Like Trello: the callback URL must answer a HEAD with 200 before the webhook exists."""
+        model, url = q.get("idModel", ""), q.get("callbackURL", "")
+        board = self._board(model)
+        if any(h["idModel"] == board["id"] and h["callbackURL"] == url for h in self.webhooks.values()):
+            raise FakeError(400, "A webhook with that callback, model, and token already exists")
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, method="HEAD"), timeout=5) as r:
+                ok = r.status == 200
+        except (OSError, ValueError):
+            ok = False
+        if not ok:
+            raise FakeError(400, f"URL ({url}) did not return 200 status code")
+        hook = {"id": self.new_id(), "idModel": board["id"], "callbackURL": url, "description": q.get("description", ""), "active": True}
+        self.webhooks[hook["id"]] = hook
+        return hook
+
+    def _r_delete_webhook(self, q, webhook_id):
+        if not self.webhooks.pop(webhook_id, None):
+            raise _not_found()
+        return {}
+
+    def _r_token_webhooks(self, q, token):
+        return [_project(h, q.get("fields")) for h in self.webhooks.values()]
+
+
+class _Window:
+    """Sliding request window standing in for one of Trello's rate limits."""
+
+    def __init__(self, capacity, interval):
+        self.capacity = capacity
+        self.interval = interval
+        self.hits = deque()
+
+    def hit(self, now):
+        while self.hits and now - self.hits[0] >= self.interval:
+            self.hits.popleft()
+        if len(self.hits) >= self.capacity:
+            return False
+        self.hits.append(now)
+        return True
+
+    def remaining(self):
+        return max(0, self.capacity - len(self.hits))
+
+
+class FakeTrelloServer:
+    """FakeTrello on a localhost port. Use as a context manager or start()/stop()."""
+
+    def __init__(
+        self,
+        state=None,
+        host="127.0.0.1",
+        port=0,
+        latency=0.0,
+        key_limit=TRELLO_KEY_LIMIT,
+        token_limit=TRELLO_TOKEN_LIMIT,
+        enforce_limits=True,
+        inject_429=0.0,
+        webhook_secret=FAKE_SECRET,
+    ):
+        self.state = state or FakeTrello()
+        self.webhook_secret = webhook_secret
+        self.latency = latency
+        self.enforce_limits = enforce_limits
+        self.inject_429 = inject_429
+        self._key_limit = key_limit
+        self._token_limit = token_limit
+        self._windows = {}
+        self._lock = threading.Lock()
+        self.stats = Counter()
+        self.routes = Counter()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+        self._stopping = threading.Event()
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        threading.Thread(target=self._deliver_webhooks, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stopping.set()
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _deliver_webhooks(self):
+        """POST each action to its webhook's callback, signed like Trello's X-Trello-Webhook."""
+        while not self._stopping.is_set():
+            try:
+                hook, action = self.state.outbox.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            body = json.dumps({"action": action, "model": {"id": hook["idModel"]}, "webhook": hook}).encode("utf-8")
+            request = urllib.request.Request(
+                hook["callbackURL"],
+                data=body,
+                method="POST",
+                headers={"Content-Type": "application/json", "X-Trello-Webhook": sign(self.webhook_secret, body, hook["callbackURL"])},
+            )
+            try:
+                urllib.request.urlopen(request, timeout=5).close()
+                outcome = "webhooks_delivered"
+            except OSError:
+                outcome = "webhooks_failed"
+            with self._lock:
+                self.stats[outcome] += 1
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats.clear()
+            self.routes.clear()
+
+    def _admit(self, key, token):
+        """Returns (error body or None, rate-limit headers) for one request against both windows."""
+        now = time.monotonic()
+        with self._lock:
+            key_w = self._windows.setdefault(("key", key), _Window(*self._key_limit))
+            token_w = self._windows.setdefault(("token", token), _Window(*self._token_limit))
+            error = None
+            if self.inject_429 and random.random() < self.inject_429:
+                error = "API_TOKEN_LIMIT_EXCEEDED"
+            elif self.enforce_limits:
+                if not key_w.hit(now):
+                    error = "API_KEY_LIMIT_EXCEEDED"
+                elif not token_w.hit(now):
+                    key_w.hits.pop()
+                    error = "API_TOKEN_LIMIT_EXCEEDED"
+            headers = {}
+            for scope, w in (("key", key_w), ("token", token_w)):
+                headers[f"x-rate-limit-api-{scope}-interval-ms"] = str(int(w.interval * 1000))
+                headers[f"x-rate-limit-api-{scope}-max"] = str(w.capacity)
+                headers[f"x-rate-limit-api-{scope}-remaining"] = str(w.remaining())
+            return error, headers
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, payload, headers=None, raw=None):
+                body = raw if raw is not None else json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json" if raw is None else "text/plain")
+                self.send_header("Content-Length", str(len(body)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(body)
+                with server._lock:
+                    server.stats["bytes_out"] += len(body)
+                    if status == 429:
+                        server.stats["throttled"] += 1
+
+            def _dispatch(self, method):
+                url = urlsplit(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                raw_body = self.rfile.read(length) if length else b""
+                q = dict(parse_qsl(url.query, keep_blank_values=True))
+                if raw_body:
+                    try:
+                        body = json.loads(raw_body)
+                    except ValueError:
+                        body = dict(parse_qsl(raw_body.decode("utf-8")))
+                    if isinstance(body, dict):
+                        q.update(body)
+                path = url.path
+                if path.startswith("/_fake/"):
+                    return self._control(method, path[len("/_fake/"):], q)
+                if not path.startswith("/1/"):
+                    return self._send(404, None, raw=b"Not found")
+                path = path[2:]
+                with server._lock:
+                    server.stats["requests"] += 1
+                    server.stats["bytes_in"] += len(self.path) + len(raw_body)
+                    server.routes[f"{method} {route_template(path)}"] += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                error, headers = server._admit(q.pop("key", ""), q.pop("token", ""))
+                if error:
+                    return self._send(429, None, headers, raw=error.encode())
+                try:
+                    payload = server.state.handle(method, path, q)
+                except FakeError as e:
+                    return self._send(e.status, None, headers, raw=e.message.encode())
+                self._send(200, payload, headers)
+
+            def _control(self, method, action, q):
+                if action == "stats":
+                    with server._lock:
+                        return self._send(200, {**server.stats, "routes": dict(server.routes)})
+                if action == "reset" and method == "POST":
+                    server.reset_stats()
+                    return self._send(200, {})
+                if action == "seed" and method == "POST":
+                    board = server.state.seed_board(
+                        q.get("name", "ReThread Sprint Board"),
+                        lists=q.get("lists"),
+                        cards=int(q.get("cards", 0)),
+                        short_link=q.get("shortLink"),
+                        members=q.get("members", ()),
+                    )
+                    return self._send(200, board)
+                self._send(404, None, raw=b"Unknown control route")
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+            def do_PUT(self):
+                self._dispatch("PUT")
+
+            def do_DELETE(self):
+                self._dispatch("DELETE")
+
+            def do_HEAD(self):
+                self._dispatch("HEAD")
+
+        return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a fake Trello API on localhost.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added to every API call.")
+    parser.add_argument("--inject-429", type=float, default=0.0, help="Fraction of calls to reject with 429.")
+    parser.add_argument("--no-limits", action="store_true", help="Don't enforce the 300/10s key and 100/10s token windows.")
+    parser.add_argument("--seed-cards", type=int, default=None, help="Seed a 'ReThread Sprint Board' with this many cards.")
+    parser.add_argument("--short-link", default=None, help="shortLink for the seeded board.")
+    args = parser.parse_args(argv)
+
+    server = FakeTrelloServer(
+        host=args.host,
+        port=args.port,
+        latency=args.latency_ms / 1000.0,
+        enforce_limits=not args.no_limits,
+        inject_429=args.inject_429,
+    )
+    if args.seed_cards is not None:
+        board = server.state.seed_board(cards=args.seed_cards, short_link=args.short_link)
+        print(f"Seeded board {board['shortLink']} ({board['id']}) with {args.seed_cards} cards")
+    print(f"Fake Trello at {server.url}  (TRELLO_BASE_URL={server.url})")
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,311 @@
+"""
+Bounded concurrent fan-out for board seeding.
+
+FanOut is a thread pool whose worker count is the in-flight request limit. Tasks
+may submit follow-up tasks (a card's checklist items once its checklist id is
+known) without blocking a worker, and wait() returns only when the whole tree of
+work has drained.
+
+seed_cards() is the card + checklist pipeline built on it: every card is created
+in parallel, and each card's check items go up concurrently as soon as its
+checklist exists. Ordering never depends on arrival order: check items carry an
+explicit numeric pos, and cards that share a list with "top"/"bottom" siblings
+get numeric positions computed up front.
+
+Given an IdempotencyIndex, specs with a source `key` are looked up first:
+unchanged cards are skipped, changed ones updated in place, and cards whose
+checklist never finished (an interrupted run) get it rebuilt, so re-running a
+seeding script never duplicates cards.
+"""
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+
+import requests
+
+from . import tracing
+from .client import TrelloError
+from .idempotency import content_hash
+from .render import same_desc
+
+DEFAULT_MAX_IN_FLIGHT = 16
+
+# Trello's own spacing between consecutive positions.
+POS_STEP = 65536
+
+# What a seeding step records on its result instead of raising: Trello's answer, or no answer at all.
+SEED_FAILURES = (TrelloError, requests.RequestException)
+
+
+class FanOut:
+    def __init__(self, max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+        self._pool = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="trello-fanout")
+        self._cond = threading.Condition()
+        self._pending = 0
+
+    def submit(self, fn, *args, **kwargs):
+        """Run fn in a worker, in a copy of the caller's context (so tracing phases carry over)."""
+        with self._cond:
+            self._pending += 1
+        future = self._pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+        future.add_done_callback(self._task_done)
+        return future
+
+    def _task_done(self, _future):
+        with self._cond:
+            self._pending -= 1
+            self._cond.notify_all()
+
+    def wait(self):
+        """Block until every submitted task, including ones submitted by tasks, has finished."""
+        with self._cond:
+            while self._pending:
+                self._cond.wait()
+
+    def close(self):
+        self.wait()
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+@dataclass
+class CardSpec:
+    """One card to create. Labels and members go on the create call itself."""
+
+    list_id: str
+    name: str
+    desc: str = ""
+    pos: object = "bottom"
+    due: str = None
+    label_ids: list = field(default_factory=list)
+    member_ids: list = field(default_factory=list)
+    checklist: list = field(default_factory=list)
+    checklist_name: str = "Checklist"
+    key: str = None
+
+    def content_hash(self):
+        """What the card was built from. Placement, labels and members are left to the board's users."""
+        return content_hash([self.name, self.desc, self.due, self.checklist_name, self.checklist])
+
+
+@dataclass
+class SeedResult:
+    """Once seed_cards() returns, either `card` or `error` is set."""
+
+    spec: CardSpec
+    card: dict = None
+    error: TrelloError = None
+    checklist_errors: list = field(default_factory=list)
+    # created | updated | resumed | skipped
+    action: str = "created"
+    pending_items: int = 0
+
+    @property
+    def ok(self):
+        return self.card is not None
+
+
+def checklist_labels(items):
+    """sprint_process.json checklist entries are {"id", "label"} dicts or plain strings."""
+    return [item.get("label", item) if isinstance(item, dict) else item for item in items]
+
+
+def _assign_positions(client, specs, existing_positions):
+    """Replace "top"/"bottom" with numeric positions wherever several specs share a list.
+
+    existing_positions (list id -> card positions, e.g. from a board snapshot) saves
+    the per-list position reads.
+    """
+    by_list = {}
+    for i, spec in enumerate(specs):
+        if spec.pos in ("top", "bottom"):
+            by_list.setdefault(spec.list_id, []).append(i)
+    crowded = {list_id: idxs for list_id, idxs in by_list.items() if len(idxs) > 1}
+    if not crowded:
+        return specs
+    existing_positions = existing_positions or {}
+    unknown = [list_id for list_id in crowded if list_id not in existing_positions]
+    reads = client.get_batch([(f"/lists/{list_id}/cards", {"fields": "pos"}) for list_id in unknown], return_errors=True)
+    fetched = dict(zip(unknown, reads))
+
+    specs = list(specs)
+    for list_id, idxs in crowded.items():
+        if list_id in existing_positions:
+            positions = existing_positions[list_id]
+        else:
+            cards = fetched[list_id]
+            positions = [] if isinstance(cards, TrelloError) else [c["pos"] for c in cards]
+        low = min(positions, default=POS_STEP)
+        high = max(positions, default=0)
+        tops = [i for i in idxs if specs[i].pos == "top"]
+        bottoms = [i for i in idxs if specs[i].pos == "bottom"]
+        # Same final order as creating them one by one: each later "top" lands above the previous one.
+        for k, i in enumerate(tops):
+            specs[i] = replace(specs[i], pos=low * (len(tops) - k) / (len(tops) + 1))
+        for k, i in enumerate(bottoms):
+            specs[i] = replace(specs[i], pos=high + POS_STEP * (k + 1))
+    return specs
+
+
+def _as_error(e, method, path):
+    """Any seeding failure as a TrelloError (status 0 when Trello never answered), so results always carry .text."""
+    return e if isinstance(e, TrelloError) else TrelloError(method, path, 0, f"{type(e).__name__}: {e}")
+
+
+def _by_pos(items):
+    return sorted(items or (), key=lambda item: item.get("pos", 0))
+
+
+class _Seeder:
+    def __init__(self, client, fanout, index, board_id):
+        self.client = client
+        self.fanout = fanout
+        self.index = index
+        self.board_id = board_id
+        self._lock = threading.Lock()
+
+    def _record(self, result, complete):
+        if self.index and result.spec.key:
+            self.index.record(self.board_id, result.spec.key, result.card["id"], result.spec.content_hash(), complete)
+
+    def _add_item(self, result, checklist_id, label, pos, checked):
+        try:
+            self.client.add_check_item(checklist_id, label, pos=pos, checked=checked)
+        except SEED_FAILURES as e:
+            result.checklist_errors.append(_as_error(e, "POST", f"/checklists/{checklist_id}/checkItems"))
+        with self._lock:
+            result.pending_items -= 1
+            last = result.pending_items == 0
+        if last and not result.checklist_errors:
+            self._record(result, True)
+
+    def _build_checklist(self, result, checked=frozenset()):
+        """The spec's checklist on the new card; items named in `checked` start ticked."""
+        spec = result.spec
+        if not spec.checklist:
+            self._record(result, True)
+            return
+        try:
+            checklist = self.client.create_checklist(result.card["id"], spec.checklist_name)
+        except SEED_FAILURES as e:
+            result.checklist_errors.append(_as_error(e, "POST", "/checklists"))
+            return
+        result.pending_items = len(spec.checklist)
+        for k, label in enumerate(spec.checklist):
+            self.fanout.submit(self._add_item, result, checklist["id"], label, k + 1, label in checked)
+
+    def create(self, result):
+        spec = result.spec
+        fields = {"desc": spec.desc, "pos": spec.pos}
+        if spec.due:
+            fields["due"] = spec.due
+        if spec.label_ids:
+            fields["idLabels"] = spec.label_ids
+        if spec.member_ids:
+            fields["idMembers"] = spec.member_ids
+        try:
+            result.card = self.client.create_card(spec.list_id, spec.name, **fields)
+        except SEED_FAILURES as e:
+            result.error = _as_error(e, "POST", "/cards")
+            return
+        # Recorded before the checklist so an interrupted run resumes this card instead of duplicating it.
+        self._record(result, False)
+        self._build_checklist(result)
+
+    def refresh(self, result, entry, current):
+        """Bring an indexed card up to date (changed content) or finish its checklist (interrupted run).
+
+        current is the card's name/desc/due as on the board (or the TrelloError reading it);
+        only fields that differ are PUT, so a card that already matches costs no write.
+        The checklist is left as it is, ticks included, unless its name or items
+        changed or it was never finished; a rebuilt one keeps the ticks of items whose
+        name is unchanged.
+        """
+        spec = result.spec
+        try:
+            if isinstance(current, TrelloError):
+                raise current
+            fields = {}
+            if entry.content_hash != spec.content_hash():
+                if current.get("name") != spec.name:
+                    fields["name"] = spec.name
+                if not same_desc(spec.desc, current.get("desc")):
+                    fields["desc"] = spec.desc
+                if spec.due and current.get("due") != spec.due:
+                    fields["due"] = spec.due
+            result.card = self.client.update_card(entry.card_id, **fields) if fields else {"id": entry.card_id}
+            checklists = [
+                checklist
+                for checklist in self.client.get(
+                    f"/cards/{entry.card_id}/checklists", fields="name", checkItem_fields="name,state,pos"
+                )
+                if checklist["name"] == spec.checklist_name
+            ]
+            items = [[item["name"] for item in _by_pos(cl.get("checkItems"))] for cl in checklists]
+            if entry.complete and items == ([list(spec.checklist)] if spec.checklist else []):
+                self._record(result, True)
+                return
+            checked = {
+                item["name"] for cl in checklists for item in cl.get("checkItems") or () if item.get("state") == "complete"
+            }
+            for checklist in checklists:
+                self.client.delete(f"/checklists/{checklist['id']}")
+        except TrelloError as e:
+            if e.status_code != 404:
+                result.error = e
+                return
+            # Deleted on the board since it was indexed: start over.
+            self.index.forget(self.board_id, spec.key)
+            result.action = "created"
+            self.create(result)
+            return
+        except requests.RequestException as e:
+            result.error = _as_error(e, "GET", f"/cards/{entry.card_id}")
+            return
+        self._build_checklist(result, checked)
+
+
+def seed_cards(client, specs, max_in_flight=DEFAULT_MAX_IN_FLIGHT, existing_positions=None, index=None, board_id=None):
+    """Create all cards (and their checklists) concurrently. Returns SeedResults in spec order.
+
+    With an IdempotencyIndex (and the board's id), specs that carry a `key` are
+    skipped, updated or resumed instead of created again.
+    """
+    results = [SeedResult(spec) for spec in specs]
+    refresh = []
+    for result in results:
+        entry = index.get(board_id, result.spec.key) if index and result.spec.key else None
+        if entry is None:
+            continue
+        if entry.complete and entry.content_hash == result.spec.content_hash():
+            result.card = {"id": entry.card_id}
+            result.action = "skipped"
+        else:
+            result.action = "updated" if entry.complete else "resumed"
+            refresh.append((result, entry))
+    to_create = [r for r in results if r.action == "created"]
+
+    with tracing.phase("seed"), FanOut(max_in_flight) as fanout:
+        seeder = _Seeder(client, fanout, index, board_id)
+        placed = _assign_positions(client, [r.spec for r in to_create], existing_positions)
+        for result, spec in zip(to_create, placed):
+            result.spec = spec
+            fanout.submit(seeder.create, result)
+        # What the cards to refresh look like now, in /batch calls, so unchanged fields aren't rewritten.
+        current = client.get_batch(
+            [(f"/cards/{entry.card_id}", {"fields": "name,desc,due"}) for _, entry in refresh], return_errors=True
+        )
+        for (result, entry), card in zip(refresh, current):
+            fanout.submit(seeder.refresh, result, entry, card)
+        fanout.wait()
+    for result in results:
+        if result.card is None and result.error is None:
+            # A step died on something other than a request failure: still a failed seed, not a silent one.
+            result.error = TrelloError("POST", "/cards", 0, "card was not created")
+    return results
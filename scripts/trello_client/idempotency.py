@@ -0,0 +1,89 @@
+"""
+Persistent source key -> Trello card id index for the seeding scripts.
+
+Each seeded card has a stable source key (a phase id from sprint_process.json, a
+hash of a CARDS entry name, ...). The index remembers which card it became, a
+hash of the content it was created from, and whether its checklist finished.
+seed_cards() consults it per card in O(1): unchanged cards are skipped,
+changed ones are updated in place, and cards whose checklist was cut short by
+an interrupted run are completed instead of duplicated.
+
+Stored as SQLite in .trello_index.sqlite next to secrets.json (TRELLO_STATE_DIR
+moves it).
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+from .state import state_path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cards (
+    board_id TEXT NOT NULL,
+    source_key TEXT NOT NULL,
+    card_id TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    complete INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (board_id, source_key)
+)
+"""
+
+
+def content_hash(value):
+    """Stable short hash of any JSON-serialisable value."""
+    data = json.dumps(value, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha1(data).hexdigest()[:16]
+
+
+@dataclass
+class IndexEntry:
+    card_id: str
+    content_hash: str
+    complete: bool
+
+
+class IdempotencyIndex:
+    def __init__(self, path=None):
+        self.path = path or state_path(".trello_index.sqlite")
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(SCHEMA)
+        self._db.commit()
+
+    def get(self, board_id, source_key):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT card_id, content_hash, complete FROM cards WHERE board_id = ? AND source_key = ?",
+                (board_id, source_key),
+            ).fetchone()
+        return IndexEntry(row[0], row[1], bool(row[2])) if row else None
+
+    def record(self, board_id, source_key, card_id, content_hash, complete):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO cards (board_id, source_key, card_id, content_hash, complete, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (board_id, source_key, card_id, content_hash, int(complete), time.time()),
+            )
+            self._db.commit()
+
+    def forget(self, board_id, source_key):
+        with self._lock:
+            self._db.execute("DELETE FROM cards WHERE board_id = ? AND source_key = ?", (board_id, source_key))
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,96 @@
+"""
+Persistent board name -> id cache for the scripts that find their board by name.
+
+resolve_board() returns TRELLO_BOARD_ID / TRELLO_BOARD_SHORT_LINK if set, else
+the id of the board with the given name. A lookup scans every board the token
+can see (GET /members/me/boards), so the answer, and every other board name in
+the same response, is kept in .trello_cache/ids.json for TRELLO_ID_TTL seconds
+(default a day). A warm start makes no discovery request at all.
+
+Ids can go stale (board deleted, token lost access). When a read of a cached id
+comes back 404, forget_board() drops it and load_snapshot() resolves the name
+again, so the cache heals itself within the same run.
+"""
+import json
+import os
+import threading
+import time
+
+from .client import TrelloError
+from .state import state_path
+
+ID_TTL_ENV = "TRELLO_ID_TTL"
+DEFAULT_ID_TTL = 24 * 3600
+
+_lock = threading.Lock()
+
+
+def _path():
+    return state_path(".trello_cache", "ids.json")
+
+
+def _ttl():
+    try:
+        return float(os.environ.get(ID_TTL_ENV, "") or DEFAULT_ID_TTL)
+    except ValueError:
+        return DEFAULT_ID_TTL
+
+
+def _read():
+    try:
+        with open(_path(), "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return entries if isinstance(entries, dict) else {}
+
+
+def _write(entries):
+    path = _path()
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(entries, f)
+    os.replace(tmp, path)
+
+
+def board_ref_from_env():
+    return os.environ.get("TRELLO_BOARD_ID", "").strip() or os.environ.get("TRELLO_BOARD_SHORT_LINK", "").strip()
+
+
+def resolve_board(client, name, refresh=False):
+    """Board id or shortLink from env, else the id of the board named `name` (cached). None if there is none."""
+    ref = board_ref_from_env()
+    if ref:
+        return ref
+    now = time.time()
+    if not refresh:
+        with _lock:
+            entry = _read().get("boards", {}).get(name)
+        if entry and now - entry["at"] < _ttl():
+            return entry["id"]
+    try:
+        boards = client.get_my_boards(fields="name")
+    except TrelloError:
+        return None
+    found = {}
+    for board in boards:
+        # First board with a name wins, as the name lookups always did.
+        found.setdefault(board["name"], board["id"])
+    with _lock:
+        entries = _read()
+        entries["boards"] = {n: {"id": board_id, "at": now} for n, board_id in found.items()}
+        _write(entries)
+    return found.get(name)
+
+
+def forget_board(board_id):
+    """Drop every cached name that points at board_id. Returns those names."""
+    with _lock:
+        entries = _read()
+        boards = entries.get("boards", {})
+        names = [n for n, entry in boards.items() if entry["id"] == board_id]
+        if names:
+            for n in names:
+                del boards[n]
+            _write(entries)
+    return names
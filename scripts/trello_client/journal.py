@@ -0,0 +1,183 @@
+"""
+Append-only write journal for reconciler runs, so an interrupted migration can resume.
+
+Before apply() sends anything, the journal records the whole plan: one "pending"
+line per operation (kind, target id, payload and its hash) plus the board's list
+and label ids the operations resolve names against. Each operation then appends a
+"done" (with any id it created) or "failed" line as it finishes; a failure that
+still created something (a card whose checklist didn't finish) records its id
+too. Lines are flushed
+as they are written, so after a crash, a network blip or Ctrl-C the file says
+exactly which writes landed.
+
+--resume replays only the operations with no "done" line, without re-reading the
+board. Moves and archives are safe to send twice. So are labels: Trello rejects a
+label the card already has with a 400, which TrelloClient.add_label() takes as
+done. Creates whose outcome is unknown (sent, but no "done" recorded) are checked
+against one name read first so resuming never duplicates a list, label or card;
+a keyed card the IdempotencyIndex has as unfinished is resumed by seed_cards()
+instead, which completes its checklist.
+
+The same file is the run's rollback manifest: landed() lists every write that
+went through (with the ids of what it created), which is what --rollback undoes.
+A rolled-back run gets a "rolled_back" line, so it is neither resumed nor undone
+twice; once a rollback has undone anything ("undone" lines), the run can only be
+rolled back further, not resumed.
+
+One journal per board, in .trello_journal/<board id or shortLink>.jsonl next to secrets.json
+(TRELLO_STATE_DIR moves it). A new run starts the file over; a finished run
+leaves a "complete" line, so there is nothing to resume.
+"""
+import json
+import threading
+import time
+
+from .idempotency import content_hash
+from .state import state_path
+
+
+def journal_path(board_ref):
+    return state_path(".trello_journal", f"{board_ref}.jsonl")
+
+
+class Journal:
+    """Keyed by the board reference the script was given (id or shortLink), so --resume finds it without a read."""
+
+    def __init__(self, board_ref, path=None):
+        self.board_ref = board_ref
+        self.path = path or journal_path(board_ref)
+        self._lock = threading.Lock()
+        self._file = None
+
+    def _write(self, entry):
+        entry["ts"] = round(time.time(), 3)
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def begin(self, board_id, ops, list_ids, label_ids):
+        """Start a new run: truncate the journal and record every planned operation as pending."""
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._write({"status": "begin", "board": board_id, "lists": list_ids, "labels": label_ids})
+        for seq, op in enumerate(ops):
+            self._write(
+                {
+                    "seq": seq,
+                    "status": "pending",
+                    "op": op.kind,
+                    "target": op.target,
+                    "payload": op.payload,
+                    "payload_hash": content_hash(op.payload),
+                    "summary": op.summary,
+                }
+            )
+
+    def reopen(self):
+        """Continue appending to an interrupted run's journal."""
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def done(self, seq, created_id=None):
+        entry = {"seq": seq, "status": "done"}
+        if created_id:
+            entry["id"] = created_id
+        self._write(entry)
+
+    def failed(self, seq, error, created_id=None):
+        """The operation didn't finish. created_id: what it did create (a card whose checklist failed)."""
+        entry = {"seq": seq, "status": "failed", "error": error}
+        if created_id:
+            entry["id"] = created_id
+        self._write(entry)
+
+    def complete(self):
+        self._write({"status": "complete"})
+
+    def undone(self, seq):
+        self._write({"seq": seq, "status": "undone"})
+
+    def rolled_back(self):
+        self._write({"status": "rolled_back"})
+
+    def _entries(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # A line torn by the crash; everything before it is intact.
+                    return
+
+    def load(self):
+        """The interrupted run, or None if there is none or a rollback has started undoing it.
+
+        Returns (board_id, list_ids, label_ids, pending) where list_ids/label_ids
+        include everything the run already created and pending is [(seq, entry)]
+        in plan order.
+        """
+        if not self.path.exists():
+            return None
+        header, planned, finished = None, {}, set()
+        for entry in self._entries():
+            status = entry.get("status")
+            if status == "begin":
+                header = entry
+            elif status in ("complete", "rolled_back", "undone"):
+                # Half rolled back is not resumable: the rest of the plan assumed the writes now undone.
+                return None
+            elif status == "pending":
+                planned[entry["seq"]] = entry
+            elif status == "done":
+                finished.add(entry["seq"])
+                created = planned.get(entry["seq"])
+                if created and created["op"] in ("create_list", "create_label") and entry.get("id"):
+                    ids = header["lists"] if created["op"] == "create_list" else header["labels"]
+                    ids[created["target"]] = entry["id"]
+        if header is None:
+            return None
+        pending = [(seq, entry) for seq, entry in sorted(planned.items()) if seq not in finished]
+        return header["board"], header["lists"], header["labels"], pending
+
+    def landed(self):
+        """The last run's writes that went through and aren't undone yet, or None if there is no run or it was rolled back.
+
+        Returns (board_id, label_ids, landed) where label_ids include labels the run
+        created and landed is [(seq, entry, created id or None)] in plan order.
+        """
+        if not self.path.exists():
+            return None
+        header, planned, landed = None, {}, {}
+        for entry in self._entries():
+            status = entry.get("status")
+            if status == "begin":
+                header = entry
+            elif status == "rolled_back":
+                return None
+            elif status == "pending":
+                planned[entry["seq"]] = entry
+            elif status == "done" and entry["seq"] in planned:
+                landed[entry["seq"]] = (entry["seq"], planned[entry["seq"]], entry.get("id"))
+            elif status == "failed" and entry.get("id") and entry["seq"] in planned:
+                # Partly landed: still pending for resume, but what it created is undone by a rollback.
+                landed[entry["seq"]] = (entry["seq"], planned[entry["seq"]], entry["id"])
+            elif status == "undone":
+                landed.pop(entry["seq"], None)
+        if header is None:
+            return None
+        label_ids = dict(header["labels"])
+        for _, entry, created in landed.values():
+            if entry["op"] == "create_label" and created:
+                label_ids[entry["target"]] = created
+        return header["board"], label_ids, [landed[seq] for seq in sorted(landed)]
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
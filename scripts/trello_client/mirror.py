@@ -0,0 +1,635 @@
+"""
+Local SQLite mirror of board state, kept current from Trello's action feed.
+
+The first sync of a board is a full load: the projected board read and paged
+cards, as in snapshot.py, plus the id of the newest action. Every later sync reads
+only GET /boards/{id}/actions?since=<that id> and applies the actions to the
+tables: createCard, updateCard (moves, renames, archives, positions),
+deleteCard, labels and members on cards, list changes. Where an action doesn't
+carry enough to apply (a new card's position and labels, a copied card, checklist
+edits, board labels and members), the affected rows are marked stale and re-read
+directly. A board nobody touched costs one request per sync.
+
+Reads are SQL: snapshot() builds a BoardSnapshot for the reconciler, and
+find_cards() answers "open cards in these lists whose name contains ..." from
+the (board, list) and (board, name) indexes instead of a network scan.
+
+While a webhook receiver (webhook.py) runs for a board, actions arrive as they
+happen and reads skip the sync entirely. Deliveries can repeat or come out of
+order, so the sync cursor only moves when the feed itself is read: each
+delivered action is applied once (its id is kept until a sync passes it), one
+older than an action already applied re-reads what it touched instead of being
+replayed over newer state, and the receiver still syncs every minute to pick
+up anything that was never delivered.
+
+load_snapshot() reads through the mirror when TRELLO_MIRROR=1. Stored as SQLite
+in .trello_mirror.sqlite next to secrets.json (TRELLO_STATE_DIR moves it).
+
+    PYTHONPATH=scripts python -m trello_client.mirror sync m47dQixP
+    PYTHONPATH=scripts python -m trello_client.mirror cards m47dQixP --list "Week A: Discovery" --name-contains "Landing page"
+"""
+import argparse
+import json
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+
+from . import tracing
+from .client import TrelloClient, TrelloError
+from .credentials import get_trello_credentials
+from .projection import fields_param
+from .snapshot import (
+    SNAPSHOT_PARAMS,
+    BoardSnapshot,
+    Card,
+    Checklist,
+    Label,
+    Member,
+    TrelloList,
+    read_board,
+)
+from .state import state_path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS boards (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    short_link TEXT NOT NULL,
+    url TEXT NOT NULL,
+    date_last_activity TEXT,
+    last_action_id TEXT,
+    synced_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS boards_short_link ON boards (short_link);
+CREATE TABLE IF NOT EXISTS lists (
+    id TEXT PRIMARY KEY,
+    board_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    pos REAL NOT NULL DEFAULT 0,
+    closed INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS lists_board ON lists (board_id, name);
+CREATE TABLE IF NOT EXISTS cards (
+    id TEXT PRIMARY KEY,
+    board_id TEXT NOT NULL,
+    list_id TEXT,
+    name TEXT NOT NULL,
+    pos REAL NOT NULL DEFAULT 0,
+    closed INTEGER NOT NULL DEFAULT 0,
+    id_labels TEXT NOT NULL DEFAULT '[]',
+    id_members TEXT NOT NULL DEFAULT '[]'
+);
+CREATE INDEX IF NOT EXISTS cards_list ON cards (board_id, list_id, pos);
+CREATE INDEX IF NOT EXISTS cards_name ON cards (board_id, name);
+CREATE TABLE IF NOT EXISTS labels (
+    id TEXT PRIMARY KEY,
+    board_id TEXT NOT NULL,
+    name TEXT NOT NULL DEFAULT '',
+    color TEXT
+);
+CREATE INDEX IF NOT EXISTS labels_board ON labels (board_id);
+CREATE TABLE IF NOT EXISTS members (
+    board_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    username TEXT NOT NULL DEFAULT '',
+    full_name TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (board_id, id)
+);
+CREATE TABLE IF NOT EXISTS checklists (
+    id TEXT PRIMARY KEY,
+    board_id TEXT NOT NULL,
+    card_id TEXT,
+    name TEXT NOT NULL DEFAULT '',
+    items TEXT NOT NULL DEFAULT '[]'
+);
+CREATE INDEX IF NOT EXISTS checklists_board ON checklists (board_id, card_id);
+CREATE TABLE IF NOT EXISTS receivers (
+    board_id TEXT PRIMARY KEY,
+    webhook_id TEXT,
+    callback_url TEXT,
+    heartbeat REAL NOT NULL,
+    dirty INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS applied_actions (
+    board_id TEXT NOT NULL,
+    action_id TEXT NOT NULL,
+    PRIMARY KEY (board_id, action_id)
+);
+"""
+
+# Trello's largest page of actions.
+ACTION_PAGE_SIZE = 1000
+ACTION_FIELDS = "type,date,data"
+
+# A webhook receiver (webhook.py) heartbeats this often; a board whose receiver
+# beat within LIVE_WINDOW seconds is read without syncing.
+HEARTBEAT_INTERVAL = 5
+LIVE_WINDOW = 15
+
+# Past this many cards to re-read (ten per /batch call), a full load is cheaper.
+MAX_CARD_REFRESH = 200
+
+# Card fields re-read for a stale card: what the snapshot holds, plus where the card is now.
+CARD_REFRESH_FIELDS = fields_param(Card.FIELDS + ("idBoard", "closed"))
+
+# Actions that name a card but don't say enough about it to apply.
+CARD_REFRESH_ACTIONS = {"copyCard", "moveCardToBoard", "convertToCardFromCheckItem", "emailCard"}
+LIST_REFRESH_ACTIONS = {"moveListToBoard", "moveListFromBoard"}
+LABEL_ACTIONS = {"createLabel", "updateLabel", "deleteLabel"}
+MEMBER_ACTIONS = {"addMemberToBoard", "removeMemberFromBoard", "makeNormalMemberOfBoard", "makeAdminOfBoard"}
+CHECKLIST_ACTIONS = {
+    "addChecklistToCard",
+    "removeChecklistFromCard",
+    "updateChecklist",
+    "createCheckItem",
+    "updateCheckItem",
+    "deleteCheckItem",
+    "updateCheckItemStateOnCard",
+}
+
+
+@dataclass
+class _Stale:
+    """What a batch of actions left for sync() to re-read."""
+
+    cards: set = field(default_factory=set)
+    lists: bool = False
+    labels: bool = False
+    members: bool = False
+    checklists: bool = False
+
+
+class MirrorCards:
+    """A mirrored board's open cards, read from SQLite on every iteration (a CardStream stand-in)."""
+
+    def __init__(self, path, board_id):
+        self.path = path
+        self.board_id = board_id
+
+    def __iter__(self):
+        db = sqlite3.connect(str(self.path))
+        try:
+            rows = db.execute(
+                "SELECT id, name, list_id, pos, id_labels, id_members FROM cards WHERE board_id = ? AND closed = 0",
+                (self.board_id,),
+            )
+            for row in rows:
+                yield _card(row)
+        finally:
+            db.close()
+
+
+def _card(row):
+    return Card(row[0], row[1], row[2], row[3], json.loads(row[4]), json.loads(row[5]))
+
+
+class Mirror:
+    def __init__(self, path=None):
+        self.path = path or state_path(".trello_mirror.sqlite")
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def board_id(self, board_ref):
+        """Mirrored board's id from its id or shortLink, or None if it hasn't been synced."""
+        with self._lock:
+            return self._board_id(board_ref)
+
+    # Sync
+
+    def sync(self, client, board_ref, full=False):
+        """Bring the board up to date (a full load the first time, or with full=True). Returns its id."""
+        with tracing.phase("mirror"), self._lock:
+            board_id = None if full else self._board_id(board_ref)
+            if board_id:
+                # Cleared first: a write during the sync marks it dirty again.
+                with self._db:
+                    self._db.execute("UPDATE receivers SET dirty = 0 WHERE board_id = ?", (board_id,))
+                if self._catch_up(client, board_id):
+                    return board_id
+            return self._full_load(client, board_id or board_ref)
+
+    def apply_actions(self, client, board_id, actions):
+        """Apply actions delivered from outside (a webhook), in any order and any number of times.
+
+        Ones at or before the sync cursor came from the feed already; of the rest,
+        each is applied once. The cursor stays where it is, so the next sync still
+        reads anything that wasn't delivered.
+        """
+        with tracing.phase("mirror"), self._lock:
+            since = self._db.execute("SELECT last_action_id FROM boards WHERE id = ?", (board_id,)).fetchone()[0]
+            actions = sorted((a for a in actions if not since or a["id"] > since), key=lambda a: a["id"])
+            if actions and not self._apply_batch(client, board_id, actions, from_feed=False):
+                self._full_load(client, board_id)
+
+    def _board_id(self, board_ref):
+        row = self._db.execute("SELECT id FROM boards WHERE id = ? OR short_link = ?", (board_ref, board_ref)).fetchone()
+        return row[0] if row else None
+
+    def _full_load(self, client, board_ref):
+        # Newest action first: anything that lands during the load is replayed by the next sync.
+        # (Its own call, not part of the batch below, so it is certainly read first.)
+        newest = client.get(f"/boards/{board_ref}/actions", limit=1, fields="date")
+        board, cards = read_board(client, board_ref)
+        board_id = board["id"]
+        with self._db:
+            for table in ("lists", "cards", "labels", "members", "checklists", "applied_actions"):
+                self._db.execute(f"DELETE FROM {table} WHERE board_id = ?", (board_id,))
+            self._db.execute(
+                "INSERT OR REPLACE INTO boards (id, name, short_link, url, date_last_activity, last_action_id, synced_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    board_id,
+                    board.get("name", ""),
+                    board.get("shortLink", ""),
+                    board.get("url", ""),
+                    board.get("dateLastActivity"),
+                    newest[0]["id"] if newest else None,
+                    time.time(),
+                ),
+            )
+            self._put_lists(board_id, board.get("lists", []))
+            self._put_labels(board_id, board.get("labels", []))
+            self._put_members(board_id, board.get("members", []))
+            self._put_checklists(board_id, board.get("checklists", []))
+            for card in cards:
+                self._put_card(board_id, card)
+        return board_id
+
+    def _new_actions(self, client, board_id, since):
+        """Actions after `since`, oldest first (Trello pages them newest first)."""
+        actions = []
+        before = None
+        while True:
+            params = {"limit": ACTION_PAGE_SIZE, "fields": ACTION_FIELDS}
+            if since:
+                params["since"] = since
+            if before:
+                params["before"] = before
+            page = client.get(f"/boards/{board_id}/actions", **params)
+            actions += page
+            if len(page) < ACTION_PAGE_SIZE:
+                break
+            before = min(action["id"] for action in page)
+        return sorted(actions, key=lambda action: action["id"])
+
+    def _catch_up(self, client, board_id):
+        """Apply the actions since the last sync. False if a full load would be cheaper."""
+        since = self._db.execute("SELECT last_action_id FROM boards WHERE id = ?", (board_id,)).fetchone()[0]
+        return self._apply_batch(client, board_id, self._new_actions(client, board_id, since))
+
+    def _apply_batch(self, client, board_id, actions, from_feed=True):
+        """Apply actions (oldest first) and re-read what they left stale. False if a full load would be cheaper.
+
+        from_feed: `actions` is everything after the cursor, which moves to the
+        newest of them. Otherwise they were delivered (a webhook) and their ids are
+        remembered until a sync's cursor passes them.
+        """
+        applied = {
+            row[0] for row in self._db.execute("SELECT action_id FROM applied_actions WHERE board_id = ?", (board_id,))
+        }
+        newest = max(applied, default="")
+        stale = _Stale()
+        # One transaction: a failed re-read leaves the mirror (and its cursor) where it was.
+        with self._db:
+            for action in actions:
+                if action["id"] in applied:
+                    continue
+                if action["id"] < newest:
+                    # Late: something newer is already applied, so re-read rather than replay over it.
+                    self._mark_stale(action, stale)
+                else:
+                    self._apply(board_id, action, stale)
+            if len(stale.cards) > MAX_CARD_REFRESH:
+                self._db.rollback()
+                return False
+            self._refresh(client, board_id, stale)
+            if from_feed and actions:
+                self._db.execute(
+                    "UPDATE boards SET last_action_id = ?, date_last_activity = ? WHERE id = ?",
+                    (actions[-1]["id"], actions[-1].get("date"), board_id),
+                )
+                self._db.execute(
+                    "DELETE FROM applied_actions WHERE board_id = ? AND action_id <= ?", (board_id, actions[-1]["id"])
+                )
+            elif actions:
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO applied_actions (board_id, action_id) VALUES (?, ?)",
+                    [(board_id, action["id"]) for action in actions],
+                )
+                if actions[-1]["id"] > newest:
+                    self._db.execute(
+                        "UPDATE boards SET date_last_activity = ? WHERE id = ?", (actions[-1].get("date"), board_id)
+                    )
+            self._db.execute("UPDATE boards SET synced_at = ? WHERE id = ?", (time.time(), board_id))
+        return True
+
+    def _apply(self, board_id, action, stale):
+        kind = action["type"]
+        data = action.get("data") or {}
+        card = data.get("card") or {}
+        if kind == "createCard":
+            # The action has the name and list; position, labels and members come from a re-read.
+            self._db.execute(
+                "INSERT OR REPLACE INTO cards (id, board_id, list_id, name) VALUES (?, ?, ?, ?)",
+                (card["id"], board_id, (data.get("list") or {}).get("id"), card.get("name", "")),
+            )
+            stale.cards.add(card["id"])
+        elif kind == "updateCard":
+            self._update_card(card, data, stale)
+        elif kind in ("deleteCard", "moveCardFromBoard"):
+            self._db.execute("DELETE FROM cards WHERE id = ?", (card["id"],))
+            self._db.execute("DELETE FROM checklists WHERE card_id = ?", (card["id"],))
+        elif kind in ("addLabelToCard", "removeLabelFromCard"):
+            label_id = (data.get("label") or {}).get("id")
+            self._toggle(card["id"], "id_labels", label_id, kind == "addLabelToCard", stale)
+            if not self._db.execute("SELECT 1 FROM labels WHERE id = ?", (label_id,)).fetchone():
+                stale.labels = True
+        elif kind in ("addMemberToCard", "removeMemberFromCard"):
+            member_id = data.get("idMember") or (data.get("member") or {}).get("id")
+            self._toggle(card["id"], "id_members", member_id, kind == "addMemberToCard", stale)
+        elif kind in CARD_REFRESH_ACTIONS:
+            stale.cards.add(card["id"])
+        elif kind in ("createList", "updateList"):
+            self._update_list(board_id, data.get("list") or {}, stale)
+        elif kind in LIST_REFRESH_ACTIONS:
+            stale.lists = True
+        elif kind in LABEL_ACTIONS:
+            stale.labels = True
+        elif kind in MEMBER_ACTIONS:
+            stale.members = True
+        elif kind in CHECKLIST_ACTIONS:
+            stale.checklists = True
+        elif kind == "updateBoard" and "name" in (data.get("board") or {}):
+            self._db.execute("UPDATE boards SET name = ? WHERE id = ?", (data["board"]["name"], board_id))
+        # Anything else (comments, attachments, votes, ...) doesn't touch mirrored fields.
+
+    def _mark_stale(self, action, stale):
+        """Mark for re-reading whatever `action` touched."""
+        kind = action["type"]
+        data = action.get("data") or {}
+        card_id = (data.get("card") or {}).get("id")
+        if card_id:
+            stale.cards.add(card_id)
+        if kind in ("createList", "updateList") or kind in LIST_REFRESH_ACTIONS:
+            stale.lists = True
+        elif kind in LABEL_ACTIONS or kind == "addLabelToCard":
+            stale.labels = True
+        elif kind in MEMBER_ACTIONS:
+            stale.members = True
+        elif kind in CHECKLIST_ACTIONS:
+            stale.checklists = True
+
+    def _update_card(self, card, data, stale):
+        if not self._db.execute("SELECT 1 FROM cards WHERE id = ?", (card["id"],)).fetchone():
+            stale.cards.add(card["id"])
+            return
+        changes = {}
+        if "idList" in card:
+            changes["list_id"] = card["idList"]
+        elif data.get("listAfter"):
+            changes["list_id"] = data["listAfter"]["id"]
+        if "name" in card:
+            changes["name"] = card["name"]
+        if "pos" in card:
+            changes["pos"] = card["pos"]
+        if "closed" in card:
+            changes["closed"] = int(bool(card["closed"]))
+        if changes:
+            assignments = ", ".join(f"{column} = ?" for column in changes)
+            self._db.execute(f"UPDATE cards SET {assignments} WHERE id = ?", (*changes.values(), card["id"]))
+
+    def _toggle(self, card_id, column, value, add, stale):
+        row = self._db.execute(f"SELECT {column} FROM cards WHERE id = ?", (card_id,)).fetchone()
+        if not row:
+            stale.cards.add(card_id)
+            return
+        values = [v for v in json.loads(row[0]) if v != value]
+        if add:
+            values.append(value)
+        self._db.execute(f"UPDATE cards SET {column} = ? WHERE id = ?", (json.dumps(values), card_id))
+
+    def _update_list(self, board_id, lst, stale):
+        if "pos" not in lst and not self._db.execute("SELECT 1 FROM lists WHERE id = ?", (lst["id"],)).fetchone():
+            # A new list without a position: re-read the board's lists once.
+            stale.lists = True
+            return
+        self._db.execute("INSERT OR IGNORE INTO lists (id, board_id, name) VALUES (?, ?, ?)", (lst["id"], board_id, lst.get("name", "")))
+        for key, column in (("name", "name"), ("pos", "pos"), ("closed", "closed")):
+            if key in lst:
+                value = int(bool(lst[key])) if key == "closed" else lst[key]
+                self._db.execute(f"UPDATE lists SET {column} = ? WHERE id = ?", (value, lst["id"]))
+
+    def _refresh(self, client, board_id, stale):
+        """Re-read whatever the actions couldn't patch, all in GET /batch calls."""
+        reads = []
+        if stale.lists:
+            reads.append(("lists", (f"/boards/{board_id}/lists", {"filter": "open", "fields": fields_param(TrelloList.FIELDS)})))
+        if stale.labels:
+            reads.append(("labels", (f"/boards/{board_id}/labels", {"fields": fields_param(Label.FIELDS)})))
+        if stale.members:
+            reads.append(("members", (f"/boards/{board_id}/members", {"fields": fields_param(Member.FIELDS)})))
+        if stale.checklists:
+            checklist_params = {
+                "fields": SNAPSHOT_PARAMS["checklist_fields"],
+                "checkItem_fields": SNAPSHOT_PARAMS["checkItem_fields"],
+            }
+            reads.append(("checklists", (f"/boards/{board_id}/checklists", checklist_params)))
+        reads += [(card_id, (f"/cards/{card_id}", {"fields": CARD_REFRESH_FIELDS})) for card_id in stale.cards]
+        if not reads:
+            return
+        results = client.get_batch([call for _, call in reads], return_errors=True)
+        put = {"lists": self._put_lists, "labels": self._put_labels, "members": self._put_members, "checklists": self._put_checklists}
+        for (key, _), result in zip(reads, results):
+            if key in put:
+                if isinstance(result, TrelloError):
+                    raise result
+                self._db.execute(f"DELETE FROM {key} WHERE board_id = ?", (board_id,))
+                put[key](board_id, result)
+                continue
+            if isinstance(result, TrelloError):
+                if result.status_code != 404:
+                    raise result
+                result = None
+            if result is None or result["idBoard"] != board_id or result["closed"]:
+                self._db.execute("DELETE FROM cards WHERE id = ?", (key,))
+            else:
+                self._put_card(board_id, result)
+
+    def _put_lists(self, board_id, lists):
+        self._db.executemany(
+            "INSERT OR REPLACE INTO lists (id, board_id, name, pos, closed) VALUES (?, ?, ?, ?, 0)",
+            [(lst["id"], board_id, lst.get("name", ""), lst.get("pos", 0)) for lst in lists],
+        )
+
+    def _put_labels(self, board_id, labels):
+        self._db.executemany(
+            "INSERT OR REPLACE INTO labels (id, board_id, name, color) VALUES (?, ?, ?, ?)",
+            [(lb["id"], board_id, lb.get("name") or "", lb.get("color")) for lb in labels],
+        )
+
+    def _put_members(self, board_id, members):
+        self._db.executemany(
+            "INSERT OR REPLACE INTO members (board_id, id, username, full_name) VALUES (?, ?, ?, ?)",
+            [(board_id, m["id"], m.get("username") or "", m.get("fullName") or "") for m in members],
+        )
+
+    def _put_checklists(self, board_id, checklists):
+        rows = []
+        for cl in checklists:
+            items = [{"name": i.get("name", ""), "pos": i.get("pos", 0)} for i in cl.get("checkItems") or []]
+            rows.append((cl["id"], board_id, cl.get("idCard"), cl.get("name", ""), json.dumps(items)))
+        self._db.executemany("INSERT OR REPLACE INTO checklists (id, board_id, card_id, name, items) VALUES (?, ?, ?, ?, ?)", rows)
+
+    def _put_card(self, board_id, card):
+        self._db.execute(
+            "INSERT OR REPLACE INTO cards (id, board_id, list_id, name, pos, closed, id_labels, id_members)"
+            " VALUES (?, ?, ?, ?, ?, 0, ?, ?)",
+            (
+                card["id"],
+                board_id,
+                card.get("idList"),
+                card.get("name", ""),
+                card.get("pos", 0),
+                json.dumps(list(card.get("idLabels") or [])),
+                json.dumps(list(card.get("idMembers") or [])),
+            ),
+        )
+
+    # Webhook receivers
+
+    def mark_live(self, board_id, webhook_id=None, callback_url=None):
+        """Heartbeat from a running receiver: the board's mirror is being kept current."""
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO receivers (board_id, webhook_id, callback_url, heartbeat) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (board_id) DO UPDATE SET heartbeat = excluded.heartbeat,"
+                " webhook_id = COALESCE(excluded.webhook_id, webhook_id), callback_url = COALESCE(excluded.callback_url, callback_url)",
+                (board_id, webhook_id, callback_url, time.time()),
+            )
+
+    def mark_stopped(self, board_id):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM receivers WHERE board_id = ?", (board_id,))
+
+    def mark_dirty(self, board_ref):
+        """This process wrote to the board: sync before the next read rather than wait for the webhook."""
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE receivers SET dirty = 1 WHERE board_id IN (SELECT id FROM boards WHERE id = ? OR short_link = ?)",
+                (board_ref, board_ref),
+            )
+
+    def is_live(self, board_id):
+        """A receiver heartbeat is recent and nothing was written here since the last sync."""
+        with self._lock:
+            row = self._db.execute("SELECT heartbeat, dirty FROM receivers WHERE board_id = ?", (board_id,)).fetchone()
+        return bool(row) and not row[1] and time.time() - row[0] < LIVE_WINDOW
+
+    # Reads
+
+    def snapshot(self, board_id, stream_cards=False):
+        """The mirrored board as a BoardSnapshot. stream_cards=True reads cards lazily (see MirrorCards)."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT name, short_link, url, date_last_activity, synced_at FROM boards WHERE id = ?", (board_id,)
+            ).fetchone()
+            lists = [
+                TrelloList(*r)
+                for r in self._db.execute(
+                    "SELECT id, name, pos FROM lists WHERE board_id = ? AND closed = 0 ORDER BY pos", (board_id,)
+                )
+            ]
+            labels = [Label(*r) for r in self._db.execute("SELECT id, name, color FROM labels WHERE board_id = ?", (board_id,))]
+            members = [
+                Member(*r) for r in self._db.execute("SELECT id, username, full_name FROM members WHERE board_id = ?", (board_id,))
+            ]
+            checklists = [
+                Checklist(r[0], r[1], r[2], [i["name"] for i in sorted(json.loads(r[3]), key=lambda i: i["pos"])])
+                for r in self._db.execute("SELECT id, card_id, name, items FROM checklists WHERE board_id = ?", (board_id,))
+            ]
+        cards = MirrorCards(self.path, board_id)
+        if not stream_cards:
+            cards = list(cards)
+        return BoardSnapshot(board_id, row[0], row[1], row[2], row[3], lists, cards, labels, members, checklists, row[4])
+
+    def find_cards(self, board_id, lists=(), name_contains=()):
+        """Open cards in any of `lists` (names; all lists if empty) whose name contains any of `name_contains`."""
+        sql = (
+            "SELECT c.id, c.name, c.list_id, c.pos, c.id_labels, c.id_members FROM cards c"
+            " JOIN lists l ON l.id = c.list_id WHERE c.board_id = ? AND c.closed = 0"
+        )
+        args = [board_id]
+        if lists:
+            sql += f" AND l.name IN ({', '.join('?' * len(lists))})"
+            args += list(lists)
+        if name_contains:
+            sql += " AND (" + " OR ".join("instr(c.name, ?) > 0" for _ in name_contains) + ")"
+            args += list(name_contains)
+        sql += " ORDER BY l.pos, c.pos"
+        with self._lock:
+            return [_card(row) for row in self._db.execute(sql, args)]
+
+
+def mirrored_snapshot(client, board_ref, refresh=False, stream_cards=False, verify=False):
+    """load_snapshot() with TRELLO_MIRROR=1: sync the board's mirror, then read it.
+
+    A board with a live webhook receiver is already current and is read without a
+    request, unless verify is set: a caller about to write catches up from the
+    action feed anyway, in case a delivery is late.
+    """
+    with Mirror() as mirror:
+        board_id = mirror.board_id(board_ref)
+        if refresh or verify or not (board_id and mirror.is_live(board_id)):
+            board_id = mirror.sync(client, board_ref, full=refresh)
+        return mirror.snapshot(board_id, stream_cards)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sync and query the local board mirror.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sync = sub.add_parser("sync", help="Bring a board's mirror up to date.")
+    sync.add_argument("board", help="Board id or shortLink.")
+    sync.add_argument("--full", action="store_true", help="Reload the board instead of replaying actions.")
+    cards = sub.add_parser("cards", help="Sync, then list matching open cards.")
+    cards.add_argument("board", help="Board id or shortLink.")
+    cards.add_argument("--list", action="append", default=[], help="List name (repeatable).")
+    cards.add_argument("--name-contains", action="append", default=[], help="Name substring (repeatable).")
+    args = parser.parse_args(argv)
+
+    key, token = get_trello_credentials()
+    if not key or not token:
+        print("Need Trello API key and token.", file=sys.stderr)
+        return 1
+    with TrelloClient(key, token) as client, Mirror() as mirror:
+        start = time.perf_counter()
+        try:
+            board_id = mirror.sync(client, args.board, full=getattr(args, "full", False))
+        except TrelloError as e:
+            print(f"Sync failed: {e}", file=sys.stderr)
+            return 1
+        print(f"Synced {board_id} in {time.perf_counter() - start:.2f}s ({client.calls} request(s))", file=sys.stderr)
+        if args.command == "cards":
+            names = {lst.id: lst.name for lst in mirror.snapshot(board_id, stream_cards=True).lists}
+            for card in mirror.find_cards(board_id, args.list, args.name_contains):
+                print(f"{card.id}  {names.get(card.id_list, '?'):<24}  {card.name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
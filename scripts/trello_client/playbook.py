@@ -0,0 +1,312 @@
+"""
+data/sprint_process.json, validated once and indexed for the board scripts.
+
+    playbook = load_playbook()
+    playbook.by_num[4].list_name      # "4. Problem Lock & Design (Days 6-7)"
+    playbook.phase_for_list(name)     # Phase or None
+    playbook.by_week["B"]             # phases in file order
+
+load_playbook() checks the whole file against the schema the scripts rely on and
+raises PlaybookError listing every problem, so a malformed playbook stops a
+script before its first write. The validated Playbook is pickled to
+.trello_cache/playbook-<name>.pickle, keyed by the file's mtime, size and
+SHA-256: an unchanged file loads from the pickle without being parsed, an edited
+one is re-validated. Within a process it is loaded once and shared.
+
+    PYTHONPATH=scripts python -m trello_client.playbook [path]   # validate and summarize
+"""
+import hashlib
+import json
+import os
+import pickle
+import sys
+import threading
+from dataclasses import astuple, dataclass, field
+from pathlib import Path
+
+from .fanout import checklist_labels
+from .state import REPO_ROOT, state_path
+
+DEFAULT_PATH = REPO_ROOT / "data" / "sprint_process.json"
+
+# Bump when Phase/Template/Playbook change shape, so old pickles are rebuilt.
+CACHE_FORMAT = 1
+
+
+class PlaybookError(ValueError):
+    """The playbook file is missing, not JSON, or doesn't match the schema. str() lists every problem."""
+
+    def __init__(self, path, problems):
+        super().__init__(f"{path}: " + "; ".join(problems))
+        self.path = path
+        self.problems = problems
+
+
+@dataclass(frozen=True)
+class Phase:
+    id: str
+    num: int
+    week: str
+    title: str
+    timebox: str
+    purpose: str
+    outputs: tuple = ()
+    exit_criteria: tuple = ()
+    # Checklist item labels (the file allows {"id", "label"} dicts or plain strings).
+    checklist: tuple = ()
+    owner_hint: str = ""
+    tags: tuple = ()
+
+    @property
+    def list_name(self):
+        """The phase's column on a playbook board: "1. Hypothesis Research (Days 1-2)"."""
+        return f"{self.num}. {self.title} ({self.timebox})"
+
+
+@dataclass(frozen=True)
+class Template:
+    key: str
+    title: str
+    description: str = ""
+    fields: tuple = ()
+
+
+@dataclass
+class Playbook:
+    version: str
+    weeks: dict
+    phases: tuple
+    templates: dict
+    meta: dict = field(default_factory=dict)
+    by_id: dict = field(init=False, repr=False)
+    by_num: dict = field(init=False, repr=False)
+    by_week: dict = field(init=False, repr=False)
+    by_list_name: dict = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.by_id = {p.id: p for p in self.phases}
+        self.by_num = {p.num: p for p in self.phases}
+        self.by_list_name = {p.list_name: p for p in self.phases}
+        self.by_week = {week: tuple(p for p in self.phases if p.week == week) for week in self.weeks}
+
+    def phase_for_list(self, list_name):
+        return self.by_list_name.get(list_name)
+
+
+def _str_list(value, where, problems):
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        problems.append(f"{where}: expected a list of strings")
+        return ()
+    return tuple(value)
+
+
+def _checklist(value, where, problems):
+    if not isinstance(value, list):
+        problems.append(f"{where}: expected a list")
+        return ()
+    before = len(problems)
+    for i, item in enumerate(value):
+        if isinstance(item, dict):
+            if not isinstance(item.get("label"), str) or not item["label"].strip():
+                problems.append(f"{where}[{i}].label: expected a non-empty string")
+        elif not isinstance(item, str):
+            problems.append(f"{where}[{i}]: expected a string or {{\"id\", \"label\"}}")
+    return tuple(checklist_labels(value)) if len(problems) == before else ()
+
+
+def _phase(d, where, weeks, problems):
+    if not isinstance(d, dict):
+        problems.append(f"{where}: expected an object")
+        return None
+    before = len(problems)
+    for key in ("id", "title", "timebox", "purpose"):
+        if not isinstance(d.get(key), str) or not d[key].strip():
+            problems.append(f"{where}.{key}: expected a non-empty string")
+    if not isinstance(d.get("num"), int) or isinstance(d.get("num"), bool) or d["num"] < 1:
+        problems.append(f"{where}.num: expected a positive integer")
+    if d.get("week") not in weeks:
+        problems.append(f"{where}.week: expected one of {', '.join(sorted(weeks))}")
+    outputs = _str_list(d.get("outputs", []), f"{where}.outputs", problems)
+    exit_criteria = _str_list(d.get("exitCriteria", []), f"{where}.exitCriteria", problems)
+    tags = _str_list(d.get("tags", []), f"{where}.tags", problems)
+    checklist = _checklist(d.get("checklist", []), f"{where}.checklist", problems)
+    if not isinstance(d.get("ownerHint", ""), str):
+        problems.append(f"{where}.ownerHint: expected a string")
+    if len(problems) > before:
+        return None
+    return Phase(
+        d["id"], d["num"], d["week"], d["title"], d["timebox"], d["purpose"],
+        outputs, exit_criteria, checklist, d.get("ownerHint", ""), tags,
+    )
+
+
+def _template(key, d, problems):
+    where = f"templates.{key}"
+    if not isinstance(d, dict):
+        problems.append(f"{where}: expected an object")
+        return None
+    before = len(problems)
+    if not isinstance(d.get("title"), str) or not d["title"].strip():
+        problems.append(f"{where}.title: expected a non-empty string")
+    if not isinstance(d.get("description", ""), str):
+        problems.append(f"{where}.description: expected a string")
+    fields = _str_list(d.get("fields", []), f"{where}.fields", problems)
+    if len(problems) > before:
+        return None
+    return Template(key, d["title"], d.get("description", ""), fields)
+
+
+def parse_playbook(data, path=DEFAULT_PATH):
+    """Validate decoded sprint_process.json and build the Playbook. Raises PlaybookError."""
+    if not isinstance(data, dict):
+        raise PlaybookError(path, ["expected a JSON object"])
+    problems = []
+    meta = data.get("meta", {})
+    if not isinstance(meta, dict):
+        problems.append("meta: expected an object")
+        meta = {}
+    weeks = meta.get("weeks", {"A": "Discovery", "B": "Execution"})
+    if not isinstance(weeks, dict) or not weeks or not all(isinstance(v, str) for v in weeks.values()):
+        problems.append("meta.weeks: expected an object of week -> name")
+        weeks = {}
+
+    raw_phases = data.get("phases")
+    if not isinstance(raw_phases, list) or not raw_phases:
+        problems.append("phases: expected a non-empty list")
+        raw_phases = []
+    phases = [_phase(d, f"phases[{i}]", weeks, problems) for i, d in enumerate(raw_phases)]
+    phases = [p for p in phases if p]
+    for attr, label in (("id", "id"), ("num", "num"), ("list_name", "list name")):
+        seen = set()
+        for p in phases:
+            value = getattr(p, attr)
+            if value in seen:
+                problems.append(f"phases: duplicate {label} {value!r}")
+            seen.add(value)
+
+    raw_templates = data.get("templates", {})
+    if not isinstance(raw_templates, dict):
+        problems.append("templates: expected an object")
+        raw_templates = {}
+    templates = {key: _template(key, d, problems) for key, d in raw_templates.items()}
+
+    if problems:
+        raise PlaybookError(path, problems)
+    return Playbook(str(data.get("version", "")), dict(weeks), tuple(phases), templates, meta)
+
+
+def _to_plain(playbook):
+    """Pickled form: builtins only, so the cache doesn't depend on where the classes were imported from."""
+    return (
+        playbook.version,
+        playbook.weeks,
+        playbook.meta,
+        [astuple(p) for p in playbook.phases],
+        [astuple(t) for t in playbook.templates.values()],
+    )
+
+
+def _from_plain(plain):
+    version, weeks, meta, phases, templates = plain
+    templates = {t[0]: Template(*t) for t in templates}
+    return Playbook(version, weeks, tuple(Phase(*p) for p in phases), templates, meta)
+
+
+def _cache_path(path):
+    return state_path(".trello_cache", f"playbook-{Path(path).stem}.pickle")
+
+
+def _read_cache(cache):
+    try:
+        with open(cache, "rb") as f:
+            entry = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, ValueError):
+        return None
+    return entry if isinstance(entry, dict) and entry.get("format") == CACHE_FORMAT else None
+
+
+def _write_cache(cache, entry):
+    tmp = cache.with_suffix(".tmp")
+    try:
+        with open(tmp, "wb") as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache)
+    except OSError:
+        pass  # a cache we can't write only costs the next run a parse
+
+
+def _load(path):
+    try:
+        stat = os.stat(path)
+    except OSError as e:
+        raise PlaybookError(path, [e.strerror or str(e)]) from None
+    cache = _cache_path(path)
+    entry = _read_cache(cache)
+    source = str(Path(path).resolve())
+    if entry and entry["source"] == source and (entry["mtime_ns"], entry["size"]) == (stat.st_mtime_ns, stat.st_size):
+        return _from_plain(entry["playbook"])
+    with open(path, "rb") as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).hexdigest()
+    if entry and entry["source"] == source and entry["sha256"] == digest:
+        # Touched but unchanged: keep the pickle, record the new mtime.
+        playbook = _from_plain(entry["playbook"])
+    else:
+        try:
+            data = json.loads(raw)
+        except ValueError as e:
+            raise PlaybookError(path, [f"not valid JSON ({e})"]) from None
+        playbook = parse_playbook(data, path)
+    _write_cache(
+        cache,
+        {
+            "format": CACHE_FORMAT,
+            "source": source,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": digest,
+            "playbook": _to_plain(playbook),
+        },
+    )
+    return playbook
+
+
+_loaded = {}
+_lock = threading.Lock()
+
+
+def load_playbook(path=DEFAULT_PATH):
+    """The validated, indexed playbook at `path`. Raises PlaybookError before anything touches Trello."""
+    path = Path(path)
+    try:
+        stat = os.stat(path)
+        key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        key = None
+    with _lock:
+        if key in _loaded:
+            return _loaded[key]
+        playbook = _load(path)
+        if key:
+            _loaded[key] = playbook
+        return playbook
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    path = Path(argv[0]) if argv else DEFAULT_PATH
+    try:
+        playbook = load_playbook(path)
+    except PlaybookError as e:
+        print(f"{e.path}:", file=sys.stderr)
+        for problem in e.problems:
+            print(f"  {problem}", file=sys.stderr)
+        return 1
+    print(f"{path}: version {playbook.version or '?'}, {len(playbook.phases)} phase(s), {len(playbook.templates)} template(s)")
+    for week, name in playbook.weeks.items():
+        print(f"  Week {week} ({name}): " + ", ".join(p.list_name for p in playbook.by_week[week]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
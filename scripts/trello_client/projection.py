@@ -0,0 +1,88 @@
+"""
+Field projections for Trello reads.
+
+Without fields= Trello sends whole objects (descriptions, badges, covers,
+attachment metadata) even when the caller reads two keys. Every read names the
+fields it uses instead: the snapshot models carry theirs as FIELDS, and
+fields_param() turns a declaration into the fields=, card_fields=, list_fields=...
+value.
+
+Debug mode (TRELLO_STRICT_FIELDS=1) keeps declarations honest. The client
+refuses a GET without fields= and wraps every response in Projected, which
+raises UnrequestedField when code reads a key the request didn't ask for. Without
+the guard that read would quietly fall back to a default.
+"""
+import os
+
+STRICT_ENV = "TRELLO_STRICT_FIELDS"
+
+# Trello's nested-projection params and the collection each one applies to.
+NESTED_FIELDS = {
+    "board_fields": "boards",
+    "list_fields": "lists",
+    "card_fields": "cards",
+    "label_fields": "labels",
+    "member_fields": "members",
+    "checklist_fields": "checklists",
+    "checkItem_fields": "checkItems",
+}
+
+# Returned whatever the projection.
+ALWAYS = frozenset({"id"})
+
+
+class UnrequestedField(KeyError):
+    """A projected response was asked for a field its request didn't include (debug mode only)."""
+
+
+def strict():
+    return os.environ.get(STRICT_ENV, "").strip().lower() in ("1", "true", "yes")
+
+
+def fields_param(names):
+    """("id", "name", "idList") -> "id,name,idList"."""
+    return ",".join(names)
+
+
+def _requested(value):
+    """Field set from a fields= value, or None when everything was asked for."""
+    if value is None or value == "all":
+        return None
+    return frozenset(value.split(",")) | ALWAYS
+
+
+class Projected(dict):
+    """Response object that only hands out the fields (and nested collections) its request named."""
+
+    def __init__(self, data, allowed):
+        super().__init__(data)
+        self.allowed = allowed
+
+    def _check(self, key):
+        if key not in self.allowed:
+            raise UnrequestedField(f"'{key}' not in the request's fields ({','.join(sorted(self.allowed))})")
+
+    def __getitem__(self, key):
+        self._check(key)
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        self._check(key)
+        return super().get(key, default)
+
+
+def guard(data, params, top="fields"):
+    """Wrap a decoded response (object or list of objects) per the projection in params."""
+    if isinstance(data, list):
+        return [guard(item, params, top) for item in data]
+    if not isinstance(data, dict):
+        return data
+    nested = {}
+    for param, collection in NESTED_FIELDS.items():
+        if isinstance(data.get(collection), list):
+            nested[collection] = guard(data[collection], params, param)
+    data = {**data, **nested}
+    allowed = _requested(params.get(top))
+    if allowed is None:
+        return data
+    return Projected(data, allowed | set(nested))
@@ -0,0 +1,176 @@
+"""
+Client-side rate limiting for Trello.
+
+Trello enforces two windows at once: 300 requests per 10 s per API key and 100
+per 10 s per token. RateLimiter keeps a sliding window of send times for each, so
+concurrent seeding runs at the highest rate that stays inside both. Every
+response's x-rate-limit-api-{key,token}-* headers re-sync the windows with the
+server's view, and a 429 pauses the offending window for everyone and is retried
+with jittered exponential backoff instead of being reported as a failed write.
+
+reserve() never sleeps; it returns how long the caller must wait before asking
+again, so the same limiter serves both blocking and asyncio callers.
+"""
+import random
+import threading
+import time
+from collections import deque
+
+# (requests, window seconds)
+TRELLO_KEY_LIMIT = (300, 10.0)
+TRELLO_TOKEN_LIMIT = (100, 10.0)
+
+DEFAULT_MAX_RETRIES = 6
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30.0
+
+# The server counts a request when it arrives, a little after we log it as sent.
+WINDOW_SLACK = 0.2
+
+
+class SlidingWindow:
+    """At most `capacity` requests in any `interval` seconds, counted the way the server counts them.
+
+    A token bucket refills continuously, so after a burst it lets requests through
+    that a sliding window still rejects; keeping the send times instead means a
+    request only goes out once the one `capacity` places before it has aged out.
+    """
+
+    def __init__(self, capacity, interval):
+        self.capacity = capacity
+        self.interval = interval
+        self._sent = deque()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        while self._sent and self._sent[0] <= now - self.interval - WINDOW_SLACK:
+            self._sent.popleft()
+
+    def reserve(self):
+        """Take a slot if one is free (returns 0); otherwise return the seconds until one may be.
+
+        Nothing is taken on a non-zero return: callers sleep and ask again, so a pause
+        that starts while they sleep still holds them back.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            self._expire(now)
+            if len(self._sent) < self.capacity:
+                self._sent.append(now)
+                return 0.0
+            return self._sent[len(self._sent) - self.capacity] + self.interval + WINDOW_SLACK - now
+
+    def release(self):
+        """Give back the slot just taken (the request didn't go out after all)."""
+        with self._lock:
+            if self._sent:
+                self._sent.pop()
+
+    def sync(self, remaining=None, capacity=None, interval=None):
+        """Adopt the server's limits and never assume more headroom than it reports.
+
+        Requests the server counted that we didn't send (another process on the same
+        key or token) are logged as sent now: the most we might have to wait for them.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if capacity:
+                self.capacity = capacity
+            if interval:
+                self.interval = interval
+            self._expire(now)
+            if remaining is not None:
+                for _ in range(self.capacity - len(self._sent) - remaining):
+                    self._sent.append(now)
+
+    def drain(self, pause=0.0):
+        """Server said we're over the limit: hold every caller back for `pause` seconds."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + pause)
+
+
+def _header_int(headers, name):
+    value = headers.get(name)
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class RateLimiter:
+    def __init__(self, key_limit=TRELLO_KEY_LIMIT, token_limit=TRELLO_TOKEN_LIMIT, max_retries=DEFAULT_MAX_RETRIES):
+        self.key_window = SlidingWindow(*key_limit)
+        self.token_window = SlidingWindow(*token_limit)
+        self.max_retries = max_retries
+        self.retries = 0
+        self.waited = 0.0
+        # Consecutive 429s across all callers; grows the backoff until a request gets through.
+        self._streak = 0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """0 if a request may go out now (a slot in both windows is taken), else seconds to wait and ask again."""
+        delay = self.key_window.reserve()
+        if delay:
+            return delay
+        delay = self.token_window.reserve()
+        if delay:
+            # The request isn't going out yet.
+            self.key_window.release()
+        return delay
+
+    def acquire(self):
+        """Block until a request may go out. Returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            delay = self.reserve()
+            if not delay:
+                break
+            time.sleep(delay)
+            waited += delay
+        if waited:
+            with self._lock:
+                self.waited += waited
+        return waited
+
+    def observe(self, headers, status=None):
+        """Re-sync both windows from x-rate-limit-api-{key,token}-{max,interval-ms,remaining}."""
+        if status is not None and status != 429:
+            with self._lock:
+                self._streak = 0
+        for scope, window in (("key", self.key_window), ("token", self.token_window)):
+            prefix = f"x-rate-limit-api-{scope}-"
+            remaining = _header_int(headers, prefix + "remaining")
+            capacity = _header_int(headers, prefix + "max")
+            interval_ms = _header_int(headers, prefix + "interval-ms")
+            if remaining is None and capacity is None and interval_ms is None:
+                continue
+            window.sync(remaining, capacity, interval_ms / 1000.0 if interval_ms else None)
+
+    def throttled(self, body, attempt, retry_after=None):
+        """Handle a 429. Returns the seconds to back off before retry number attempt + 1."""
+        with self._lock:
+            self._streak += 1
+            step = max(attempt, self._streak - 1)
+        # Jitter keeps concurrent workers from retrying in lockstep.
+        delay = random.uniform(BACKOFF_BASE, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** (step + 1)))
+        try:
+            delay = max(delay, float(retry_after))
+        except (TypeError, ValueError):
+            pass
+        # Every other worker queues behind the pause too, instead of each finding out with its own 429.
+        body = body or ""
+        if "KEY" in body:
+            self.key_window.drain(delay)
+        elif "TOKEN" in body:
+            self.token_window.drain(delay)
+        else:
+            self.key_window.drain(delay)
+            self.token_window.drain(delay)
+        with self._lock:
+            self.retries += 1
+            self.waited += delay
+        return delay
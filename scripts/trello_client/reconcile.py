@@ -0,0 +1,579 @@
+"""
+Desired-state reconciler for board layout scripts.
+
+A DesiredState says what the board should look like (which lists exist, where
+cards from old lists belong, which cards are archived, which name substrings
+pull a card into another list, which labels every card should carry, which
+cards must exist). plan() diffs it against a BoardSnapshot and returns only the
+operations needed to get there, so a converged board produces an empty plan and
+a large board only touches the cards that actually differ. When every open card
+in a list goes the same way, the per-card writes collapse into one list-level
+call (moveAllCards / archiveAllCards). Those calls act on whatever is in the
+list when they land, so just before their stage runs the lists are read again
+(one /batch); a list that no longer holds exactly the planned cards gets
+per-card writes for those cards instead. apply() executes a plan in stages: list
+and label creation first (later operations refer to them by name), then
+archives, then moves, then new cards, then labels; each stage runs concurrently
+through FanOut. New cards go through seed_cards(), so their check items go up in
+parallel, and a NewCard with a `key` is tracked in the IdempotencyIndex passed to
+apply() / resume(): a card whose checklist an interrupted run cut short is
+finished rather than duplicated. Given a Journal, apply() records the plan and
+each outcome, resume() replays only what an interrupted run left pending, and
+rollback() undoes every write the last run made, in reverse stage order.
+"""
+import sys
+from dataclasses import dataclass, field
+
+from . import tracing
+from .client import CARD_PAGE_SIZE, TrelloError
+from .fanout import DEFAULT_MAX_IN_FLIGHT, CardSpec, FanOut, seed_cards
+from .idempotency import IdempotencyIndex
+from .journal import Journal
+from .rules import Classifier
+from .snapshot import invalidate_snapshot
+
+
+@dataclass
+class MoveRule:
+    """Cards whose name contains any substring move to `target` (only from `from_lists` if given)."""
+
+    target: str
+    substrings: tuple
+    from_lists: tuple = ()
+
+
+@dataclass
+class LabelRule:
+    """Every open card outside `exclude_lists` carries this label; created if missing."""
+
+    name: str
+    color: str = None
+    exclude_lists: tuple = ()
+
+
+@dataclass
+class NewCard:
+    """A card that must exist (matched by exact name among the cards the plan keeps open)."""
+
+    name: str
+    list: str
+    desc: str = ""
+    due: str = None
+    member_ids: tuple = ()
+    checklist: tuple = ()
+    checklist_name: str = "Checklist"
+    # Source key for the IdempotencyIndex (see fanout.seed_cards).
+    key: str = None
+
+
+@dataclass
+class DesiredState:
+    lists: list = field(default_factory=list)
+    list_positions: dict = field(default_factory=dict)
+    list_moves: dict = field(default_factory=dict)
+    default_list: str = None
+    keep_lists: tuple = ()
+    clear_lists: tuple = ()
+    archive_names: set = field(default_factory=set)
+    # Lists archive_names applies in (empty: every list).
+    archive_from: tuple = ()
+    move_rules: list = field(default_factory=list)
+    label_rules: list = field(default_factory=list)
+    cards: list = field(default_factory=list)
+
+
+@dataclass
+class Operation:
+    """One write. Lists and labels are referenced by name so they can be created by the same plan."""
+
+    kind: str
+    target: str
+    payload: dict = field(default_factory=dict)
+    summary: str = ""
+
+    def __str__(self):
+        return f"{self.kind:<13} {self.summary}"
+
+
+# Execution stages, in order. Operations within a stage are independent of each other;
+# everything after the first stage only depends on names resolved by then.
+STAGES = (
+    ("create_list", "create_label"),
+    ("archive_all_cards", "archive_card"),
+    ("move_all_cards", "move_card"),
+    # After the moves: new cards are placed below whatever the lists hold by then.
+    ("create_card",),
+    ("add_label",),
+)
+OP_ORDER = tuple(kind for stage in STAGES for kind in stage)
+# Tracing phase per stage.
+STAGE_NAMES = ("create", "archive", "move", "cards", "label")
+
+# Smallest number of same-destination cards worth a list-level call instead of per-card writes.
+BULK_THRESHOLD = 2
+BULK_KINDS = ("archive_all_cards", "move_all_cards")
+
+
+def _collapse_whole_lists(list_names, open_counts, desired, card_ops):
+    """Replace per-card moves/archives with one list-level call where a whole list goes the same way.
+
+    Exceptions (e.g. archive_names) keep their per-card op and run in an earlier
+    stage, so the bulk call only sees the cards that remain.
+    """
+    archives, moves = {}, {}
+    for op in card_ops:
+        if op.kind == "archive_card":
+            archives.setdefault(op.payload["from"], []).append(op)
+        elif op.kind == "move_card":
+            moves.setdefault(op.payload["from"], []).append(op)
+
+    collapsed = set()
+    bulk = []
+    for list_id in set(archives) | set(moves):
+        name = list_names.get(list_id, "")
+        archived = archives.get(list_id, [])
+        # Bulk payloads name their cards, so a rollback can undo them one by one.
+        if name in desired.clear_lists and len(archived) == open_counts[list_id] >= BULK_THRESHOLD:
+            payload = {"count": len(archived), "cards": [op.target for op in archived]}
+            bulk.append(Operation("archive_all_cards", list_id, payload, f"{name} ({len(archived)} cards)"))
+            collapsed.update(id(op) for op in archived)
+            continue
+        moved = moves.get(list_id, [])
+        targets = {op.payload["list"] for op in moved}
+        if len(targets) == 1 and len(moved) >= BULK_THRESHOLD and len(moved) + len(archived) == open_counts[list_id]:
+            target = targets.pop()
+            payload = {"list": target, "cards": [op.target for op in moved]}
+            bulk.append(Operation("move_all_cards", list_id, payload, f"{name} -> {target} ({len(moved)} cards)"))
+            collapsed.update(id(op) for op in moved)
+    return bulk + [op for op in card_ops if id(op) not in collapsed]
+
+
+def plan(snapshot, desired):
+    """Minimal list of Operations that takes `snapshot` to `desired`.
+
+    Reads snapshot.cards in one pass, so a streamed snapshot is paged through once;
+    each card is classified by the desired state's compiled rules (rules.Classifier).
+    """
+    ops = []
+    existing_lists = {lst.name for lst in snapshot.lists}
+    for i, name in enumerate(desired.lists):
+        if name not in existing_lists:
+            pos = desired.list_positions.get(name, str(i + 1))
+            ops.append(Operation("create_list", name, {"pos": pos}, f"{name} (pos {pos})"))
+    available_lists = existing_lists | set(desired.lists)
+    classifier = Classifier(desired, available_lists)
+
+    labels = {lb.name: lb.id for lb in snapshot.labels}
+    for rule in desired.label_rules:
+        if rule.name not in labels:
+            ops.append(Operation("create_label", rule.name, {"color": rule.color}, f"{rule.name} ({rule.color})"))
+
+    list_names = snapshot.list_names_by_id()
+    wanted_names = {new.name for new in desired.cards}
+    existing_names = set()
+    open_counts = {}
+    card_ops = []
+    for card in snapshot.cards:
+        open_counts[card.id_list] = open_counts.get(card.id_list, 0) + 1
+        current = list_names.get(card.id_list, "")
+        verdict = classifier.classify(card.name, current)
+        if verdict.archive:
+            card_ops.append(Operation("archive_card", card.id, {"from": card.id_list}, card.name))
+            continue
+        if card.name in wanted_names:
+            existing_names.add(card.name)
+        if verdict.list != current:
+            payload = {"list": verdict.list, "from": card.id_list}
+            card_ops.append(Operation("move_card", card.id, payload, f"{card.name[:50]} -> {verdict.list}"))
+        for label in verdict.labels:
+            if labels.get(label) in card.id_labels:
+                continue
+            card_ops.append(Operation("add_label", card.id, {"label": label}, f"{label}: {card.name[:50]}"))
+    ops.extend(_collapse_whole_lists(list_names, open_counts, desired, card_ops))
+
+    for new in desired.cards:
+        if new.name in existing_names or new.list not in available_lists:
+            continue
+        payload = {"list": new.list, "desc": new.desc}
+        if new.due:
+            payload["due"] = new.due
+        if new.member_ids:
+            payload["members"] = list(new.member_ids)
+        if new.checklist:
+            payload["checklist"] = list(new.checklist)
+            payload["checklist_name"] = new.checklist_name
+        if new.key:
+            payload["key"] = new.key
+        ops.append(Operation("create_card", new.name, payload, f"{new.name[:50]} ({new.list})"))
+
+    return sorted(ops, key=lambda op: OP_ORDER.index(op.kind))
+
+
+def print_plan(ops):
+    if not ops:
+        print("Board already matches the desired state; nothing to do.")
+        return
+    print(f"Plan: {len(ops)} operation(s)")
+    for op in ops:
+        print(f"  {op}")
+
+
+@dataclass
+class OpResult:
+    op: Operation
+    error: TrelloError = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def _run(client, board_id, op, list_ids, label_ids, drifted=frozenset()):
+    """Send one operation. Returns the id of whatever it created, if anything.
+
+    A bulk operation on a list in `drifted` is sent as per-card writes for the cards it planned.
+    """
+    if op.kind == "create_list":
+        list_ids[op.target] = client.create_list(board_id, op.target, pos=op.payload["pos"])["id"]
+        return list_ids[op.target]
+    elif op.kind == "create_label":
+        label_ids[op.target] = client.create_label(board_id, op.target, op.payload["color"])["id"]
+        return label_ids[op.target]
+    elif op.kind == "archive_card":
+        client.archive_card(op.target)
+    elif op.kind == "archive_all_cards" and op.target in drifted:
+        _each_card(client.archive_card, op.payload["cards"])
+    elif op.kind == "archive_all_cards":
+        client.archive_all_cards(op.target)
+    elif op.kind == "move_all_cards" and op.target in drifted:
+        _each_card(client.move_card, op.payload["cards"], list_ids[op.payload["list"]])
+    elif op.kind == "move_all_cards":
+        client.move_all_cards(op.target, board_id, list_ids[op.payload["list"]])
+    elif op.kind == "move_card":
+        client.move_card(op.target, list_ids[op.payload["list"]])
+    elif op.kind == "add_label":
+        client.add_label(op.target, label_ids[op.payload["label"]])
+    else:
+        raise ValueError(f"Unknown operation kind: {op.kind}")
+    return None
+
+
+def _each_card(fn, card_ids, *args):
+    """fn(card_id, *args) for every card; raises the first TrelloError once all have been tried."""
+    errors = [e for e in (_attempt(fn, card_id, *args) for card_id in card_ids) if e]
+    if errors:
+        raise errors[0]
+
+
+def _drifted_lists(client, ops):
+    """Lists of bulk `ops` whose open cards are no longer exactly the ones their plan named."""
+    checked = [op for op in ops if op.kind in BULK_KINDS and "cards" in op.payload]
+    if not checked:
+        return frozenset()
+    current = client.get_batch([(f"/lists/{op.target}/cards", {"fields": "id"}) for op in checked], return_errors=True)
+    return frozenset(
+        op.target
+        for op, cards in zip(checked, current)
+        # An unreadable list counts as drifted: per-card writes only ever touch the planned cards.
+        if isinstance(cards, TrelloError) or {c["id"] for c in cards} != set(op.payload["cards"])
+    )
+
+
+def _unresolved(op):
+    return TrelloError(op.kind, op.target, 0, "depends on a list/label that could not be created")
+
+
+def _guarded(client, board_id, op, list_ids, label_ids, journal=None, seq=None, drifted=frozenset()):
+    try:
+        created = _run(client, board_id, op, list_ids, label_ids, drifted)
+    except TrelloError as e:
+        result = OpResult(op, e)
+    except KeyError:
+        # The list or label it depends on failed to create.
+        result = OpResult(op, _unresolved(op))
+    else:
+        if journal:
+            journal.done(seq, created)
+        return OpResult(op)
+    if journal:
+        journal.failed(seq, result.error.text)
+    return result
+
+
+def _card_spec(op, list_id):
+    payload = op.payload
+    return CardSpec(
+        list_id,
+        op.target,
+        desc=payload.get("desc", ""),
+        due=payload.get("due"),
+        member_ids=list(payload.get("members", ())),
+        checklist=list(payload.get("checklist", ())),
+        checklist_name=payload.get("checklist_name", "Checklist"),
+        key=payload.get("key"),
+    )
+
+
+def _create_cards(client, board_id, numbered, list_ids, max_in_flight, journal, index):
+    """Run create_card (seq, op) pairs through seed_cards(); returns their OpResults in order."""
+    errors, seeding = {}, []
+    for seq, op in numbered:
+        if op.payload["list"] not in list_ids:
+            errors[seq] = _unresolved(op)
+            continue
+        spec = _card_spec(op, list_ids[op.payload["list"]])
+        entry = index.get(board_id, spec.key) if index and spec.key else None
+        if entry and entry.complete and entry.content_hash == spec.content_hash():
+            # The plan only creates cards it didn't find open, so this one was archived since: make it again.
+            index.forget(board_id, spec.key)
+        seeding.append((seq, op, spec))
+    created = {}
+    seeded = seed_cards(client, [spec for *_, spec in seeding], max_in_flight, index=index, board_id=board_id)
+    for (seq, op, _), seed in zip(seeding, seeded):
+        if not seed.ok:
+            errors[seq] = seed.error or TrelloError(op.kind, op.target, 0, "card was not created")
+            continue
+        created[seq] = seed.card["id"]
+        errors[seq] = next(iter(seed.checklist_errors), None)
+    results = []
+    for seq, op in numbered:
+        error = errors.get(seq)
+        if journal and error:
+            # A card whose checklist didn't finish is recorded too: rollback removes it, resume finishes it.
+            journal.failed(seq, error.text, created.get(seq))
+        elif journal:
+            journal.done(seq, created[seq])
+        results.append(OpResult(op, error))
+    return results
+
+
+def _execute(client, board_id, numbered, list_ids, label_ids, max_in_flight, journal, index=None):
+    """Run (seq, op) pairs stage by stage; returns OpResults in plan order."""
+    results = []
+    with tracing.phase(STAGE_NAMES[0]):
+        for seq, op in numbered:
+            if op.kind in STAGES[0]:
+                results.append(_guarded(client, board_id, op, list_ids, label_ids, journal, seq))
+    for name, stage in zip(STAGE_NAMES[1:], STAGES[1:]):
+        todo = [(seq, op) for seq, op in numbered if op.kind in stage]
+        if not todo:
+            continue
+        if "create_card" in stage:
+            with tracing.phase(name):
+                results.extend(_create_cards(client, board_id, todo, list_ids, max_in_flight, journal, index))
+            continue
+        with tracing.phase(name), FanOut(max_in_flight) as fanout:
+            # Read now, after the earlier stages landed: a bulk call acts on the live list, not the snapshot.
+            drifted = _drifted_lists(client, [op for _, op in todo])
+            futures = [
+                fanout.submit(_guarded, client, board_id, op, list_ids, label_ids, journal, seq, drifted) for seq, op in todo
+            ]
+        results.extend(f.result() for f in futures)
+    if journal and all(r.ok for r in results):
+        journal.complete()
+    return results
+
+
+def apply(client, snapshot, ops, max_in_flight=DEFAULT_MAX_IN_FLIGHT, journal=None, index=None):
+    """Execute a plan against the board. Returns OpResults in plan order.
+
+    With a Journal, the plan is recorded before anything is sent and every
+    operation's outcome as it finishes, so resume() can pick up after a crash.
+    With an IdempotencyIndex, new cards with a key are recorded in it as they go up.
+    """
+    list_ids = {lst.name: lst.id for lst in snapshot.lists}
+    label_ids = {lb.name: lb.id for lb in snapshot.labels}
+    if journal:
+        journal.begin(snapshot.id, ops, dict(list_ids), dict(label_ids))
+    return _execute(client, snapshot.id, list(enumerate(ops)), list_ids, label_ids, max_in_flight, journal, index)
+
+
+def _unfinished(index, board_id, op):
+    """A keyed new card the index has, checklist not finished: seed_cards() resumes it, so the name check mustn't."""
+    if not index or op.kind != "create_card" or not op.payload.get("key"):
+        return False
+    entry = index.get(board_id, op.payload["key"])
+    return entry is not None and not entry.complete
+
+
+def _landed_creates(client, board_id, numbered, list_ids, label_ids, index=None):
+    """Creates an interrupted run may have sent without recording: {seq: id} of those already on the board."""
+    numbered = [(seq, op) for seq, op in numbered if not _unfinished(index, board_id, op)]
+    kinds = {op.kind for _, op in numbered}
+    reads = {
+        "create_list": (f"/boards/{board_id}/lists", {"fields": "name"}),
+        "create_label": (f"/boards/{board_id}/labels", {"fields": "name"}),
+        "create_card": (f"/boards/{board_id}/cards", {"fields": "name", "limit": CARD_PAGE_SIZE}),
+    }
+    reads = {kind: call for kind, call in reads.items() if kind in kinds}
+    pages = dict(zip(reads, client.get_batch(list(reads.values()))))
+    if "create_card" in pages:
+        pages["create_card"] = client.iter_cards(board_id, first_page=pages["create_card"], fields="name")
+    existing = {kind: {item["name"]: item["id"] for item in items} for kind, items in pages.items()}
+    landed = {}
+    for seq, op in numbered:
+        found = existing.get(op.kind, {}).get(op.target)
+        if found:
+            landed[seq] = found
+            if op.kind == "create_list":
+                list_ids[op.target] = found
+            elif op.kind == "create_label":
+                label_ids[op.target] = found
+    return landed
+
+
+def resume(client, journal, max_in_flight=DEFAULT_MAX_IN_FLIGHT, index=None):
+    """Replay the operations an interrupted apply() never finished. Returns OpResults, or None if nothing is pending."""
+    state = journal.load()
+    if state is None:
+        return None
+    board_id, list_ids, label_ids, pending = state
+    numbered = [(seq, Operation(e["op"], e["target"], e["payload"], e["summary"])) for seq, e in pending]
+    journal.reopen()
+    with tracing.phase("resume"):
+        landed = _landed_creates(client, board_id, numbered, list_ids, label_ids, index)
+    results = []
+    for seq, op in numbered:
+        if seq in landed:
+            journal.done(seq, landed[seq])
+            results.append(OpResult(op))
+    remaining = [(seq, op) for seq, op in numbered if seq not in landed]
+    return results + _execute(client, board_id, remaining, list_ids, label_ids, max_in_flight, journal, index)
+
+
+def run_resume(client, board_ref, max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+    """--resume for a script: finish the board's interrupted run and report. Returns an exit code."""
+    with Journal(board_ref) as journal, IdempotencyIndex() as index:
+        try:
+            results = resume(client, journal, max_in_flight, index)
+        except TrelloError as e:
+            print(f"Resume failed: {e.text}", file=sys.stderr)
+            return 1
+    if results is None:
+        print("No interrupted run to resume; the last apply finished or was rolled back (finish a partial rollback with --rollback).")
+        return 0
+    ok = print_results(results)
+    invalidate_snapshot(board_ref)
+    print(f"\nResumed: {ok}/{len(results)} pending operation(s) done.")
+    return 0 if ok == len(results) else 1
+
+
+def _undo_calls(client, op, created, label_ids):
+    """(function, *args) calls that undo one landed operation."""
+    kind, payload = op.kind, op.payload
+    if kind == "create_list":
+        return [(client.archive_list, created)]
+    if kind == "create_label":
+        return [(client.delete_label, created)]
+    if kind == "archive_card":
+        return [(client.unarchive_card, op.target)]
+    if kind == "archive_all_cards":
+        return [(client.unarchive_card, card_id) for card_id in payload.get("cards", ())]
+    if kind == "move_card":
+        return [(client.move_card, op.target, payload["from"])]
+    if kind == "move_all_cards":
+        return [(client.move_card, card_id, op.target) for card_id in payload.get("cards", ())]
+    if kind == "create_card":
+        return [(client.archive_card, created)]
+    if kind == "add_label":
+        return [(client.remove_label, op.target, label_ids[payload["label"]])]
+    raise ValueError(f"Unknown operation kind: {kind}")
+
+
+def _attempt(fn, *args):
+    try:
+        fn(*args)
+    except TrelloError as e:
+        return e
+    return None
+
+
+def rollback(client, journal, max_in_flight=DEFAULT_MAX_IN_FLIGHT, index=None):
+    """Undo every write the journal's last run landed. Returns OpResults per original op, or None if there is nothing to undo.
+
+    Stages run in reverse (labels come off, new cards are archived and cards move
+    back before unarchived cards return and created lists/labels go), each one
+    concurrently, with bulk operations split into their per-card inverses.
+    Operations undone successfully are journaled, so a second rollback after a
+    partial failure only retries the rest. Archived new cards are dropped from the
+    IdempotencyIndex, so the next run makes them again.
+    """
+    state = journal.landed()
+    if state is None:
+        return None
+    board_id, label_ids, landed = state
+    journal.reopen()
+    results = []
+    for name, stage in zip(reversed(STAGE_NAMES), reversed(STAGES)):
+        todo = [
+            (seq, Operation(e["op"], e["target"], e["payload"], e["summary"]), created)
+            for seq, e, created in landed
+            if e["op"] in stage
+        ]
+        with tracing.phase(f"rollback-{name}"), FanOut(max_in_flight) as fanout:
+            submitted = []
+            for seq, op, created in todo:
+                if op.kind.startswith("create_") and not created:
+                    error = TrelloError(op.kind, op.target, 0, "the id it created was not recorded")
+                    submitted.append((seq, op, [], error))
+                    continue
+                calls = [fanout.submit(_attempt, *call) for call in _undo_calls(client, op, created, label_ids)]
+                submitted.append((seq, op, calls, None))
+        for seq, op, calls, error in submitted:
+            error = error or next((e for e in (f.result() for f in calls) if e), None)
+            if error is None:
+                journal.undone(seq)
+                if index and op.kind == "create_card" and op.payload.get("key"):
+                    index.forget(board_id, op.payload["key"])
+            results.append(OpResult(op, error))
+    if all(r.ok for r in results):
+        journal.rolled_back()
+    return results
+
+
+def run_rollback(client, board_ref, max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+    """--rollback for a script: undo the board's last run and report. Returns an exit code."""
+    with Journal(board_ref) as journal, IdempotencyIndex() as index:
+        try:
+            results = rollback(client, journal, max_in_flight, index)
+        except TrelloError as e:
+            print(f"Rollback failed: {e.text}", file=sys.stderr)
+            return 1
+    if results is None:
+        print("Nothing to roll back; no run is journaled for this board, or it was already rolled back.")
+        return 0
+    ok = 0
+    for result in results:
+        if result.ok:
+            ok += 1
+            print(f"  Undid {result.op.kind}: {result.op.summary}")
+        else:
+            print(f"  Could not undo {result.op.kind} '{result.op.summary}': {result.error.text}", file=sys.stderr)
+    invalidate_snapshot(board_ref)
+    print(f"\nRolled back: {ok}/{len(results)} operation(s) undone.")
+    return 0 if ok == len(results) else 1
+
+
+_DONE = {
+    "create_list": "Created list: {}",
+    "create_label": "Created label: {}",
+    "archive_card": "Archived: {}",
+    "archive_all_cards": "Archived all cards in {}",
+    "move_card": "Moved: {}",
+    "move_all_cards": "Moved all cards: {}",
+    "create_card": "Added: {}",
+    "add_label": "+ {}",
+}
+
+
+def print_results(results):
+    """One line per executed operation (failures to stderr). Returns the number that succeeded."""
+    ok = 0
+    for result in results:
+        op = result.op
+        if result.ok:
+            ok += 1
+            print("  " + _DONE[op.kind].format(op.summary))
+        else:
+            print(f"  Failed {op.kind} '{op.summary}': {result.error.text}", file=sys.stderr)
+    return ok
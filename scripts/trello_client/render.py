@@ -0,0 +1,50 @@
+"""
+Markdown card descriptions for the playbook scripts, rendered from playbook.py records.
+
+    phase_desc(phase)                                   # template card (create_sprint_board.py)
+    phase_desc(phase, "Outputs", checklist=False, lead="Moaz")   # placeholder (add_phase_placeholders.py)
+    spec_desc(template)                                 # Problem Spec / Solution Spec / Release Post
+
+Phase and Template are frozen, so they hash by content: each distinct card body
+is rendered once per process and reused by every script and board that asks for
+it. same_desc() compares a rendered body with the desc already on a card the way
+Trello stores it, so seeding can skip the PUT when nothing changed.
+"""
+from functools import lru_cache
+
+# Section layouts: heading line, then one line per item.
+_SECTION = "**{heading}:**"
+_BULLET = "- {}"
+_TODO = "- [ ] {}"
+
+
+def _section(heading, items, line=_BULLET):
+    return [_SECTION.format(heading=heading), *(line.format(item) for item in items)]
+
+
+@lru_cache(maxsize=None)
+def phase_desc(phase, outputs_heading="Required outputs", checklist=True, lead=None):
+    """Purpose, outputs and exit criteria (plus the checklist as to-dos, and the lead) for a phase card."""
+    lines = [f"**Purpose:** {phase.purpose}", ""]
+    lines += _section(outputs_heading, phase.outputs)
+    lines += ["", *_section("Exit criteria", phase.exit_criteria)]
+    if checklist:
+        lines += ["", *_section("Checklist (use card checklist)", phase.checklist, _TODO)]
+    if lead:
+        lines += ["", f"**Lead:** {lead}"]
+    return "\n".join(lines)
+
+
+@lru_cache(maxsize=None)
+def spec_desc(template):
+    """A spec template's description and its fields as to-dos."""
+    return "\n".join([template.description, "", *_section("Fields", template.fields, _TODO)])
+
+
+def same_desc(rendered, current):
+    """True if `current` (a card's desc from Trello) already is `rendered`, ignoring line endings and trailing space."""
+
+    def normal(text):
+        return "\n".join(line.rstrip() for line in (text or "").replace("\r\n", "\n").split("\n")).strip()
+
+    return normal(rendered) == normal(current)
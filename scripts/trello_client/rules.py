@@ -0,0 +1,202 @@
+"""
+Compiled card classification for the reconciling scripts, and the rules file they read.
+
+NameMatcher turns any number of name substrings into one regex built from their
+prefix trie, so a name is scanned once however many patterns there are (where
+`any(s in name for s in patterns)` rescans it per pattern). Classifier compiles
+a DesiredState's archive names, list mappings, move rules and label rules once;
+classify() then answers "archive it, or where does it end up and which labels
+must it carry" per card, with the rules that apply to each source list worked
+out the first time that list is seen.
+
+The rules themselves live in scripts/board_rules.json (TRELLO_BOARD_RULES
+points at another file), one section per script:
+
+    rules = load_board_rules()["admin_setup"]
+
+lead_member_ids() finds each week's lead on a board from its "leads" section
+(secrets.json or TRELLO_USERNAME_* override the usernames).
+
+A missing or malformed file raises RulesError before any request is made. The
+file is read once per process (again only if it changes), so run_boards.py pays
+for it once however many boards it runs.
+"""
+import json
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+from .credentials import load_secrets
+
+RULES_ENV = "TRELLO_BOARD_RULES"
+DEFAULT_RULES_PATH = Path(__file__).resolve().parents[1] / "board_rules.json"
+
+
+class RulesError(ValueError):
+    pass
+
+
+def _trie_pattern(patterns):
+    trie = {}
+    for pattern in patterns:
+        node = trie
+        for ch in pattern:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node):
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # A pattern ends here, so whatever follows is optional (search() only needs the shortest hit).
+        return f"(?:{body})?" if "" in node else body
+
+    return emit(trie)
+
+
+class NameMatcher:
+    """True for names containing any of `patterns` (case-sensitive unless ignore_case)."""
+
+    def __init__(self, patterns, ignore_case=False):
+        self.patterns = tuple(p for p in patterns if p)
+        flags = re.IGNORECASE if ignore_case else 0
+        # The compiled regex's search(): a match object (truthy) or None.
+        self.search = re.compile(_trie_pattern(self.patterns), flags).search if self.patterns else None
+
+    def __call__(self, name):
+        return self.search is not None and self.search(name) is not None
+
+    def __bool__(self):
+        return bool(self.patterns)
+
+
+@dataclass(frozen=True)
+class Classification:
+    archive: bool
+    list: str = None
+    labels: tuple = ()
+
+
+ARCHIVE = Classification(True)
+
+
+class Classifier:
+    """A DesiredState's per-card rules, compiled. classify() is one call per card.
+
+    Everything that depends only on the card's current list (its mapped target, the
+    move rules that apply there, the labels each outcome needs) is worked out the
+    first time that list is seen; per card only the name is scanned.
+    """
+
+    def __init__(self, desired, available_lists):
+        self.desired = desired
+        self.available_lists = available_lists
+        self.known_lists = set(desired.lists) | set(desired.keep_lists)
+        self.archive_names = frozenset(desired.archive_names)
+        self.archive_from = frozenset(desired.archive_from)
+        self.clear_lists = frozenset(desired.clear_lists)
+        self.move_rules = [(rule, NameMatcher(rule.substrings)) for rule in desired.move_rules]
+        self._by_list = {}
+
+    def _target_list(self, current):
+        """Where a card currently in `current` should end up before move rules."""
+        if current in self.desired.list_moves:
+            return self.desired.list_moves[current]
+        if self.desired.default_list and current not in self.known_lists:
+            return self.desired.default_list
+        return current
+
+    def _verdict(self, current, final):
+        if final != current and final not in self.available_lists:
+            final = current
+        labels = tuple(r.name for r in self.desired.label_rules if final not in r.exclude_lists)
+        return Classification(False, final, labels)
+
+    def _compile_list(self, current):
+        if current in self.clear_lists:
+            return ARCHIVE, ()
+        final = self._target_list(current)
+        rules = tuple(
+            (match.search, self._verdict(current, rule.target))
+            for rule, match in self.move_rules
+            if match and (not rule.from_lists or final in rule.from_lists)
+        )
+        return self._verdict(current, final), rules
+
+    def classify(self, name, current):
+        if name in self.archive_names and (not self.archive_from or current in self.archive_from):
+            return ARCHIVE
+        compiled = self._by_list.get(current)
+        if compiled is None:
+            compiled = self._by_list[current] = self._compile_list(current)
+        default, rules = compiled
+        for match, verdict in rules:
+            if match(name):
+                return verdict
+        return default
+
+
+def match_member(members, username, name_contains=()):
+    """Id of the member with this username, else of the first whose username or full name contains a hint."""
+    username = (username or "").strip().lower()
+    hint = NameMatcher(name_contains, ignore_case=True)
+    fallback = None
+    for m in members:
+        if username and m.username.lower() == username:
+            return m.id
+        if fallback is None and hint and (hint(m.full_name) or hint(m.username)):
+            fallback = m.id
+    return fallback
+
+
+# Lead by week: phases 1–3 = Moaz, phases 4–8 = Ahmad
+LEAD_BY_WEEK = {"A": "moaz", "B": "ahmad"}
+
+
+def lead_member_ids(members):
+    """Resolve Moaz and Ahmad to member IDs: secrets.json trello.member_username_* or env, else board_rules.json "leads"."""
+    trello = load_secrets().get("trello") or {}
+    leads = rule_section(load_board_rules(), "leads", moaz=dict, ahmad=dict)
+    ids = []
+    for who in ("moaz", "ahmad"):
+        username = trello.get(f"member_username_{who}") or os.environ.get(f"TRELLO_USERNAME_{who.upper()}") or leads[who].get("username")
+        ids.append(match_member(members, username, leads[who].get("name_contains", ())))
+    return tuple(ids)
+
+
+_loaded = {}
+
+
+def load_board_rules(path=None):
+    """The rules file as a dict of sections (read once per process while unchanged; don't modify it). Raises RulesError."""
+    path = Path(path or os.environ.get(RULES_ENV, "").strip() or DEFAULT_RULES_PATH)
+    try:
+        stat = os.stat(path)
+        key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+        if key in _loaded:
+            return _loaded[key]
+        with open(path, "r", encoding="utf-8") as f:
+            rules = json.load(f)
+    except OSError as e:
+        raise RulesError(f"{path}: {e.strerror or e}") from None
+    except ValueError as e:
+        raise RulesError(f"{path}: not valid JSON ({e})") from None
+    if not isinstance(rules, dict) or not all(isinstance(section, dict) for section in rules.values()):
+        raise RulesError(f"{path}: expected an object of sections")
+    _loaded[key] = rules
+    return rules
+
+
+def rule_section(rules, name, /, **expected):
+    """rules[name], checked to have each key in `expected` with that type. Raises RulesError."""
+    section = rules.get(name)
+    if not isinstance(section, dict):
+        raise RulesError(f"board rules: no '{name}' section")
+    for key, kind in expected.items():
+        if not isinstance(section.get(key), kind):
+            raise RulesError(f"board rules: {name}.{key} must be a {getattr(kind, '__name__', 'value')}")
+        if isinstance(section[key], list) and not all(isinstance(v, str) for v in section[key]):
+            raise RulesError(f"board rules: {name}.{key} must be a list of strings")
+    return section
@@ -0,0 +1,308 @@
+"""
+Whole-board snapshot, cached on disk.
+
+load_snapshot() pulls the board with its open lists, all labels, members and
+checklists in a single GET /boards/{id} call, pages through its open cards, and
+wraps the lot in a small typed model. Each model declares the API fields it reads
+(FIELDS) and the requests ask for exactly those, so card descriptions and badges
+never travel. The raw payload is cached under .trello_cache/; within the TTL the
+cache is used as-is, after it a one-field dateLastActivity probe decides whether
+the cached copy is still current. Callers about to write pass verify=True, which
+always runs the probe: a plan built from a copy that is a few minutes old would
+act on cards it has never seen. A copy fetched under a different projection is
+refetched. Scripts that write call invalidate_snapshot() so the next run sees
+their changes.
+"""
+import json
+import os
+import time
+from dataclasses import dataclass, field
+
+from . import projection, tracing
+from .client import CARD_PAGE_SIZE, TrelloError
+from .ids import forget_board, resolve_board
+from .projection import fields_param
+from .state import state_path
+
+SNAPSHOT_TTL = float(os.environ.get("TRELLO_SNAPSHOT_TTL", "300"))
+
+# Set to read snapshots through the local SQLite mirror (mirror.py).
+MIRROR_ENV = "TRELLO_MIRROR"
+
+@dataclass
+class Label:
+    id: str
+    name: str = ""
+    color: str = None
+
+    FIELDS = ("name", "color")
+
+    @classmethod
+    def from_api(cls, d):
+        return cls(d["id"], (d.get("name") or "").strip(), d.get("color"))
+
+
+@dataclass
+class TrelloList:
+    id: str
+    name: str
+    pos: float = 0
+
+    FIELDS = ("name", "pos")
+
+    @classmethod
+    def from_api(cls, d):
+        return cls(d["id"], d.get("name", ""), d.get("pos", 0))
+
+
+@dataclass
+class Member:
+    id: str
+    username: str = ""
+    full_name: str = ""
+
+    FIELDS = ("username", "fullName")
+
+    @classmethod
+    def from_api(cls, d):
+        return cls(d["id"], d.get("username") or "", d.get("fullName") or "")
+
+
+@dataclass
+class Card:
+    id: str
+    name: str
+    id_list: str
+    pos: float = 0
+    id_labels: list = field(default_factory=list)
+    id_members: list = field(default_factory=list)
+
+    # No desc: on boards with long descriptions it is most of the payload, and nothing here reads it.
+    FIELDS = ("name", "idList", "pos", "idLabels", "idMembers")
+
+    @classmethod
+    def from_api(cls, d):
+        return cls(
+            d["id"],
+            d.get("name", ""),
+            d.get("idList"),
+            d.get("pos", 0),
+            list(d.get("idLabels") or []),
+            list(d.get("idMembers") or []),
+        )
+
+
+@dataclass
+class Checklist:
+    id: str
+    id_card: str
+    name: str
+    items: list = field(default_factory=list)
+
+    FIELDS = ("idCard", "name")
+    ITEM_FIELDS = ("name", "pos")
+
+    @classmethod
+    def from_api(cls, d):
+        items = sorted(d.get("checkItems") or [], key=lambda i: i.get("pos", 0))
+        return cls(d["id"], d.get("idCard"), d.get("name", ""), [i.get("name", "") for i in items])
+
+
+@dataclass
+class BoardSnapshot:
+    id: str
+    name: str
+    short_link: str
+    url: str
+    date_last_activity: str
+    lists: list
+    cards: list
+    labels: list
+    members: list
+    checklists: list
+    fetched_at: float = 0
+
+    FIELDS = ("name", "shortLink", "url", "dateLastActivity")
+
+    @classmethod
+    def from_api(cls, d, fetched_at=0):
+        return cls(
+            d["id"],
+            d.get("name", ""),
+            d.get("shortLink", ""),
+            d.get("url", ""),
+            d.get("dateLastActivity"),
+            sorted((TrelloList.from_api(x) for x in d.get("lists", [])), key=lambda x: x.pos),
+            [Card.from_api(x) for x in d.get("cards", [])],
+            [Label.from_api(x) for x in d.get("labels", [])],
+            [Member.from_api(x) for x in d.get("members", [])],
+            [Checklist.from_api(x) for x in d.get("checklists", [])],
+            fetched_at,
+        )
+
+    def list_by_name(self, name):
+        return next((lst for lst in self.lists if lst.name == name), None)
+
+    def list_names_by_id(self):
+        return {lst.id: lst.name for lst in self.lists}
+
+    def label_by_name(self, name):
+        return next((lb for lb in self.labels if lb.name == name), None)
+
+    def cards_in(self, list_id):
+        return [c for c in self.cards if c.id_list == list_id]
+
+    def checklists_for(self, card_id):
+        return [cl for cl in self.checklists if cl.id_card == card_id]
+
+
+# The board read. Cards come separately: /boards/{id} can't page them.
+SNAPSHOT_PARAMS = {
+    "fields": fields_param(BoardSnapshot.FIELDS),
+    "lists": "open",
+    "list_fields": fields_param(TrelloList.FIELDS),
+    "labels": "all",
+    "label_fields": fields_param(Label.FIELDS),
+    "members": "all",
+    "member_fields": fields_param(Member.FIELDS),
+    "checklists": "all",
+    "checklist_fields": fields_param(Checklist.FIELDS),
+    "checkItem_fields": fields_param(Checklist.ITEM_FIELDS),
+}
+CARD_PARAMS = {"filter": "open", "fields": fields_param(Card.FIELDS)}
+
+# What a cache entry was fetched with; entries from another projection are refetched.
+_CACHE_PARAMS = {**SNAPSHOT_PARAMS, "card_fields": CARD_PARAMS["fields"]}
+
+
+class CardStream:
+    """A board's open cards, paged from Trello on every iteration instead of held in memory."""
+
+    def __init__(self, client, board_id):
+        self.client = client
+        self.board_id = board_id
+
+    def __iter__(self):
+        for d in self.client.iter_cards(self.board_id, **CARD_PARAMS):
+            yield Card.from_api(d)
+
+
+def _cache_path(board_ref):
+    return state_path(".trello_cache", f"board-{board_ref}.json")
+
+
+def _read_cache(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _write_cache(path, board, fetched_at):
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"fetchedAt": fetched_at, "params": _CACHE_PARAMS, "board": board}, f)
+    os.replace(tmp, path)
+
+
+def load_snapshot(client, board_ref, ttl=SNAPSHOT_TTL, refresh=False, stream_cards=False, verify=False):
+    """Board by id or shortLink as a BoardSnapshot. Raises TrelloError if the board can't be read.
+
+    verify=True is for callers that plan writes from the snapshot: a cached copy is
+    only used once the dateLastActivity probe confirms it, however young it is.
+
+    Cards are read page by page, so boards past Trello's per-response cap come back
+    whole. With stream_cards=True they aren't kept at all (unless a current cached
+    copy has them): snapshot.cards is a CardStream that pages through the board each
+    time it is iterated, so one pass over a huge board runs in bounded memory.
+
+    With TRELLO_MIRROR=1 the snapshot comes from the local SQLite mirror instead
+    (see mirror.py), synced from the board's action feed first; ttl doesn't apply,
+    and verify syncs even a board whose webhook receiver is live.
+    """
+    with tracing.phase("snapshot"):
+        try:
+            return _read_snapshot(client, board_ref, ttl, refresh, stream_cards, verify)
+        except TrelloError as e:
+            # A board id cached by name (ids.py) that no longer exists: look the name up again.
+            names = forget_board(board_ref) if e.status_code == 404 else []
+            fresh = resolve_board(client, names[0], refresh=True) if names else None
+            if not fresh or fresh == board_ref:
+                raise
+            return _read_snapshot(client, fresh, ttl, refresh, stream_cards, verify)
+
+
+def _read_snapshot(client, board_ref, ttl, refresh, stream_cards, verify):
+    if _mirror_enabled():
+        # Imported here: mirror.py builds on this module's models.
+        from .mirror import mirrored_snapshot
+
+        return mirrored_snapshot(client, board_ref, refresh, stream_cards, verify)
+    # verify: no TTL shortcut, so a cached copy is always probed first.
+    return _load(client, board_ref, 0 if verify else ttl, refresh, stream_cards)
+
+
+def _load(client, board_ref, ttl, refresh, stream_cards):
+    path = _cache_path(board_ref)
+    cached = None if refresh else _read_cache(path)
+    now = time.time()
+    usable = cached and cached.get("params") == _CACHE_PARAMS and (stream_cards or "cards" in cached["board"])
+    if usable:
+        board = cached["board"]
+        if projection.strict():
+            board = projection.guard(board, _CACHE_PARAMS)
+        if now - cached["fetchedAt"] < ttl:
+            return _snapshot(client, board, cached["fetchedAt"])
+        try:
+            last = client.get_board(board_ref, fields="dateLastActivity").get("dateLastActivity")
+        except TrelloError:
+            last = None
+        if last and last == board.get("dateLastActivity"):
+            _write_cache(path, board, now)
+            return _snapshot(client, board, now)
+    if stream_cards:
+        board = client.get_board(board_ref, **SNAPSHOT_PARAMS)
+    else:
+        board, cards = read_board(client, board_ref)
+        board = {**board, "cards": list(cards)}
+    _write_cache(path, board, now)
+    return _snapshot(client, board, now)
+
+
+def read_board(client, board_ref, *extra):
+    """The board (SNAPSHOT_PARAMS) and an iterator over its open cards, first page included.
+
+    The board and the first card page go out as one GET /batch, together with any
+    extra (path, params) reads; their results follow the first two.
+    """
+    first_cards = (f"/boards/{board_ref}/cards", {**CARD_PARAMS, "limit": CARD_PAGE_SIZE})
+    board, page, *rest = client.get_batch([(f"/boards/{board_ref}", SNAPSHOT_PARAMS), first_cards, *extra])
+    return (board, client.iter_cards(board["id"], first_page=page, **CARD_PARAMS), *rest)
+
+
+def _snapshot(client, board, fetched_at):
+    if "cards" in board:
+        return BoardSnapshot.from_api(board, fetched_at)
+    snapshot = BoardSnapshot.from_api({**board, "cards": []}, fetched_at)
+    snapshot.cards = CardStream(client, snapshot.id)
+    return snapshot
+
+
+def _mirror_enabled():
+    return os.environ.get(MIRROR_ENV, "").strip().lower() in ("1", "true", "yes")
+
+
+def invalidate_snapshot(*board_refs):
+    """Drop cached snapshots after writing to a board (pass every ref it was loaded by)."""
+    for ref in board_refs:
+        try:
+            _cache_path(ref).unlink()
+        except FileNotFoundError:
+            pass
+    if _mirror_enabled():
+        from .mirror import Mirror
+
+        with Mirror() as mirror:
+            for ref in board_refs:
+                mirror.mark_dirty(ref)
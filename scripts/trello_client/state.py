@@ -0,0 +1,18 @@
+"""
+Where local Trello state lives (snapshot cache, indexes, journals).
+
+Defaults to the repo root, next to secrets.json; TRELLO_STATE_DIR moves all of it
+(benchmarks and tests point it at a temp dir).
+"""
+import os
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def state_path(*parts):
+    base = os.environ.get("TRELLO_STATE_DIR", "").strip()
+    path = Path(base) if base else REPO_ROOT
+    path = path.joinpath(*parts)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path
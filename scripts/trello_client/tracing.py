@@ -0,0 +1,279 @@
+"""
+Per-request tracing for the scripts' HTTP calls (the Trello client and archive/setup_slack.py).
+
+Every call becomes a CallRecord: service, method, route template (/cards/{id}),
+status, duration, bytes each way, retry attempt, time spent waiting on the rate
+limiter and the phase it ran in. Each record goes to every registered sink:
+
+- JsonlSink: one JSON line per call, appended to a file.
+- SummarySink: per phase/route table (calls, errors, 429s, p50/p95/max, bytes)
+  printed to stderr at exit.
+- PrometheusSink: counters and duration sums in node_exporter textfile format,
+  written at exit.
+
+add_sink() registers any object with emit(record) (and optionally close()).
+SCRIPT_TRACE sets sinks up for any script without code changes:
+
+    SCRIPT_TRACE=summary,jsonl=trace.jsonl,prom=trello.prom python scripts/restructure_sprint_board.py
+
+phase("archive") labels the calls made inside it, so a slow stage of a board
+migration shows up as its own rows. The phase is a context variable: boards run
+side by side by run_boards.py each keep their own, and FanOut runs every task in
+a copy of the submitter's context, so worker threads inherit the phase they were
+started from. With no sinks registered, recording is a no-op.
+"""
+import atexit
+import contextvars
+import json
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from urllib.parse import urlsplit
+
+TRACE_ENV = "SCRIPT_TRACE"
+
+# Path segment after one of these is an id (or shortLink), except /members/me.
+_ID_SEGMENT = re.compile(r"/(boards|lists|cards|checklists|checkItem|labels|members|organizations|actions|webhooks)/(?!me(?:/|$))[^/]+")
+
+
+def route_template(path):
+    """/boards/m47dQixP/cards -> /boards/{id}/cards, so calls group by endpoint."""
+    return _ID_SEGMENT.sub(r"/\1/{id}", path)
+
+
+@dataclass
+class CallRecord:
+    service: str
+    method: str
+    route: str
+    status: int
+    duration: float
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    attempt: int = 0
+    waited: float = 0.0
+    phase: str = ""
+    ts: float = 0.0
+
+
+_sinks = []
+_lock = threading.Lock()
+_phase = contextvars.ContextVar("tracing_phase", default="")
+_configured = False
+
+
+def add_sink(sink):
+    with _lock:
+        if not _sinks:
+            atexit.register(close_sinks)
+        _sinks.append(sink)
+    return sink
+
+
+def close_sinks():
+    with _lock:
+        sinks = list(_sinks)
+        _sinks.clear()
+    for sink in sinks:
+        close = getattr(sink, "close", None)
+        if close:
+            close()
+
+
+def enabled():
+    return bool(_sinks)
+
+
+@contextmanager
+def phase(name):
+    """Label every call made inside the block with `name` (in this context, and the FanOut tasks it submits)."""
+    token = _phase.set(name)
+    try:
+        yield
+    finally:
+        _phase.reset(token)
+
+
+def emit(record):
+    record.phase = record.phase or _phase.get()
+    record.ts = record.ts or time.time()
+    for sink in list(_sinks):
+        sink.emit(record)
+
+
+def record_response(service, response, path=None, duration=None, attempt=0, waited=0.0):
+    """Turn a requests.Response into a CallRecord for every sink. `path` defaults to the URL's."""
+    if not _sinks:
+        return
+    request = response.request
+    body = request.body or b""
+    emit(
+        CallRecord(
+            service=service,
+            method=request.method,
+            route=route_template(path or urlsplit(response.url).path),
+            status=response.status_code,
+            duration=response.elapsed.total_seconds() if duration is None else duration,
+            # Trello takes most arguments in the query string, so the URL counts too.
+            bytes_sent=len(request.url) + len(body if isinstance(body, bytes) else body.encode("utf-8")),
+            bytes_received=len(response.content),
+            attempt=attempt,
+            waited=waited,
+        )
+    )
+
+
+def instrument(session, service):
+    """Trace every call a plain requests.Session makes (duration is time to response headers)."""
+    configure_from_env()
+
+    def hook(response, *args, **kwargs):
+        record_response(service, response)
+        return response
+
+    session.hooks["response"].append(hook)
+    return session
+
+
+class JsonlSink:
+    def __init__(self, path):
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def emit(self, record):
+        line = json.dumps(asdict(record)) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class _Aggregate:
+    """Records grouped by (phase, service, method, route)."""
+
+    def __init__(self):
+        self.groups = {}
+        self._lock = threading.Lock()
+
+    def emit(self, record):
+        key = (record.phase, record.service, record.method, record.route)
+        with self._lock:
+            group = self.groups.setdefault(
+                key, {"durations": [], "errors": 0, "throttled": 0, "retries": 0, "bytes": 0, "waited": 0.0, "statuses": {}}
+            )
+            group["durations"].append(record.duration)
+            group["statuses"][record.status] = group["statuses"].get(record.status, 0) + 1
+            if record.status == 429:
+                group["throttled"] += 1
+            elif not 200 <= record.status < 300:
+                group["errors"] += 1
+            if record.attempt:
+                group["retries"] += 1
+            group["bytes"] += record.bytes_sent + record.bytes_received
+            group["waited"] += record.waited
+
+
+class SummarySink(_Aggregate):
+    def __init__(self, stream=None):
+        super().__init__()
+        self.stream = stream
+
+    def close(self):
+        out = self.stream or sys.stderr
+        if not self.groups:
+            return
+        print("\nHTTP calls by phase and route:", file=out)
+        print(
+            f"  {'phase':<12} {'service':<7} {'route':<40} {'calls':>6} {'err':>4} {'429':>4}"
+            f" {'p50 ms':>7} {'p95 ms':>7} {'max ms':>7} {'KiB':>7} {'wait s':>7}",
+            file=out,
+        )
+        for (phase_name, service, method, route), g in sorted(self.groups.items()):
+            d = g["durations"]
+            print(
+                f"  {phase_name or '-':<12} {service:<7} {method + ' ' + route:<40} {len(d):>6} {g['errors']:>4}"
+                f" {g['throttled']:>4} {_percentile(d, 0.5) * 1000:>7.0f} {_percentile(d, 0.95) * 1000:>7.0f}"
+                f" {max(d) * 1000:>7.0f} {g['bytes'] / 1024:>7.1f} {g['waited']:>7.2f}",
+                file=out,
+            )
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+class PrometheusSink(_Aggregate):
+    """Textfile-collector output; written to a temp file and renamed so the collector never reads half a file."""
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = Path(path)
+
+    def close(self):
+        lines = [
+            "# HELP script_http_requests_total HTTP calls made by the board scripts.",
+            "# TYPE script_http_requests_total counter",
+        ]
+        rest = {
+            "script_http_request_duration_seconds": ("summary", "Time per HTTP call."),
+            "script_http_retries_total": ("counter", "Calls that were retries after a 429."),
+            "script_http_bytes_total": ("counter", "Request plus response body bytes."),
+            "script_rate_limit_wait_seconds_total": ("counter", "Time spent waiting on the client-side rate limiter."),
+        }
+        series = {name: [] for name in rest}
+        for (phase_name, service, method, route), g in sorted(self.groups.items()):
+            base = dict(service=service, phase=phase_name, method=method, route=route)
+            for status, count in sorted(g["statuses"].items()):
+                lines.append(f"script_http_requests_total{_labels(**base, status=status)} {count}")
+            series["script_http_request_duration_seconds"] += [
+                f"script_http_request_duration_seconds_sum{_labels(**base)} {sum(g['durations']):.6f}",
+                f"script_http_request_duration_seconds_count{_labels(**base)} {len(g['durations'])}",
+            ]
+            series["script_http_retries_total"].append(f"script_http_retries_total{_labels(**base)} {g['retries']}")
+            series["script_http_bytes_total"].append(f"script_http_bytes_total{_labels(**base)} {g['bytes']}")
+            series["script_rate_limit_wait_seconds_total"].append(
+                f"script_rate_limit_wait_seconds_total{_labels(**base)} {g['waited']:.6f}"
+            )
+        for name, (kind, help_text) in rest.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", *series[name]]
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def configure_from_env():
+    """Register the sinks named in SCRIPT_TRACE (summary, jsonl=<path>, prom=<path>) once per process."""
+    global _configured
+    with _lock:
+        if _configured:
+            return
+        _configured = True
+    for spec in os.environ.get(TRACE_ENV, "").split(","):
+        name, _, arg = spec.strip().partition("=")
+        if not name:
+            continue
+        if name == "summary":
+            add_sink(SummarySink())
+        elif name == "jsonl":
+            add_sink(JsonlSink(arg or "trace.jsonl"))
+        elif name == "prom":
+            add_sink(PrometheusSink(arg or "trello.prom"))
+        else:
+            print(f"{TRACE_ENV}: unknown sink '{name}' (use summary, jsonl=<path>, prom=<path>)", file=sys.stderr)
@@ -0,0 +1,231 @@
+"""
+Webhook receiver that keeps a board's SQLite mirror current as people edit it.
+
+    TRELLO_API_SECRET=... PYTHONPATH=scripts python -m trello_client.webhook m47dQixP \\
+        --port 8787 --callback-url https://<tunnel>/trello-webhook
+
+The key and token come from get_trello_credentials() (env, then secrets.json,
+then a prompt); the API secret from TRELLO_API_SECRET or trello.api_secret in
+secrets.json.
+
+The receiver syncs the mirror, serves the callback on localhost (put any tunnel
+in front of it and pass the public URL as --callback-url), registers a Trello
+webhook for the board and removes it again on exit. Trello's HEAD check gets a
+200. Every POST must carry a valid X-Trello-Webhook signature: base64
+HMAC-SHA1 of the body plus the callback URL, keyed with the API secret. Valid
+actions are applied to the mirror on one worker thread, so the handler answers
+at once. Trello retries and reorders deliveries; the mirror applies each action
+once whatever order it comes in (see mirror.py), and the receiver syncs from
+the action feed every CATCH_UP_INTERVAL seconds to fill in any that never
+arrive.
+
+While it runs the receiver heartbeats in the mirror, and load_snapshot() (with
+TRELLO_MIRROR=1) reads the board straight from SQLite: no request, no cold
+fetch. A script that writes marks the board dirty, so the next read syncs
+instead of racing the webhook.
+
+The fake Trello server delivers signed webhooks too (see fake.py), so the whole
+loop runs locally.
+"""
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import os
+import queue
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .client import TrelloClient, TrelloError
+from .credentials import get_trello_credentials, load_secrets
+from .mirror import HEARTBEAT_INTERVAL, Mirror
+
+SECRET_ENV = "TRELLO_API_SECRET"
+DEFAULT_PORT = 8787
+CALLBACK_PATH = "/trello-webhook"
+# Seconds between feed syncs while running: a lost delivery is picked up within this.
+CATCH_UP_INTERVAL = 60
+
+
+def api_secret():
+    """The API key's secret (signs webhook callbacks) from env, then secrets.json; "" if neither has it."""
+    secret = os.environ.get(SECRET_ENV, "").strip()
+    if not secret:
+        secrets = load_secrets()
+        secret = (secrets.get("trello") or {}).get("api_secret") or secrets.get(SECRET_ENV) or ""
+        secret = secret.strip() if isinstance(secret, str) else ""
+    return secret
+
+
+def sign(secret, body, callback_url):
+    """Trello's X-Trello-Webhook value for a callback body (bytes) sent to callback_url."""
+    digest = hmac.new(secret.encode("utf-8"), body + callback_url.encode("utf-8"), hashlib.sha1).digest()
+    return base64.b64encode(digest).decode("ascii")
+
+
+def verify(secret, body, callback_url, signature):
+    return bool(signature) and hmac.compare_digest(sign(secret, body, callback_url), signature)
+
+
+class WebhookReceiver:
+    """Callback server plus the worker that applies delivered actions to the mirror."""
+
+    def __init__(self, client, mirror, board_id, secret, callback_url, host="127.0.0.1", port=DEFAULT_PORT):
+        self.client = client
+        self.mirror = mirror
+        self.board_id = board_id
+        self.secret = secret
+        self.callback_url = callback_url
+        self.webhook_id = None
+        self.received = 0
+        self.rejected = 0
+        self._actions = queue.Queue()
+        self._stop = threading.Event()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._threads = [
+            threading.Thread(target=self._server.serve_forever, daemon=True),
+            threading.Thread(target=self._apply_loop, daemon=True),
+            threading.Thread(target=self._heartbeat_loop, daemon=True),
+            threading.Thread(target=self._catch_up_loop, daemon=True),
+        ]
+
+    @property
+    def local_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{CALLBACK_PATH}"
+
+    def start(self):
+        # Serving before registering: Trello checks the URL with a HEAD while the POST is in flight.
+        self._threads[0].start()
+        self.webhook_id = self._register()
+        # Catch up on anything that landed before the webhook existed; deliveries queue meanwhile.
+        self.mirror.sync(self.client, self.board_id)
+        self.mirror.mark_live(self.board_id, self.webhook_id, self.callback_url)
+        for thread in self._threads[1:]:
+            thread.start()
+        return self
+
+    def stop(self, keep_webhook=False):
+        self._stop.set()
+        self._actions.put(None)
+        if self.webhook_id and not keep_webhook:
+            try:
+                self.client.delete(f"/webhooks/{self.webhook_id}")
+            except TrelloError as e:
+                print(f"Could not remove webhook {self.webhook_id}: {e}", file=sys.stderr)
+        self.mirror.mark_stopped(self.board_id)
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _register(self):
+        try:
+            return self.client.post(
+                "/webhooks", callbackURL=self.callback_url, idModel=self.board_id, description="board mirror"
+            )["id"]
+        except TrelloError as e:
+            if e.status_code != 400:
+                raise
+        # Already registered (e.g. by a receiver that exited with --keep-webhook): reuse it.
+        hooks = self.client.get(f"/tokens/{self.client.token}/webhooks", fields="idModel,callbackURL")
+        for hook in hooks:
+            if hook["idModel"] == self.board_id and hook["callbackURL"] == self.callback_url:
+                return hook["id"]
+        raise TrelloError("POST", "/webhooks", 400, "webhook rejected and no existing one matches")
+
+    def _apply_loop(self):
+        while True:
+            action = self._actions.get()
+            if action is None:
+                return
+            try:
+                self.mirror.apply_actions(self.client, self.board_id, [action])
+            except (OSError, TrelloError) as e:
+                # The action stays unapplied; the next sync replays it from the feed.
+                print(f"Could not apply {action.get('type')} {action['id']}: {e}", file=sys.stderr)
+                self.mirror.mark_dirty(self.board_id)
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(HEARTBEAT_INTERVAL):
+            self.mirror.mark_live(self.board_id)
+
+    def _catch_up_loop(self):
+        while not self._stop.wait(CATCH_UP_INTERVAL):
+            try:
+                self.mirror.sync(self.client, self.board_id)
+            except (OSError, TrelloError) as e:
+                print(f"Could not catch up from the action feed: {e}", file=sys.stderr)
+
+    def _deliver(self, body, signature):
+        """Check and queue one callback. Returns the HTTP status to answer with."""
+        if not verify(self.secret, body, self.callback_url, signature):
+            self.rejected += 1
+            return 401
+        try:
+            action = json.loads(body)["action"]
+        except (ValueError, KeyError, TypeError):
+            return 400
+        if (action.get("data", {}).get("board") or {}).get("id") == self.board_id:
+            self.received += 1
+            self._actions.put(action)
+        return 200
+
+    def _handler_class(self):
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _answer(self, status):
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_HEAD(self):
+                self._answer(200 if self.path == CALLBACK_PATH else 404)
+
+            def do_POST(self):
+                if self.path != CALLBACK_PATH:
+                    return self._answer(404)
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                self._answer(receiver._deliver(body, self.headers.get("X-Trello-Webhook")))
+
+        return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep a board's local mirror current from Trello webhooks.")
+    parser.add_argument("board", help="Board id or shortLink.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--callback-url", help=f"Public URL Trello posts to (default http://<host>:<port>{CALLBACK_PATH}).")
+    parser.add_argument("--keep-webhook", action="store_true", help="Leave the Trello webhook registered on exit.")
+    args = parser.parse_args(argv)
+
+    key, token = get_trello_credentials()
+    secret = api_secret()
+    if not key or not token or not secret:
+        print(f"Need Trello API key, token and secret ({SECRET_ENV} or trello.api_secret in secrets.json).", file=sys.stderr)
+        return 1
+    callback_url = args.callback_url or f"http://{args.host}:{args.port}{CALLBACK_PATH}"
+    with TrelloClient(key, token) as client, Mirror() as mirror:
+        try:
+            board_id = mirror.sync(client, args.board)
+            receiver = WebhookReceiver(client, mirror, board_id, secret, callback_url, args.host, args.port).start()
+        except (OSError, TrelloError) as e:
+            print(f"Could not start: {e}", file=sys.stderr)
+            return 1
+        print(f"Mirroring {board_id} via {callback_url} (webhook {receiver.webhook_id}); Ctrl+C to stop.")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+        receiver.stop(keep_webhook=args.keep_webhook)
+        print(f"Applied {receiver.received} action(s), rejected {receiver.rejected} callback(s).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())